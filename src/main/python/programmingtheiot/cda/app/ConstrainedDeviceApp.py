@@ -18,6 +18,7 @@ import programmingtheiot.common.ConfigConst as ConfigConst
 
 from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.cda.app.DeviceDataManager import DeviceDataManager
+from programmingtheiot.cda.app.FleetSimulator import FleetSimulator
 
 
 logging.basicConfig(format = '%(asctime)s:%(name)s:%(levelname)s:%(message)s', level = logging.DEBUG)
@@ -36,7 +37,14 @@ class ConstrainedDeviceApp():
 		"""
 		logging.info("Initializing CDA...")
 		
-		self.dataMgr = DeviceDataManager()
+		self.dataMgr = None
+		self.fleetSimulator = None
+		
+		# fleet mode simulates many CDAs (for gateway load testing) instead of running this one
+		if ConfigUtil().getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_FLEET_MODE_KEY):
+			self.fleetSimulator = FleetSimulator()
+		else:
+			self.dataMgr = DeviceDataManager()
 		
 		# TODO: implementation here
 
@@ -47,7 +55,10 @@ class ConstrainedDeviceApp():
 		"""
 		logging.info("Starting CDA...")
 		
-		self.dataMgr.startManager()
+		if self.fleetSimulator:
+			self.fleetSimulator.startSimulator()
+		else:
+			self.dataMgr.startManager()
 		# TODO: implementation here
 		
 		logging.info("CDA started.")
@@ -59,7 +70,10 @@ class ConstrainedDeviceApp():
 		"""
 		logging.info("CDA stopping...")
 		
-		self.dataMgr.stopManager()
+		if self.fleetSimulator:
+			self.fleetSimulator.stopSimulator()
+		else:
+			self.dataMgr.stopManager()
 		# TODO: implementation here
 		
 		logging.info("CDA stopped with exit code %s.", str(code))
@@ -10,15 +10,21 @@
 import logging
 
 from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+from programmingtheiot.cda.connection.AsyncCoapClientConnector import AsyncCoapClientConnector
 from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
 from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
 
+from programmingtheiot.cda.app.TelemetryBatcher import TelemetryBatcher
+from programmingtheiot.cda.app.TelemetryFilter import TelemetryFilter
+from programmingtheiot.cda.app.UpstreamDispatcher import UpstreamDispatcher
+
 from programmingtheiot.cda.system.ActuatorAdapterManager import ActuatorAdapterManager
 from programmingtheiot.cda.system.SensorAdapterManager import SensorAdapterManager
 from programmingtheiot.cda.system.SystemPerformanceManager import SystemPerformanceManager
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.DataCache import DataCache
 
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 from programmingtheiot.common.ISystemPerformanceDataListener import ISystemPerformanceDataListener
@@ -28,8 +34,8 @@ from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.ActuatorData import ActuatorData
 from programmingtheiot.data.SensorData import SensorData
+from programmingtheiot.data.SensorDataBatch import SensorDataBatch
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
-from time import sleep
 
 class DeviceDataManager(IDataMessageListener):
 	"""
@@ -51,8 +57,17 @@ class DeviceDataManager(IDataMessageListener):
 		# NOTE: this can also be retrieved from the configuration file
 		self.enableActuation    = True
 		
+		self.locationID = \
+			self.configUtil.getProperty( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.DEVICE_LOCATION_ID_KEY, defaultVal = ConfigConst.NOT_SET)
+		
+		self.dataCache = \
+			DataCache( \
+				ttlSecs = self.configUtil.getFloat( \
+					section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.DATA_CACHE_TTL_KEY, defaultVal = ConfigConst.DEFAULT_DATA_CACHE_TTL))
+		
 		self.sysPerfDataListener = None
-		self.telemetryDataListener = None
+		self.telemetryDataListeners = {}
 		self.sysPerfMgr         = None
 		self.sensorAdapterMgr   = None
 		self.actuatorAdapterMgr = None
@@ -123,16 +138,57 @@ class DeviceDataManager(IDataMessageListener):
 		self.enableCoapClient = \
 			self.configUtil.getBoolean(\
 				section = ConfigConst.CONSTRAINED_DEVICE,key = ConfigConst.ENABLE_COAP_CLIENT_KEY)
+		
+		self.enableAsyncCoapClient = \
+			self.configUtil.getBoolean(\
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.ENABLE_ASYNC_COAP_CLIENT_KEY)
 
+		# upstream payloads are encoded with the configured codec (JSON or CBOR)
+		self.dataUtil = \
+			DataUtil(contentFormat = self.configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_CONTENT_FORMAT_KEY, ConfigConst.DEFAULT_CONTENT_FORMAT))
+		
 		if self.enableMqttClient:
 			self.mqttClient = MqttClientConnector()
 			self.mqttClient.setDataMessageListener(self)
 			
+		# so a stalled broker can't hold the upstream dispatcher's workers
+		self.upstreamPublishTimeout = \
+			self.configUtil.getFloat( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_PUBLISH_TIMEOUT_KEY, ConfigConst.DEFAULT_UPSTREAM_PUBLISH_TIMEOUT)
+			
 		if self.enableCoapServer:
 			self.coapServer = CoapServerAdapter(dataMsgListener = self)
 			
 		if self.enableCoapClient:
-			self.coapClient = CoapClientConnector(dataMsgListener= self)
+			# POSTs from `_handleUpstreamTransmission()` are only queued by the
+			# async client, which sends them all from one event loop
+			if self.enableAsyncCoapClient:
+				self.coapClient = AsyncCoapClientConnector(dataMsgListener = self)
+			else:
+				self.coapClient = CoapClientConnector(dataMsgListener= self)
+		
+		# upstream messages are handed off to the dispatcher's worker pool
+		# so the scheduler threads invoking the callbacks never block on I/O
+		self.upstreamDispatcher = UpstreamDispatcher(transmitFunc = self._transmitUpstream)
+		
+		self.enableTelemetryBatching = \
+			self.configUtil.getBoolean( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.ENABLE_TELEMETRY_BATCHING_KEY)
+		
+		self.telemetryBatcher = None
+		
+		if self.enableTelemetryBatching:
+			self.telemetryBatcher = TelemetryBatcher(flushFunc = self._handleSensorDataBatch)
+		
+		self.enableTelemetryFilter = \
+			self.configUtil.getBoolean( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.ENABLE_TELEMETRY_FILTER_KEY)
+		
+		self.telemetryFilter = None
+		
+		if self.enableTelemetryFilter:
+			self.telemetryFilter = TelemetryFilter()
 			
 	def getLatestActuatorDataResponseFromCache(self, name: str = None) -> ActuatorData:
 		"""
@@ -141,7 +197,7 @@ class DeviceDataManager(IDataMessageListener):
 		@param name
 		@return ActuatorData
 		"""
-		pass
+		return self.dataCache.get(ResourceNameEnum.CDA_ACTUATOR_RESPONSE_RESOURCE, name, self.locationID)
 		
 	def getLatestSensorDataFromCache(self, name: str = None) -> SensorData:
 		"""
@@ -150,7 +206,7 @@ class DeviceDataManager(IDataMessageListener):
 		@param name
 		@return SensorData
 		"""
-		pass
+		return self.dataCache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name, self.locationID)
 	
 	def getLatestSystemPerformanceDataFromCache(self, name: str = None) -> SystemPerformanceData:
 		"""
@@ -159,7 +215,7 @@ class DeviceDataManager(IDataMessageListener):
 		@param name
 		@return SystemPerformanceData
 		"""
-		pass
+		return self.dataCache.get(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, name, self.locationID)
 	
 	def handleActuatorCommandMessage(self, data: ActuatorData = None) -> bool:
 		"""
@@ -191,15 +247,15 @@ class DeviceDataManager(IDataMessageListener):
 			logging.debug("Incoming actuator response received (from actuator manager): " + str(data))
 			
 			# store the data in the cache
-			self.actuatorResponseCache[data.getName()] = data
+			self.dataCache.put(ResourceNameEnum.CDA_ACTUATOR_RESPONSE_RESOURCE, data)
 			
-			# convert ActuatorData to JSON and get the msg resource
-			actuatorMsg = DataUtil().actuatorDataToJson(data)
+			# encode ActuatorData and get the msg resource
+			actuatorMsg = self.dataUtil.dataToPayload(data)
 			resourceName = ResourceNameEnum.CDA_ACTUATOR_RESPONSE_RESOURCE
 			
 			# delegate to the transmit function any potential upstream comm's
-			self._handleUpstreamTransmission(resource = resourceName, msg = actuatorMsg)
-			sleep(1)
+			self._handleUpstreamTransmission(resourceName = resourceName, msg = actuatorMsg)
+			
 			return True
 		else:
 			logging.warning("Incoming actuator response is invalid (null). Ignoring.")
@@ -229,15 +285,30 @@ class DeviceDataManager(IDataMessageListener):
 		if data:
 			logging.info("Incoming sensor data received (from sensor manager): " + str(data))
 			
+			self.dataCache.put(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, data)
+			
 			# TODO: Optionally, implement `_handleSensorDataAnalysis()` to handle internal analytics
 			self._handleSensorDataAnalysis(data)
 			
-			# Convert the `SensorData` instance to JSON
-			jsonData = DataUtil().sensorDataToJson(data = data)
+			# e.g. the CoAP server's telemetry resources, which notify their observers
+			for name in [data.getName(), None]:
+				if name in self.telemetryDataListeners:
+					self.telemetryDataListeners[name].onSensorDataUpdate(data)
+			
+			# readings that haven't changed (much) since the last one sent aren't
+			# sent upstream (or even encoded)
+			if self.telemetryFilter and not self.telemetryFilter.isSignificant(data):
+				logging.debug("Sensor data hasn't changed significantly. Not sent upstream: %s", data.getName())
+			elif self.telemetryBatcher:
+				# the batcher will call `_handleSensorDataBatch()` once the batch is full or old enough
+				self.telemetryBatcher.addSensorData(data)
+			else:
+				# Encode the `SensorData` instance (JSON or CBOR)
+				payload = self.dataUtil.dataToPayload(data)
+				
+				# Pass the resource and newly generated payload to `_handleUpstreamTransmission()`
+				self._handleUpstreamTransmission(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = payload)
 			
-			# Pass the resource and newly generated JSON data to `_handleUpstreamTransmission()`
-			self._handleUpstreamTransmission(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = jsonData)
-			sleep(1)
 			return True
 		else:
 			logging.warning("Incoming sensor data is invalid (null). Ignoring.")
@@ -255,11 +326,17 @@ class DeviceDataManager(IDataMessageListener):
 		"""
 		if data:
 			logging.debug("Incoming system performance message received (from sys perf manager): " + str(data))
-			jsonData = DataUtil().systemPerformanceDataToJson(data = data)
 			
-			# Pass the resource and newly generated JSON data to `_handleUpstreamTransmission()`
-			self._handleUpstreamTransmission(resourceName = ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, msg = jsonData)
-			sleep(1)
+			self.dataCache.put(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, data)
+			
+			if self.sysPerfDataListener:
+				self.sysPerfDataListener.onSystemPerformanceDataUpdate(data)
+			
+			payload = self.dataUtil.dataToPayload(data)
+			
+			# Pass the resource and newly generated payload to `_handleUpstreamTransmission()`
+			self._handleUpstreamTransmission(resourceName = ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, msg = payload)
+			
 			return True
 		else:
 			logging.warning("Incoming system performance data is invalid (null). Ignoring.")
@@ -271,11 +348,13 @@ class DeviceDataManager(IDataMessageListener):
 	
 	def setTelemetryDataListener(self, name: str = None, listener: ITelemetryDataListener = None):
 		if listener:
-			self.telemetryDataListener = listener
+			self.telemetryDataListeners[name] = listener
 
 	def startManager(self):
 		logging.info("Starting DeviceDataManager...")
 		
+		self.upstreamDispatcher.startDispatcher()
+		
 		if self.sysPerfMgr:
 			self.sysPerfMgr.startManager()
 		
@@ -284,8 +363,8 @@ class DeviceDataManager(IDataMessageListener):
 			
 		if self.mqttClient:
 			self.mqttClient.connectClient()
-			self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, 
-											callback = None, qos = ConfigConst.DEFAULT_QOS)
+			# uses the actuator command QoS from the config
+			self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, callback = None)
 			
 		if self.coapServer:
 			self.coapServer.startServer()
@@ -303,9 +382,17 @@ class DeviceDataManager(IDataMessageListener):
 		
 		if self.sensorAdapterMgr:	
 			self.sensorAdapterMgr.stopManager()
+		
+		# send any partial telemetry batch, then drain any pending
+		# upstream messages before the connections go away
+		if self.telemetryBatcher:
+			self.telemetryBatcher.flush()
+		
+		self.upstreamDispatcher.stopDispatcher()
 			
 		if self.mqttClient:
-			self.mqttClient.unsubscribeFromTopic(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE)
+			# not unsubscribed, so with a persistent session the broker keeps
+			# queuing actuator commands until the next start
 			self.mqttClient.disconnectClient()	
 			
 		if self.coapServer:
@@ -313,6 +400,7 @@ class DeviceDataManager(IDataMessageListener):
 			
 		if self.coapClient:
 			self.coapClient.stopObserver(resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE)
+			self.coapClient.disconnectClient()
 			
 		logging.info("Stopped DeviceDataManager.")
 		
@@ -410,21 +498,41 @@ class DeviceDataManager(IDataMessageListener):
 			# task implementations, and not this function
 			self.handleActuatorCommandMessage(ad)
 		
+	def _handleSensorDataBatch(self, batch: SensorDataBatch):
+		"""
+		Invoked by the telemetry batcher with each completed batch of
+		sensor readings, which is sent upstream as a single message.
+		"""
+		payload = self.dataUtil.dataToPayload(batch)
+		
+		self._handleUpstreamTransmission(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_BATCH_RESOURCE, msg = payload)
+		
 	def _handleUpstreamTransmission(self, resourceName: ResourceNameEnum, msg: str):
 		"""
 		Call this from handleActuatorCommandResponse(), handlesensorMessage(), and handleSystemPerformanceMessage()
 		to determine if the message should be sent upstream. Steps to take:
 		1) Check connection: Is there a client connection configured (and valid) to a remote MQTT or CoAP server?
-		2) Act on msg: If # 1 is true, send message upstream using one (or both) client connections.
+		2) Act on msg: If # 1 is true, queue the message with the upstream dispatcher, which will
+		   send it via _transmitUpstream() on one of its worker threads.
 		"""
 		logging.info("Upstream transmission invoked. Checking comm's integration.")
-	
+		
+		if self.mqttClient or self.coapClient:
+			self.upstreamDispatcher.submit(resourceName = resourceName, msg = msg)
+		else:
+			logging.debug("No upstream comm's configured. Ignoring message for resource: %s", str(resourceName))
+		
+	def _transmitUpstream(self, resourceName: ResourceNameEnum, msg: str):
+		"""
+		Invoked by the upstream dispatcher's worker threads to send the message
+		upstream using one (or both) client connections.
+		"""
 		# NOTE: If using MQTT, the following will attempt to publish the message to the broker
-  # if self.mqttClient:
-  # 	if self.mqttClient.publishMessage(resource = resourceName, msg = msg):
-  # 		logging.debug("Published incoming data to resource (MQTT): %s", str(resourceName))
-  # 	else:
-  # 		logging.warning("Failed to publish incoming data to resource (MQTT): %s", str(resourceName))
+		if self.mqttClient:
+			if self.mqttClient.publishMessage(resource = resourceName, msg = msg, timeout = self.upstreamPublishTimeout):
+				logging.debug("Published incoming data to resource (MQTT): %s", str(resourceName))
+			else:
+				logging.warning("Failed to publish incoming data to resource (MQTT): %s", str(resourceName))
 		
 		# NOTE: If using CoAP, the following will attempt to PUT the message to the server
 		if self.coapClient:
@@ -0,0 +1,271 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.cda.app.UpstreamDispatcher import UpstreamDispatcher
+from programmingtheiot.cda.connection.AsyncCoapClientConnector import AsyncCoapClientConnector
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.MqttClientConnectorPool import MqttClientConnectorPool
+from programmingtheiot.cda.sim.SensorDataGenerator import SensorDataGenerator
+
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+from programmingtheiot.data.SensorDataBatch import SensorDataBatch
+
+class FleetSimulator():
+	"""
+	Simulates a fleet of CDAs in a single process, for load testing the
+	gateway. Each simulated device has its own location ID and reports
+	humidity, pressure and temperature readings every poll cycle, like
+	a CDA running the sensor simulators.
+
+	Rather than a DeviceDataManager (and its schedulers) per device, the
+	whole fleet shares one scheduler job, one upstream dispatcher and one
+	client connection. Each sensor's values come from a fleet data stream
+	that computes all devices' values for a window of poll cycles at once,
+	as a (devices, time) array.
+
+	Each poll cycle's readings go upstream as SensorDataBatch messages of
+	'batchSize' devices each. The dispatcher isn't rate limited, as the
+	point is to load the gateway.
+
+	"""
+
+	# one hour of (minute) entries is computed at a time
+	DATA_CHUNK_SIZE = 60
+
+	def __init__(self, deviceCount: int = None, pollRate: int = None, batchSize: int = None, transmitFunc = None):
+		"""
+		Constructor. Any parameter left as None is read from the
+		ConstrainedDevice section of the configuration file.
+
+		@param deviceCount The number of devices to simulate.
+		@param pollRate The seconds between each round of readings.
+		@param batchSize The max number of devices per upstream message.
+		@param transmitFunc The optional function to send each message with, instead
+		of the configured client connections. Must accept 'resourceName' and 'msg'
+		keyword arguments.
+		"""
+		self.configUtil = ConfigUtil()
+
+		if deviceCount is None:
+			deviceCount = \
+				self.configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.FLEET_DEVICE_COUNT_KEY, ConfigConst.DEFAULT_FLEET_DEVICE_COUNT)
+
+		if pollRate is None:
+			pollRate = \
+				self.configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.POLL_CYCLES_KEY, ConfigConst.DEFAULT_POLL_CYCLES)
+
+		if batchSize is None:
+			batchSize = \
+				self.configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.FLEET_BATCH_SIZE_KEY, ConfigConst.DEFAULT_FLEET_BATCH_SIZE)
+
+		if deviceCount <= 0:
+			deviceCount = ConfigConst.DEFAULT_FLEET_DEVICE_COUNT
+
+		if pollRate <= 0:
+			pollRate = ConfigConst.DEFAULT_POLL_CYCLES
+
+		if batchSize <= 0:
+			batchSize = ConfigConst.DEFAULT_FLEET_BATCH_SIZE
+
+		self.deviceCount = deviceCount
+		self.pollRate    = pollRate
+		self.batchSize   = batchSize
+
+		locationIDPrefix = \
+			self.configUtil.getProperty( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY, defaultVal = ConfigConst.NOT_SET)
+
+		idWidth = len(str(deviceCount - 1))
+		self.locationIDs = [locationIDPrefix + '-' + str(i).zfill(idWidth) for i in range(deviceCount)]
+
+		self.dataUtil = \
+			DataUtil(contentFormat = self.configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_CONTENT_FORMAT_KEY, ConfigConst.DEFAULT_CONTENT_FORMAT))
+
+		self._initSensorDataStreams()
+
+		self.dataIndex  = 0
+		self.pollCount  = 0
+		self.msgCount   = 0
+
+		self.mqttClient = None
+		self.coapClient = None
+
+		if not transmitFunc:
+			transmitFunc = self._transmitUpstream
+
+			if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_MQTT_CLIENT_KEY):
+				# a pool of connectionPoolSize connections (just one by default)
+				self.mqttClient = MqttClientConnectorPool()
+
+			if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_COAP_CLIENT_KEY):
+				# every device's requests share the async client's one socket
+				if self.configUtil.getBoolean(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.ENABLE_ASYNC_COAP_CLIENT_KEY):
+					self.coapClient = AsyncCoapClientConnector()
+				else:
+					self.coapClient = CoapClientConnector()
+
+		self.upstreamDispatcher = UpstreamDispatcher(transmitFunc = transmitFunc, rateLimit = 0)
+
+		self.scheduler = BackgroundScheduler()
+		self.scheduler.add_job( \
+			self.handleTelemetry, 'interval', seconds = self.pollRate, \
+			max_instances = 1, coalesce = True, misfire_grace_time = 15)
+
+		logging.info("Created fleet simulator: devices = %d, poll rate = %d secs, batch size = %d", deviceCount, pollRate, batchSize)
+
+	def getDeviceCount(self) -> int:
+		return self.deviceCount
+
+	def getLocationIDs(self) -> list:
+		return self.locationIDs
+
+	def getMessageCount(self) -> int:
+		return self.msgCount
+
+	def getPollCount(self) -> int:
+		return self.pollCount
+
+	def handleTelemetry(self):
+		"""
+		Generates one round of readings for every device, and queues them
+		for upstream transmission as SensorDataBatch messages.
+		"""
+		dataIndex = self.dataIndex
+		self.dataIndex = (dataIndex + 1) % self.dataEntryCount
+
+		# (name, type ID, list of each device's value)
+		sensorValues = \
+			[(name, typeID, dataStream.getDataEntry(dataIndex).tolist()) for name, typeID, dataStream in self.sensorDataStreams]
+
+		for firstDevice in range(0, self.deviceCount, self.batchSize):
+			batch = SensorDataBatch()
+
+			for deviceIndex in range(firstDevice, min(firstDevice + self.batchSize, self.deviceCount)):
+				locationID = self.locationIDs[deviceIndex]
+
+				for name, typeID, values in sensorValues:
+					sensorData = SensorData(typeID = typeID, name = name)
+					sensorData.setValue(values[deviceIndex])
+					sensorData.setLocationID(locationID)
+
+					batch.addSensorData(sensorData)
+
+			payload = self.dataUtil.dataToPayload(batch)
+
+			if self.upstreamDispatcher.submit(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_BATCH_RESOURCE, msg = payload):
+				self.msgCount += 1
+
+		self.pollCount += 1
+
+		logging.debug("Queued fleet telemetry round %d for %d devices.", self.pollCount, self.deviceCount)
+
+	def startSimulator(self) -> bool:
+		"""
+		Connects the shared client connection (if any), then starts the
+		dispatcher and the polling scheduler.
+
+		@return bool True if started; False if already running.
+		"""
+		if self.scheduler.running:
+			logging.info("Fleet simulator already started. Ignoring.")
+			return False
+
+		if self.mqttClient:
+			self.mqttClient.connectClient()
+
+		self.upstreamDispatcher.startDispatcher()
+		self.scheduler.start()
+
+		logging.info("Started fleet simulator.")
+
+		return True
+
+	def stopSimulator(self) -> bool:
+		"""
+		Stops polling, sends any pending messages, then disconnects the
+		shared client connection (if any).
+
+		@return bool True if stopped; False if not running.
+		"""
+		if not self.scheduler.running:
+			logging.info("Fleet simulator already stopped. Ignoring.")
+			return False
+
+		self.scheduler.shutdown()
+		self.upstreamDispatcher.stopDispatcher()
+
+		if self.mqttClient:
+			self.mqttClient.disconnectClient()
+
+		if self.coapClient:
+			self.coapClient.disconnectClient()
+
+		logging.info("Stopped fleet simulator. Rounds = %d, messages = %d", self.pollCount, self.msgCount)
+
+		return True
+
+	def _initSensorDataStreams(self):
+		simDataHours = \
+			self.configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.SIM_DATA_HOURS_KEY, ConfigConst.DEFAULT_SIM_DATA_HOURS)
+		simDataSeed  = \
+			self.configUtil.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.SIM_DATA_SEED_KEY, ConfigConst.DEFAULT_SIM_DATA_SEED)
+
+		if simDataHours <= 0:
+			simDataHours = ConfigConst.DEFAULT_SIM_DATA_HOURS
+
+		dataGenerator = SensorDataGenerator(seed = simDataSeed if simDataSeed >= 0 else None)
+
+		# (name, type ID, curve, floor key, default floor, ceiling key, default ceiling)
+		sensorParams = [ \
+			(ConfigConst.HUMIDITY_SENSOR_NAME, ConfigConst.HUMIDITY_SENSOR_TYPE, SensorDataGenerator.DEFAULT_HUMIDITY_CURVE, \
+				ConfigConst.HUMIDITY_SIM_FLOOR_KEY, SensorDataGenerator.LOW_NORMAL_ENV_HUMIDITY, \
+				ConfigConst.HUMIDITY_SIM_CEILING_KEY, SensorDataGenerator.HI_NORMAL_ENV_HUMIDITY), \
+			(ConfigConst.PRESSURE_SENSOR_NAME, ConfigConst.PRESSURE_SENSOR_TYPE, SensorDataGenerator.DEFAULT_PRESSURE_CURVE, \
+				ConfigConst.PRESSURE_SIM_FLOOR_KEY, SensorDataGenerator.LOW_NORMAL_ENV_PRESSURE, \
+				ConfigConst.PRESSURE_SIM_CEILING_KEY, SensorDataGenerator.HI_NORMAL_ENV_PRESSURE), \
+			(ConfigConst.TEMP_SENSOR_NAME, ConfigConst.TEMP_SENSOR_TYPE, SensorDataGenerator.DEFAULT_TEMP_CURVE, \
+				ConfigConst.TEMP_SIM_FLOOR_KEY, SensorDataGenerator.LOW_NORMAL_INDOOR_TEMP, \
+				ConfigConst.TEMP_SIM_CEILING_KEY, SensorDataGenerator.HI_NORMAL_INDOOR_TEMP)]
+
+		self.sensorDataStreams = []
+
+		for name, typeID, curveType, floorKey, floorVal, ceilingKey, ceilingVal in sensorParams:
+			dataStream = \
+				dataGenerator.generateFleetSensorDataStream( \
+					deviceCount = self.deviceCount, curveType = curveType, \
+					minValue = self.configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, floorKey, floorVal), \
+					maxValue = self.configUtil.getFloat(ConfigConst.CONSTRAINED_DEVICE, ceilingKey, ceilingVal), \
+					endHour = simDataHours, chunkSize = self.DATA_CHUNK_SIZE)
+
+			self.sensorDataStreams.append((name, typeID, dataStream))
+
+		self.dataEntryCount = self.sensorDataStreams[0][2].getDataEntryCount()
+
+	def _transmitUpstream(self, resourceName: ResourceNameEnum, msg):
+		if self.mqttClient:
+			if not self.mqttClient.publishMessage(resource = resourceName, msg = msg):
+				logging.warning("Failed to publish fleet data to resource (MQTT): %s", str(resourceName))
+
+		if self.coapClient:
+			if not self.coapClient.sendPostRequest(resource = resourceName, payload = msg):
+				logging.warning("Failed to post fleet data to resource (CoAP): %s", str(resourceName))
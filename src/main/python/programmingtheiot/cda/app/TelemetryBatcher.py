@@ -0,0 +1,157 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+from programmingtheiot.data.SensorData import SensorData
+from programmingtheiot.data.SensorDataBatch import SensorDataBatch
+
+class TelemetryBatcher():
+	"""
+	Collects SensorData readings into a SensorDataBatch envelope, and
+	hands the envelope to 'flushFunc' once it holds 'maxBatchSize'
+	readings, or once its oldest reading is 'maxBatchAgeSecs' old -
+	whichever comes first.
+
+	The age-based flush runs on a timer thread that's armed when the
+	first reading of a new batch arrives, so a partially filled batch
+	never waits longer than 'maxBatchAgeSecs'.
+
+	"""
+
+	def __init__(self, flushFunc = None, maxBatchSize: int = None, maxBatchAgeSecs: float = None):
+		"""
+		Constructor. Any parameter left as None is read from the
+		ConstrainedDevice section of the configuration file.
+
+		@param flushFunc The function to call with each completed SensorDataBatch.
+		@param maxBatchSize The max number of readings per batch.
+		@param maxBatchAgeSecs The max age of the oldest reading in a batch, in seconds.
+		"""
+		configUtil = ConfigUtil()
+
+		if maxBatchSize is None:
+			maxBatchSize = \
+				configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TELEMETRY_BATCH_SIZE_KEY, ConfigConst.DEFAULT_TELEMETRY_BATCH_SIZE)
+
+		if maxBatchAgeSecs is None:
+			maxBatchAgeSecs = \
+				configUtil.getFloat( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TELEMETRY_BATCH_AGE_KEY, ConfigConst.DEFAULT_TELEMETRY_BATCH_AGE)
+
+		if maxBatchSize <= 0:
+			maxBatchSize = ConfigConst.DEFAULT_TELEMETRY_BATCH_SIZE
+
+		if maxBatchAgeSecs <= 0:
+			maxBatchAgeSecs = ConfigConst.DEFAULT_TELEMETRY_BATCH_AGE
+
+		self.flushFunc       = flushFunc
+		self.maxBatchSize    = maxBatchSize
+		self.maxBatchAgeSecs = maxBatchAgeSecs
+
+		self.batch      = None
+		self.flushTimer = None
+		self.lock       = threading.Lock()
+
+		logging.info("Telemetry batching enabled: max size = %d, max age = %s secs", self.maxBatchSize, str(self.maxBatchAgeSecs))
+
+	def addSensorData(self, data: SensorData = None) -> bool:
+		"""
+		Adds 'data' to the current batch, flushing the batch if it's full.
+
+		@param data The SensorData reading to add.
+		@return bool True if the reading was added; False if invalid.
+		"""
+		if not data:
+			return False
+
+		fullBatch = None
+
+		with self.lock:
+			if not self.batch:
+				self.batch = SensorDataBatch()
+				self._startFlushTimer()
+
+			self.batch.addSensorData(data)
+
+			if self.batch.getSensorDataCount() >= self.maxBatchSize:
+				fullBatch = self._takeBatch()
+
+		if fullBatch:
+			self._flushBatch(fullBatch)
+
+		return True
+
+	def flush(self) -> bool:
+		"""
+		Flushes the current batch (if any) regardless of its size or age.
+
+		@return bool True if a batch was flushed; False if there was nothing to flush.
+		"""
+		with self.lock:
+			batch = self._takeBatch()
+
+		if batch:
+			self._flushBatch(batch)
+			return True
+
+		return False
+
+	def getPendingCount(self) -> int:
+		with self.lock:
+			return self.batch.getSensorDataCount() if self.batch else 0
+
+	def setFlushFunction(self, flushFunc = None):
+		if flushFunc:
+			self.flushFunc = flushFunc
+
+	def _flushBatch(self, batch: SensorDataBatch):
+		# the envelope's time stamp reflects when it was sent, not created
+		batch.updateTimeStamp()
+
+		logging.debug("Flushing telemetry batch with %d reading(s).", batch.getSensorDataCount())
+
+		if self.flushFunc:
+			try:
+				self.flushFunc(batch)
+			except Exception:
+				logging.exception("Failed to flush telemetry batch.")
+
+	def _onFlushTimer(self, timedBatch: SensorDataBatch):
+		with self.lock:
+			# the batch may have already been flushed (and replaced) because it filled up
+			if self.batch is not timedBatch:
+				return
+
+			batch = self._takeBatch()
+
+		if batch:
+			self._flushBatch(batch)
+
+	def _startFlushTimer(self):
+		self.flushTimer = threading.Timer(self.maxBatchAgeSecs, self._onFlushTimer, args = (self.batch,))
+		self.flushTimer.daemon = True
+		self.flushTimer.start()
+
+	def _takeBatch(self) -> SensorDataBatch:
+		"""
+		Detaches and returns the current batch. Must be called with the lock held.
+		"""
+		batch = self.batch
+		self.batch = None
+
+		if self.flushTimer:
+			self.flushTimer.cancel()
+			self.flushTimer = None
+
+		return batch
@@ -0,0 +1,147 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+from programmingtheiot.data.SensorData import SensorData
+
+class TelemetryFilter():
+	"""
+	Decides which SensorData readings are worth sending upstream ('send
+	on change'). A reading is sent if it differs from the last reading
+	sent for the same sensor by at least the sensor's deadband, or if
+	the sensor's heartbeat time has passed since the last one was sent -
+	so a stable reading is still sent now and then, showing the device
+	is alive. The first reading, and any with the error flag set, are
+	always sent.
+
+	Each sensor type's deadband is either absolute, or a percentage of
+	the last value sent. Readings from sensor types with no deadband set
+	are always sent.
+
+	"""
+
+	# sensor type ID -> (deadband key, heartbeat key)
+	SENSOR_FILTER_KEYS = { \
+		ConfigConst.HUMIDITY_SENSOR_TYPE: (ConfigConst.HUMIDITY_DEADBAND_KEY, ConfigConst.HUMIDITY_HEARTBEAT_KEY), \
+		ConfigConst.PRESSURE_SENSOR_TYPE: (ConfigConst.PRESSURE_DEADBAND_KEY, ConfigConst.PRESSURE_HEARTBEAT_KEY), \
+		ConfigConst.TEMP_SENSOR_TYPE:     (ConfigConst.TEMP_DEADBAND_KEY, ConfigConst.TEMP_HEARTBEAT_KEY)}
+
+	def __init__(self):
+		"""
+		Constructor. Each sensor type's deadband and heartbeat time are read
+		from the ConstrainedDevice section of the configuration file, and can
+		be changed with setSensorFilter().
+		"""
+		configUtil = ConfigUtil()
+
+		defaultHeartbeatSecs = \
+			configUtil.getFloat( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.TELEMETRY_HEARTBEAT_KEY, ConfigConst.DEFAULT_TELEMETRY_HEARTBEAT)
+
+		# sensor type ID -> (deadband, isPercent, heartbeatSecs)
+		self.sensorFilters = { }
+
+		# (sensor type ID, name) -> (last value sent, monotonic time sent)
+		self.lastSent = { }
+
+		self.sentCount       = 0
+		self.suppressedCount = 0
+
+		self.lock = threading.Lock()
+
+		for typeID, (deadbandKey, heartbeatKey) in self.SENSOR_FILTER_KEYS.items():
+			deadband = \
+				configUtil.getProperty( \
+					ConfigConst.CONSTRAINED_DEVICE, deadbandKey, str(ConfigConst.DEFAULT_TELEMETRY_DEADBAND))
+
+			heartbeatSecs = \
+				configUtil.getFloat( \
+					ConfigConst.CONSTRAINED_DEVICE, heartbeatKey, defaultHeartbeatSecs)
+
+			try:
+				isPercent = deadband.strip().endswith('%')
+
+				self.setSensorFilter(typeID, float(deadband.strip().rstrip('%')), isPercent, heartbeatSecs)
+			except ValueError:
+				logging.warning("Invalid telemetry deadband for %s: %s. Sending every reading.", deadbandKey, deadband)
+
+	def getSentCount(self) -> int:
+		return self.sentCount
+
+	def getSuppressedCount(self) -> int:
+		return self.suppressedCount
+
+	def isSignificant(self, data: SensorData = None) -> bool:
+		"""
+		Checks if 'data' should be sent upstream, and if so, records it as
+		the last reading sent for its sensor.
+
+		@param data The SensorData reading.
+		@return bool True if the reading should be sent; False if not (or invalid).
+		"""
+		if not data:
+			return False
+
+		sensorFilter = self.sensorFilters.get(data.getTypeID())
+
+		if not sensorFilter:
+			self.sentCount += 1
+			return True
+
+		deadband, isPercent, heartbeatSecs = sensorFilter
+
+		sensorKey = (data.getTypeID(), data.getName())
+		value = data.getValue()
+		now = data.getMonotonicTimeStamp()
+
+		if now is None:
+			now = time.monotonic()
+
+		with self.lock:
+			lastSent = self.lastSent.get(sensorKey)
+
+			if lastSent and not data.hasErrorFlag():
+				lastValue, lastSentTime = lastSent
+				threshold = deadband * abs(lastValue) / 100.0 if isPercent else deadband
+
+				if abs(value - lastValue) < threshold and now - lastSentTime < heartbeatSecs:
+					self.suppressedCount += 1
+					return False
+
+			self.lastSent[sensorKey] = (value, now)
+			self.sentCount += 1
+
+		return True
+
+	def setSensorFilter(self, typeID: int, deadband: float = 0.0, isPercent: bool = False, heartbeatSecs: float = None):
+		"""
+		Sets the deadband and heartbeat time for readings from 'typeID' sensors.
+
+		@param typeID The sensor type ID.
+		@param deadband The min change to send (0 to send every reading).
+		@param isPercent If True, 'deadband' is a percentage of the last value sent.
+		@param heartbeatSecs The max time between readings sent (None for the default).
+		"""
+		if heartbeatSecs is None or heartbeatSecs <= 0:
+			heartbeatSecs = ConfigConst.DEFAULT_TELEMETRY_HEARTBEAT
+
+		if deadband <= 0.0:
+			self.sensorFilters.pop(typeID, None)
+			return
+
+		self.sensorFilters[typeID] = (deadband, isPercent, heartbeatSecs)
+
+		logging.info( \
+			"Telemetry filter for sensor type %d: deadband = %s%s, heartbeat = %s secs", \
+			typeID, str(deadband), '%' if isPercent else '', str(heartbeatSecs))
@@ -0,0 +1,273 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import collections
+import logging
+import threading
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.common.TokenBucket import TokenBucket
+
+class UpstreamDispatcher():
+	"""
+	Bounded, asynchronous dispatch queue for upstream messages.
+
+	Callers (typically the DeviceDataManager callbacks, which run on the
+	scheduler's worker threads) submit messages and return immediately.
+	Messages wait in a queue per resource, and a small pool of worker
+	threads invokes the transmit function for them, applying a token
+	bucket per resource so each is rate limited independently. Workers
+	only take a message whose resource has a token, so a throttled
+	resource never holds up the others.
+
+	If the queue is full, the oldest pending message (of any resource)
+	is dropped so the freshest telemetry is always the next to go out.
+
+	"""
+
+	def __init__(self, transmitFunc = None, queueSize: int = None, workerCount: int = None, rateLimit: float = None, burstSize: int = None):
+		"""
+		Constructor. Any parameter left as None is read from the
+		ConstrainedDevice section of the configuration file.
+
+		@param transmitFunc The function to call for each message. Must accept
+		'resourceName' and 'msg' keyword arguments.
+		@param queueSize The max number of pending messages.
+		@param workerCount The number of worker threads.
+		@param rateLimit The max messages per second for each resource (0 for no limit).
+		@param burstSize The max number of messages per resource that can be sent back-to-back.
+		"""
+		configUtil = ConfigUtil()
+
+		if queueSize is None:
+			queueSize = \
+				configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_QUEUE_SIZE_KEY, ConfigConst.DEFAULT_UPSTREAM_QUEUE_SIZE)
+
+		if workerCount is None:
+			workerCount = \
+				configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_WORKER_COUNT_KEY, ConfigConst.DEFAULT_UPSTREAM_WORKER_COUNT)
+
+		if rateLimit is None:
+			rateLimit = \
+				configUtil.getFloat( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_RATE_LIMIT_KEY, ConfigConst.DEFAULT_UPSTREAM_RATE_LIMIT)
+
+		if burstSize is None:
+			burstSize = \
+				configUtil.getInteger( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_BURST_SIZE_KEY, ConfigConst.DEFAULT_UPSTREAM_BURST_SIZE)
+
+		if queueSize <= 0:
+			queueSize = ConfigConst.DEFAULT_UPSTREAM_QUEUE_SIZE
+
+		if workerCount <= 0:
+			workerCount = ConfigConst.DEFAULT_UPSTREAM_WORKER_COUNT
+
+		self.transmitFunc = transmitFunc
+		self.queueSize    = queueSize
+		self.workerCount  = workerCount
+		self.rateLimit    = rateLimit
+		self.burstSize    = burstSize
+
+		# resource name -> deque of pending messages, and the resource name
+		# of each pending message, oldest first (to find the oldest overall)
+		self.pendingMsgs  = collections.OrderedDict()
+		self.arrivalOrder = collections.deque()
+		self.rateLimiters = {}
+		self.workers      = []
+		self.stopping     = False
+
+		self.dispatchedCount = 0
+		self.droppedCount    = 0
+		self.failedCount     = 0
+
+		self.statsLock = threading.Lock()
+		self.queueCond = threading.Condition()
+
+		logging.info( \
+			"Upstream dispatcher configured: queue size = %d, workers = %d, rate limit = %s msgs/sec, burst = %d", \
+			self.queueSize, self.workerCount, str(self.rateLimit), self.burstSize)
+
+	def getDispatchedCount(self) -> int:
+		return self.dispatchedCount
+
+	def getDroppedCount(self) -> int:
+		return self.droppedCount
+
+	def getFailedCount(self) -> int:
+		return self.failedCount
+
+	def getPendingCount(self) -> int:
+		return len(self.arrivalOrder)
+
+	def isRunning(self) -> bool:
+		return len(self.workers) > 0
+
+	def setTransmitFunction(self, transmitFunc = None):
+		if transmitFunc:
+			self.transmitFunc = transmitFunc
+
+	def startDispatcher(self) -> bool:
+		"""
+		Starts the worker threads. If already running, this call is ignored.
+
+		@return bool True if started; False if already running.
+		"""
+		if self.isRunning():
+			logging.warning("Upstream dispatcher already running. Ignoring start request.")
+			return False
+
+		with self.queueCond:
+			self.stopping = False
+
+		for i in range(self.workerCount):
+			worker = threading.Thread(target = self._runWorker, name = "UpstreamDispatcher-" + str(i), daemon = True)
+			worker.start()
+
+			self.workers.append(worker)
+
+		logging.info("Started upstream dispatcher with %d worker(s).", self.workerCount)
+
+		return True
+
+	def stopDispatcher(self, timeout: float = ConfigConst.DEFAULT_TIMEOUT) -> bool:
+		"""
+		Stops the worker threads once all pending messages are processed
+		(or 'timeout' seconds elapse).
+
+		@param timeout The max time to wait for each worker to finish.
+		@return bool True if stopped; False if not running.
+		"""
+		if not self.isRunning():
+			logging.warning("Upstream dispatcher not running. Ignoring stop request.")
+			return False
+
+		with self.queueCond:
+			self.stopping = True
+			self.queueCond.notify_all()
+
+		for worker in self.workers:
+			worker.join(timeout)
+
+		self.workers = []
+
+		logging.info( \
+			"Stopped upstream dispatcher. Dispatched = %d, dropped = %d, failed = %d", \
+			self.dispatchedCount, self.droppedCount, self.failedCount)
+
+		return True
+
+	def submit(self, resourceName: ResourceNameEnum = None, msg = None) -> bool:
+		"""
+		Queues 'msg' for upstream transmission to 'resourceName' and returns
+		immediately. If the queue is full, the oldest pending message is dropped.
+
+		@param resourceName The resource (topic) the message is destined for.
+		@param msg The message payload.
+		@return bool True if queued; False if the request is invalid.
+		"""
+		if not resourceName or not msg:
+			logging.warning("Upstream dispatch request has no resource or message. Ignoring.")
+			return False
+
+		self._enqueue((resourceName, msg))
+
+		return True
+
+	def _enqueue(self, item):
+		resourceName, msg = item
+
+		with self.queueCond:
+			if len(self.arrivalOrder) >= self.queueSize:
+				droppedResource = self.arrivalOrder.popleft()
+				self._popPendingMsg(droppedResource)
+
+				with self.statsLock:
+					self.droppedCount += 1
+
+				logging.warning("Upstream dispatch queue full. Dropped oldest message for resource: %s", str(droppedResource))
+
+			self.pendingMsgs.setdefault(resourceName, collections.deque()).append(msg)
+			self.arrivalOrder.append(resourceName)
+
+			self.queueCond.notify()
+
+	def _getRateLimiter(self, resourceName: ResourceNameEnum) -> TokenBucket:
+		# called with the queue lock held
+		rateLimiter = self.rateLimiters.get(resourceName)
+
+		if not rateLimiter:
+			rateLimiter = TokenBucket(rate = self.rateLimit, capacity = self.burstSize)
+			self.rateLimiters[resourceName] = rateLimiter
+
+		return rateLimiter
+
+	def _popPendingMsg(self, resourceName: ResourceNameEnum):
+		# called with the queue lock held. Removes the resource's oldest message
+		msgs = self.pendingMsgs[resourceName]
+		msg  = msgs.popleft()
+
+		if not msgs:
+			del self.pendingMsgs[resourceName]
+
+		return msg
+
+	def _takeNextItem(self):
+		# returns the oldest message of the first resource (round robin) with
+		# a token, waiting until there is one - or None once stopped and empty
+		with self.queueCond:
+			while True:
+				waitTime = None
+
+				for resourceName in self.pendingMsgs:
+					rateLimiter = self._getRateLimiter(resourceName)
+
+					if rateLimiter.tryAcquire():
+						msg = self._popPendingMsg(resourceName)
+						self.arrivalOrder.remove(resourceName)
+
+						# so the other resources go first next time
+						if resourceName in self.pendingMsgs:
+							self.pendingMsgs.move_to_end(resourceName)
+
+						return (resourceName, msg)
+
+					resourceWait = rateLimiter.getWaitTime()
+
+					if waitTime is None or resourceWait < waitTime:
+						waitTime = resourceWait
+
+				if self.stopping and not self.pendingMsgs:
+					return None
+
+				self.queueCond.wait(waitTime)
+
+	def _runWorker(self):
+		while True:
+			item = self._takeNextItem()
+
+			if item is None:
+				break
+
+			resourceName, msg = item
+
+			try:
+				if self.transmitFunc:
+					self.transmitFunc(resourceName = resourceName, msg = msg)
+
+				with self.statsLock:
+					self.dispatchedCount += 1
+			except Exception:
+				with self.statsLock:
+					self.failedCount += 1
+
+				logging.exception("Failed to transmit upstream message to resource: %s", str(resourceName))
@@ -0,0 +1,406 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import asyncio
+import concurrent.futures
+import logging
+import socket
+import threading
+
+import aiocoap
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+from programmingtheiot.common.IDataMessageListener import IDataMessageListener
+
+from programmingtheiot.cda.connection.CoapBlockLayer import CoapBlockLayer
+from programmingtheiot.cda.connection.IRequestResponseClient import IRequestResponseClient
+
+from programmingtheiot.data.DataUtil import DataUtil
+
+class AsyncCoapClientConnector(IRequestResponseClient):
+	"""
+	CoAP client built on aiocoap. Every request is sent from one UDP
+	socket by an asyncio event loop running in a background thread, so
+	many requests can be waiting for responses at once without a thread
+	each (up to the max in-flight request count - more wait their turn).
+	Large payloads are sent and received block-wise (RFC 7959).
+
+	request() is the awaitable API (for coroutines running on the client's
+	event loop - see getEventLoop()), and submitRequest() returns a
+	concurrent.futures.Future for the same thing from any other thread.
+
+	The IRequestResponseClient methods are a blocking facade for existing
+	callers: sendGetRequest() and sendDiscoveryRequest() wait for their
+	response, while sendPostRequest(), sendPutRequest() and
+	sendDeleteRequest() only queue the request and log its response
+	when it arrives.
+
+	"""
+
+	# request method -> CoAP request code
+	REQUEST_CODES = { \
+		'DELETE': aiocoap.DELETE, 'GET': aiocoap.GET, 'POST': aiocoap.POST, 'PUT': aiocoap.PUT}
+
+	def __init__(self, dataMsgListener: IDataMessageListener = None):
+		self.config          = ConfigUtil()
+		self.dataMsgListener = dataMsgListener
+		self.coapContext     = None
+		self.eventLoop       = None
+		self.loopThread      = None
+		self.inflightLimit   = None
+		self.pendingRequests = set()
+
+		# resource path -> future of the task observing it
+		self.observeRequests = { }
+
+		self.host = self.config.getProperty(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.HOST_KEY, ConfigConst.DEFAULT_HOST)
+		self.port = self.config.getInteger(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.PORT_KEY, ConfigConst.DEFAULT_COAP_PORT)
+
+		self.maxInflightRequests = \
+			self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.MAX_INFLIGHT_MSGS_KEY, ConfigConst.DEFAULT_MAX_INFLIGHT_REQUESTS)
+
+		if self.maxInflightRequests < 1:
+			self.maxInflightRequests = ConfigConst.DEFAULT_MAX_INFLIGHT_REQUESTS
+
+		# larger payloads are sent (and GETs ask for responses) in blocks of this size
+		self.blockSize = \
+			CoapBlockLayer.getBlockSize(self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.COAP_BLOCK_SIZE_KEY, ConfigConst.DEFAULT_COAP_BLOCK_SIZE))
+
+		# payloads are sent with (and GETs request) this Content-Format
+		self.contentFormat = \
+			self.config.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_CONTENT_FORMAT_KEY, ConfigConst.DEFAULT_CONTENT_FORMAT)
+
+		self.dataUtil = DataUtil(contentFormat = self.contentFormat)
+		self.contentFormat = self.dataUtil.getContentFormat()
+
+		logging.info('\tHost:Port: %s:%s', self.host, str(self.port))
+		logging.info('\tMax in-flight requests: %s', str(self.maxInflightRequests))
+
+		try:
+			self.host = socket.gethostbyname(self.host)
+		except socket.gaierror:
+			logging.info("Failed to resolve host: " + self.host)
+
+		self._initClient()
+
+	def disconnectClient(self) -> bool:
+		"""
+		Cancels any observations, waits (briefly) for any queued requests,
+		then closes the socket and stops the event loop. The client can't
+		be used afterwards.
+
+		@return bool True if the client was running; False otherwise.
+		"""
+		if not self.eventLoop:
+			return False
+
+		try:
+			asyncio.run_coroutine_threadsafe(self._shutdown(), self.eventLoop).result(IRequestResponseClient.DEFAULT_TIMEOUT * 2)
+		except Exception as e:
+			logging.warning("Failed to shut down CoAP client context: %s", str(e))
+
+		self.eventLoop.call_soon_threadsafe(self.eventLoop.stop)
+		self.loopThread.join(IRequestResponseClient.DEFAULT_TIMEOUT)
+
+		self.eventLoop   = None
+		self.loopThread  = None
+		self.coapContext = None
+
+		logging.info("CoAP client disconnected.")
+
+		return True
+
+	def getEventLoop(self) -> asyncio.AbstractEventLoop:
+		return self.eventLoop
+
+	async def request(self, method: str = 'GET', resource: ResourceNameEnum = None, name: str = None, \
+		enableCON: bool = False, payload = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> aiocoap.Message:
+		"""
+		Sends a request, and returns its response. Must be awaited on the
+		client's event loop.
+
+		@param method The request method ('GET', 'POST', 'PUT' or 'DELETE').
+		@param resource The resource enum containing the resource path string.
+		@param name The resource name (appended to the resource path, if any).
+		@param enableCON If true, CON (confirmed) messaging will be used; otherwise use NON (non-confirmed).
+		@param payload The payload to send (str or bytes), if any.
+		@param timeout The number of seconds to wait for a response (including the wait for an in-flight slot).
+		@return aiocoap.Message The response.
+		@raise asyncio.TimeoutError If there's no response within 'timeout' seconds.
+		@raise aiocoap.error.Error If the request fails (e.g. the server is unreachable).
+		"""
+		message = self._createRequest(method, self._createResourcePath(resource, name), enableCON, payload)
+
+		return await asyncio.wait_for(self._sendRequest(message), timeout)
+
+	def sendDeleteRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		return self._submitAndLog('DELETE', resource, name, enableCON, None, timeout)
+
+	def sendDiscoveryRequest(self, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		logging.info("Discovering remote resource...")
+
+		return self.sendGetRequest(resource = None, name = ".well-known/core", enableCON = False, timeout = timeout)
+
+	def sendGetRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		if not (resource or name):
+			logging.warning("Can't test GET - no path or path list provided.")
+			return False
+
+		resourcePath = self._createResourcePath(resource, name)
+
+		logging.info("Issuing GET with path: " + resourcePath)
+
+		try:
+			response = self.submitRequest('GET', resource, name, enableCON, None, timeout).result()
+		except Exception as e:
+			logging.warning("GET request to %s failed: %s", resourcePath, repr(e))
+			return False
+
+		self._onGetResponse(response = response, resourcePath = resourcePath)
+
+		return response.code.is_successful()
+
+	def sendPostRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, payload: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		return self._submitAndLog('POST', resource, name, enableCON, payload, timeout)
+
+	def sendPutRequest(self, resource: ResourceNameEnum = None, name: str = None, enableCON: bool = False, payload: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		return self._submitAndLog('PUT', resource, name, enableCON, payload, timeout)
+
+	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
+		if listener:
+			self.dataMsgListener = listener
+			return True
+
+		return False
+
+	def startObserver(self, resource: ResourceNameEnum = None, name: str = None, ttl: int = IRequestResponseClient.DEFAULT_TTL) -> bool:
+		if not (resource or name) or not self.eventLoop:
+			logging.warning("Can't observe - no path provided, or client not running.")
+			return False
+
+		resourcePath = self._createResourcePath(resource, name)
+
+		observeTask = self.observeRequests.get(resourcePath)
+
+		if observeTask and not observeTask.done():
+			logging.warning("Already observing resource %s. Ignoring start observe request.", str(resourcePath))
+			return False
+
+		self.observeRequests[resourcePath] = \
+			asyncio.run_coroutine_threadsafe(self._observe(resourcePath, ttl), self.eventLoop)
+
+		logging.info("Start CoAP Observer: %s", resourcePath)
+
+		return True
+
+	def stopObserver(self, resource: ResourceNameEnum = None, name: str = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
+		if not (resource or name):
+			return False
+
+		resourcePath = self._createResourcePath(resource, name)
+
+		if not resourcePath in self.observeRequests:
+			logging.warning("Resource %s not being observed. Ignoring stop observe request.", str(resourcePath))
+			return False
+
+		# thread safe - the task cancels the observation as it ends
+		self.observeRequests.pop(resourcePath).cancel()
+
+		logging.info("Canceled observe for resource %s.", resourcePath)
+
+		return True
+
+	def submitRequest(self, method: str = 'GET', resource: ResourceNameEnum = None, name: str = None, \
+		enableCON: bool = False, payload = None, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> concurrent.futures.Future:
+		"""
+		Queues a request (see request()) from any thread, without waiting
+		for it. Use asyncio.wrap_future() to await the result from another
+		event loop.
+
+		@return concurrent.futures.Future The future response.
+		@raise RuntimeError If the client isn't running.
+		"""
+		if not self.eventLoop:
+			raise RuntimeError("CoAP client isn't running.")
+
+		return asyncio.run_coroutine_threadsafe( \
+			self.request(method, resource, name, enableCON, payload, timeout), self.eventLoop)
+
+	def _createRequest(self, method: str, resourcePath: str, enableCON: bool = False, payload = None) -> aiocoap.Message:
+		message = aiocoap.Message( \
+			code = self.REQUEST_CODES[method], transport_tuning = aiocoap.Reliable if enableCON else aiocoap.Unreliable, \
+			uri = "coap://" + self.host + ":" + str(self.port) + "/" + resourcePath)
+
+		# aiocoap splits the payload into blocks (and reassembles the
+		# response's) itself - this just sets the size
+		message.remote.maximum_block_size_exp = self.blockSize.bit_length() - 5
+
+		if payload is not None:
+			message.payload = payload.encode('utf-8') if isinstance(payload, str) else payload
+			message.opt.content_format = self.contentFormat
+		elif method == 'GET' and not resourcePath.startswith('.well-known'):
+			message.opt.accept = self.contentFormat
+
+		return message
+
+	def _createResourcePath(self, resource: ResourceNameEnum = None, name: str = None):
+		resourcePath = ""
+
+		if resource:
+			resourcePath += resource.value
+
+		if name:
+			if resourcePath:
+				resourcePath += '/'
+
+			resourcePath += name
+
+		return resourcePath
+
+	def _handleActuatorResponse(self, response: aiocoap.Message, resourcePath: str):
+		logging.info("ActuatorData received from %s: %s", resourcePath, response.payload)
+
+		contentFormat = response.opt.content_format
+
+		try:
+			data = self.dataUtil.payloadToActuatorData( \
+				response.payload, self.dataUtil.resolveContentFormat(int(contentFormat) if contentFormat is not None else None))
+
+			if data and self.dataMsgListener:
+				self.dataMsgListener.handleActuatorCommandMessage(data)
+		except Exception:
+			logging.warning("Failed to decode actuator data. Ignoring: %s", response.payload)
+
+	def _initClient(self):
+		self.eventLoop  = asyncio.new_event_loop()
+		self.loopThread = threading.Thread(target = self._runEventLoop, name = 'CoapClientLoop', daemon = True)
+		self.loopThread.start()
+
+		try:
+			asyncio.run_coroutine_threadsafe(self._initContext(), self.eventLoop).result(IRequestResponseClient.DEFAULT_TIMEOUT)
+
+			logging.info("Client created. Will invoke resources at: coap://%s:%s/", self.host, str(self.port))
+		except Exception as e:
+			logging.error("Failed to create CoAP client context: %s", str(e))
+
+			self.eventLoop.call_soon_threadsafe(self.eventLoop.stop)
+			self.loopThread.join()
+
+			self.eventLoop  = None
+			self.loopThread = None
+
+	async def _initContext(self):
+		# created here, as both are bound to the client's event loop
+		self.inflightLimit = asyncio.Semaphore(self.maxInflightRequests)
+		self.coapContext   = await aiocoap.Context.create_client_context()
+
+	def _isActuatorCmdPath(self, resourcePath: str) -> bool:
+		locationPath = resourcePath.split("/")
+
+		return len(locationPath) > 2 and locationPath[2] == ConfigConst.ACTUATOR_CMD
+
+	async def _observe(self, resourcePath: str, ttl: int):
+		message = self._createRequest('GET', resourcePath)
+		message.opt.observe = 0
+
+		observeRequest = self.coapContext.request(message)
+
+		if ttl > 0:
+			self.eventLoop.call_later(ttl, asyncio.current_task().cancel)
+
+		try:
+			self._onObserveResponse(await observeRequest.response, resourcePath)
+
+			async for response in observeRequest.observation:
+				self._onObserveResponse(response, resourcePath)
+		except asyncio.CancelledError:
+			logging.info("Observe of resource %s stopped.", resourcePath)
+		except Exception as e:
+			logging.warning("Observe of resource %s ended: %s", resourcePath, repr(e))
+		finally:
+			# aiocoap deregisters with the server
+			observeRequest.observation.cancel()
+
+	def _onGetResponse(self, response: aiocoap.Message, resourcePath: str = None):
+		logging.info("GET response received: %s", str(response.code))
+
+		if response.code.is_successful() and self._isActuatorCmdPath(resourcePath):
+			self._handleActuatorResponse(response, resourcePath)
+		else:
+			logging.info("Response data received. Payload: %s", response.payload)
+
+	def _onObserveResponse(self, response: aiocoap.Message, resourcePath: str):
+		if not response.code.is_successful():
+			logging.warning("Observe response for %s: %s", resourcePath, str(response.code))
+			return
+
+		self._handleActuatorResponse(response, resourcePath)
+
+	def _onResponse(self, method: str, resourcePath: str, future: concurrent.futures.Future):
+		try:
+			response = future.result()
+
+			logging.info("%s response received from %s: %s", method, resourcePath, str(response.code))
+		except Exception as e:
+			logging.warning("%s request to %s failed: %s", method, resourcePath, repr(e))
+
+	def _runEventLoop(self):
+		asyncio.set_event_loop(self.eventLoop)
+
+		self.eventLoop.run_forever()
+		self.eventLoop.close()
+
+	async def _sendRequest(self, message: aiocoap.Message) -> aiocoap.Message:
+		task = asyncio.current_task()
+		self.pendingRequests.add(task)
+
+		try:
+			async with self.inflightLimit:
+				return await self.coapContext.request(message).response
+		finally:
+			self.pendingRequests.discard(task)
+
+	async def _shutdown(self):
+		for observeTask in self.observeRequests.values():
+			observeTask.cancel()
+
+		self.observeRequests.clear()
+
+		# lets the observe tasks end
+		await asyncio.sleep(0)
+
+		# let queued requests (e.g. the last POSTs before stopping) finish
+		if self.pendingRequests:
+			await asyncio.wait(list(self.pendingRequests), timeout = IRequestResponseClient.DEFAULT_TIMEOUT)
+
+		if self.coapContext:
+			await self.coapContext.shutdown()
+
+	def _submitAndLog(self, method: str, resource: ResourceNameEnum, name: str, enableCON: bool, payload, timeout: int) -> bool:
+		if not (resource or name):
+			logging.warning("Can't test %s - no path or path list provided.", method)
+			return False
+
+		resourcePath = self._createResourcePath(resource, name)
+
+		logging.info("Issuing %s with path: %s", method, resourcePath)
+
+		try:
+			future = self.submitRequest(method, resource, name, enableCON, payload, timeout)
+		except RuntimeError as e:
+			logging.warning("%s request to %s failed: %s", method, resourcePath, str(e))
+			return False
+
+		future.add_done_callback(lambda f: self._onResponse(method, resourcePath, f))
+
+		return True
@@ -0,0 +1,110 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import random
+import socket
+
+from queue import Queue
+
+from coapthon import defines
+from coapthon.client.coap import CoAP
+from coapthon.client.helperclient import HelperClient
+from coapthon.messages.message import Message
+from coapthon.messages.response import Response
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapBlockLayer import CoapBlockLayer, CoapSerializer
+
+class CoapBlockClient(HelperClient):
+	"""
+	CoAPthon helper client whose protocol handles block-wise responses
+	with CoapBlockLayer (so a response asked for in smaller blocks is
+	reassembled as bytes), and reads them with CoapSerializer.
+
+	"""
+
+	def __init__(self, server, blockSize: int = ConfigConst.DEFAULT_COAP_BLOCK_SIZE):
+		"""
+		Constructor.
+
+		@param server The (host, port) of the CoAP server.
+		@param blockSize The block size to ask for (see CoapBlockLayer.getBlockSize()).
+		"""
+		# as HelperClient's constructor, other than the protocol
+		self.server   = server
+		self.protocol = CoapBlockProtocol(server, blockSize, self._wait_response)
+		self.queue    = Queue()
+
+class CoapBlockProtocol(CoAP):
+	"""
+	CoAPthon client protocol using CoapBlockLayer and CoapSerializer.
+	The receive loop is CoAPthon's, other than that.
+
+	"""
+
+	def __init__(self, server, blockSize: int, callback):
+		super().__init__(server, random.randint(1, 65535), callback)
+
+		self._blockLayer = CoapBlockLayer(blockSize = blockSize)
+
+	def receive_datagram(self):
+		"""
+		Receives responses until the client is closed.
+
+		"""
+		while not self.stopped.is_set():
+			self._socket.settimeout(0.1)
+
+			try:
+				datagram, addr = self._socket.recvfrom(1500)
+			except socket.timeout:
+				continue
+			except Exception as e:
+				if callable(self._cb_ignore_read_exception) and self._cb_ignore_read_exception(e, self):
+					continue
+
+				return
+
+			if len(datagram) == 0:
+				logging.debug("CoAP server closed the connection.")
+				return
+
+			self._receiveMessage(CoapSerializer.deserialize(datagram, (addr[0], addr[1])))
+
+		self._socket.close()
+
+	def _receiveMessage(self, message):
+		if isinstance(message, Response):
+			transaction, sendAck = self._messageLayer.receive_response(message)
+
+			if transaction is None:
+				return
+
+			self._wait_for_retransmit_thread(transaction)
+
+			if sendAck:
+				self._send_ack(transaction)
+
+			self._blockLayer.receive_response(transaction)
+
+			if transaction.block_transfer:
+				self._send_block_request(transaction)
+				return
+
+			self._observeLayer.receive_response(transaction)
+
+			if transaction.notification:
+				ack = Message()
+				ack.type = defines.Types['ACK']
+				ack = self._messageLayer.send_empty(transaction, transaction.response, ack)
+				self.send_datagram(ack)
+
+			self._callback(transaction.response)
+		elif isinstance(message, Message):
+			self._messageLayer.receive_empty(message)
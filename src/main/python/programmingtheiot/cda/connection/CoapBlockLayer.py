@@ -0,0 +1,331 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+
+from coapthon import defines
+from coapthon.layers.blocklayer import BlockLayer
+from coapthon.messages.response import Response
+from coapthon.serializer import Serializer
+from coapthon.utils import str_append_hash
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+class CoapBlockLayer(BlockLayer):
+	"""
+	Block layer for block-wise transfers (RFC 7959), replacing CoAPthon's
+	own (mainly on the server side). Response blocks are at most 'blockSize'
+	bytes (or smaller, if the client asks). Request blocks are the size the
+	client chose, as CoAPthon's client can't switch to a smaller size
+	mid-transfer.
+
+	Block1 (request) transfers are tracked per client address and path,
+	not per token, as clients may use a new token for each block (aiocoap
+	does). The blocks are appended to one buffer, which is handed to the
+	resource as the request payload once complete.
+
+	A Block2 (response) payload is encoded once, by the resource's first
+	render, and the rest of its blocks are sliced from that copy without
+	calling the resource again - so each block is from the same version
+	of the resource, even if it changes mid-transfer.
+
+	"""
+
+	# the largest request payload accepted (Block1 transfers)
+	MAX_BODY_SIZE = 1024 * 1024
+
+	@staticmethod
+	def getBlockSize(blockSize: int = ConfigConst.DEFAULT_COAP_BLOCK_SIZE) -> int:
+		"""
+		Returns the valid block size (a power of 2 from 16 to 1024) closest
+		to, but not larger than, 'blockSize'.
+
+		@param blockSize The preferred block size, in bytes.
+		@return int
+		"""
+		if not blockSize or blockSize < 16:
+			return 16
+
+		return 2 ** min(10, int(blockSize).bit_length() - 1)
+
+	def __init__(self, blockSize: int = ConfigConst.DEFAULT_COAP_BLOCK_SIZE):
+		super().__init__()
+
+		self.blockSize = self.getBlockSize(blockSize)
+
+		# (client host, client port, path) -> BlockTransfer
+		self.block1Transfers = { }
+		self.block2Transfers = { }
+
+		self.lock = threading.Lock()
+
+	def receive_request(self, transaction):
+		request = transaction.request
+
+		# the options are left on the request, so send_response() knows
+		# which block was asked for
+		if request.block1 is not None:
+			return self._receiveBlock1(transaction)
+
+		if request.block2 is not None:
+			num, m, size = request.block2
+
+			if num > 0:
+				with self.lock:
+					transfer = self._getTransfer(self.block2Transfers, self._getTransferKey(request))
+
+				if transfer:
+					transaction.response = \
+						self._createResponse(transaction, transfer.code, transfer.contentType, transfer.maxAge, transfer.etags)
+
+					self._setBlock2(transaction, transfer, num, min(size, self.blockSize))
+					transaction.block_transfer = True
+
+		return transaction
+
+	def send_request(self, request):
+		request = super().send_request(request)
+
+		# a client asking for a smaller Block2 size up front. CoAPthon starts
+		# the response payload as a str, but block payloads are bytes
+		if request.block1 is None and request.block2 is not None:
+			host, port = request.destination
+			item = self._block2_sent.get(str_append_hash(host, port, request.token))
+
+			if item and not item.payload:
+				item.payload = b''
+
+		return request
+
+	def send_response(self, transaction):
+		request  = transaction.request
+		response = transaction.response
+
+		if response is None:
+			return transaction
+
+		if request.block1 is not None and response.block1 is None:
+			num, m, size = request.block1
+			response.block1 = (num, 0, size)
+
+		if response.payload is None:
+			return transaction
+
+		num  = 0
+		size = self.blockSize
+
+		if request.block2 is not None:
+			num, m, size = request.block2
+			size = min(size, self.blockSize)
+
+		payload = response.payload
+
+		if isinstance(payload, str):
+			payload = payload.encode('utf-8')
+
+		if num == 0 and len(payload) <= size:
+			return transaction
+
+		transfer = BlockTransfer(payload, response.content_type, response.code, response.max_age, response.etag)
+
+		self._setBlock2(transaction, transfer, num, size)
+
+		return transaction
+
+	def _createResponse(self, transaction, code: int, contentType: int = None, maxAge: int = None, etags: list = None) -> Response:
+		response = Response()
+		response.destination = transaction.request.source
+		response.token = transaction.request.token
+		response.code = code
+
+		if contentType is not None:
+			response.content_type = contentType
+
+		if maxAge is not None:
+			response.max_age = maxAge
+
+		if etags:
+			response.etag = etags
+
+		return response
+
+	def _getTransfer(self, transfers: dict, key: tuple):
+		# must be called with the lock held. Abandoned transfers are dropped
+		# once they're older than the CoAP exchange lifetime
+		now = time.monotonic()
+
+		for staleKey in [k for k, t in transfers.items() if now - t.startTime > defines.EXCHANGE_LIFETIME]:
+			del transfers[staleKey]
+
+		return transfers.get(key)
+
+	def _getTransferKey(self, request) -> tuple:
+		host, port = request.source
+
+		return (host, port, request.uri_path)
+
+	def _receiveBlock1(self, transaction):
+		request = transaction.request
+		num, m, size = request.block1
+		key = self._getTransferKey(request)
+
+		chunk = request.payload or b''
+
+		if isinstance(chunk, str):
+			chunk = chunk.encode('utf-8')
+
+		with self.lock:
+			transfer = self._getTransfer(self.block1Transfers, key)
+
+			if num == 0:
+				transfer = BlockTransfer(bytearray(), request.content_type)
+				self.block1Transfers[key] = transfer
+			elif not transfer or num * size != len(transfer.payload) or request.content_type != transfer.contentType:
+				self.block1Transfers.pop(key, None)
+
+				logging.warning("Out of order Block1 block %d (size %d) from %s. Ignoring.", num, size, str(key))
+
+				return self.incomplete(transaction)
+
+			if len(transfer.payload) + len(chunk) > self.MAX_BODY_SIZE or \
+				(request.size1 is not None and request.size1 > self.MAX_BODY_SIZE):
+				del self.block1Transfers[key]
+
+				transaction.response = self._createResponse(transaction, defines.Codes.REQUEST_ENTITY_TOO_LARGE.number)
+				transaction.response.size1 = self.MAX_BODY_SIZE
+				transaction.block_transfer = True
+
+				return transaction
+
+			transfer.payload.extend(chunk)
+
+			if not m:
+				del self.block1Transfers[key]
+
+		if m:
+			transaction.response = self._createResponse(transaction, defines.Codes.CONTINUE.number)
+			transaction.response.block1 = (num, 1, size)
+			transaction.block_transfer = True
+		else:
+			request.payload = transfer.payload
+			transaction.block_transfer = False
+
+		return transaction
+
+	def _setBlock2(self, transaction, transfer, num: int, size: int):
+		request  = transaction.request
+		response = transaction.response
+		key      = self._getTransferKey(request)
+
+		start = num * size
+		more  = start + size < len(transfer.payload)
+
+		with self.lock:
+			if more:
+				self.block2Transfers[key] = transfer
+			else:
+				self.block2Transfers.pop(key, None)
+
+		response.payload = bytes(memoryview(transfer.payload)[start:start + size])
+
+		del response.block2
+		response.block2 = (num, int(more), size)
+
+		if num == 0:
+			del response.size2
+			response.size2 = len(transfer.payload)
+
+class BlockTransfer():
+	"""
+	The payload (and response details) of a block-wise transfer in
+	progress.
+
+	"""
+
+	def __init__(self, payload, contentType: int = None, code: int = None, maxAge: int = None, etags: list = None):
+		self.payload     = payload
+		self.contentType = contentType
+		self.code        = code
+		self.maxAge      = maxAge
+		self.etags       = etags
+		self.startTime   = time.monotonic()
+
+class CoapSerializer(Serializer):
+	"""
+	CoAPthon's serializer decodes every payload that isn't binary as
+	UTF-8, and drops the message if it can't be. A block of a larger
+	text payload may start or end mid-character, so this one leaves
+	block payloads (messages with a Block1 or Block2 option) as bytes.
+
+	"""
+
+	# payloads of these Content-Formats are always left as bytes
+	BINARY_CONTENT_TYPES = [ \
+		defines.Content_types['application/octet-stream'], \
+		defines.Content_types['application/exi'], \
+		defines.Content_types['application/cbor']]
+
+	@staticmethod
+	def deserialize(datagram, source):
+		payloadStart = CoapSerializer._getPayloadStart(datagram)
+
+		if payloadStart is None:
+			return Serializer.deserialize(datagram, source)
+
+		# the header and options only - the payload is set here
+		message = Serializer.deserialize(datagram[:payloadStart - 1], source)
+
+		if isinstance(message, int):
+			return message
+
+		payload = datagram[payloadStart:]
+
+		if message.block1 is None and message.block2 is None and \
+			message.content_type not in CoapSerializer.BINARY_CONTENT_TYPES:
+			try:
+				payload = payload.decode('utf-8')
+			except UnicodeDecodeError:
+				return defines.Codes.BAD_REQUEST.number
+
+		message.payload = payload
+
+		return message
+
+	@staticmethod
+	def _getPayloadStart(datagram) -> int:
+		# returns the index of the first payload byte, or None if there's
+		# no payload (or the options can't be read)
+		try:
+			pos = 4 + (datagram[0] & 0x0F)
+
+			while pos < len(datagram):
+				delta  = datagram[pos] >> 4
+				length = datagram[pos] & 0x0F
+
+				if datagram[pos] == 0xFF:
+					return pos + 1 if pos + 1 < len(datagram) else None
+
+				if delta == 15 or length == 15:
+					return None
+
+				pos += 1
+				pos += { 13: 1, 14: 2 }.get(delta, 0)
+
+				if length == 13:
+					length = datagram[pos] + 13
+					pos += 1
+				elif length == 14:
+					length = int.from_bytes(datagram[pos:pos + 2], 'big') + 269
+					pos += 2
+
+				pos += length
+		except IndexError:
+			pass
+
+		return None
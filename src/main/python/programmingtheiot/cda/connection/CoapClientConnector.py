@@ -12,7 +12,6 @@ import socket
 import traceback
 
 from coapthon import defines
-from coapthon.client.helperclient import HelperClient
 from coapthon.utils import parse_uri
 from coapthon.utils import generate_random_token
 
@@ -22,6 +21,8 @@ from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 
+from programmingtheiot.cda.connection.CoapBlockClient import CoapBlockClient
+from programmingtheiot.cda.connection.CoapBlockLayer import CoapBlockLayer
 from programmingtheiot.cda.connection.IRequestResponseClient import IRequestResponseClient
 
 from programmingtheiot.data.DataUtil import DataUtil
@@ -46,6 +47,19 @@ class CoapClientConnector(IRequestResponseClient):
 		self.port 	 = self.config.getInteger(ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.PORT_KEY, ConfigConst.DEFAULT_COAP_PORT)
 		self.uriPath = "coap://" + self.host + ":" + str(self.port) + "/"
 		
+		# payloads are sent with (and GETs request) this Content-Format
+		self.contentFormat = \
+			self.config.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_CONTENT_FORMAT_KEY, ConfigConst.DEFAULT_CONTENT_FORMAT)
+		
+		self.dataUtil = DataUtil(contentFormat = self.contentFormat)
+		self.contentFormat = self.dataUtil.getContentFormat()
+		
+		# larger payloads are sent (and GETs ask for responses) in blocks of this size
+		self.blockSize = \
+			CoapBlockLayer.getBlockSize(self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.COAP_BLOCK_SIZE_KEY, ConfigConst.DEFAULT_COAP_BLOCK_SIZE))
+		
 		logging.info('\tHost:Port: %s:%s', self.host, str(self.port))
 		
 		self.includeDebugDetail = True
@@ -61,6 +75,16 @@ class CoapClientConnector(IRequestResponseClient):
 		except socket.gaierror:
 			logging.info("Failed to resolve host: " + self.host)
 	
+	def disconnectClient(self) -> bool:
+		if self.coapClient:
+			self.coapClient.stop()
+			self.coapClient = None
+			
+			logging.info("CoAP client stopped.")
+			return True
+		
+		return False
+	
 	def sendDiscoveryRequest(self, timeout: int = IRequestResponseClient.DEFAULT_TIMEOUT) -> bool:
 		logging.info("Discovering remote resource...")
 		
@@ -91,6 +115,11 @@ class CoapClientConnector(IRequestResponseClient):
 			
 			request = self.coapClient.mk_request(defines.Codes.GET, path = resourcePath)
 			request.token = generate_random_token(2)
+			request.accept = self.contentFormat
+			
+			# CoAPthon's default block size is the max, so only smaller ones are asked for
+			if self.blockSize < defines.MAX_PAYLOAD:
+				request.block2 = (0, 0, self.blockSize)
 			
 			if not enableCON:
 				# defines class is a Enum class store CoAP parameters
@@ -112,7 +141,7 @@ class CoapClientConnector(IRequestResponseClient):
 			request = self.coapClient.mk_request(defines.Codes.POST, path = resourcePath)
 			
 			request.token = generate_random_token(2)
-			request.payload = payload
+			self._setPayload(request, payload)
 			
 			if not enableCON:
 				request.type = defines.Types["NON"]
@@ -133,7 +162,7 @@ class CoapClientConnector(IRequestResponseClient):
 			
 			request = self.coapClient.mk_request(defines.Codes.PUT, path = resourcePath)
 			request.token = generate_random_token(2)
-			request.payload = payload
+			self._setPayload(request, payload)
 			
 			if not enableCON:
 				request.type = defines.Types["NON"]
@@ -207,13 +236,24 @@ class CoapClientConnector(IRequestResponseClient):
 		
 	def _initClient(self):
 		try:
-			self.coapClient = HelperClient(server = (self.host, self.port))
+			# a response asked for in smaller blocks is reassembled as bytes
+			self.coapClient = CoapBlockClient(server = (self.host, self.port), blockSize = self.blockSize)
 			
 			logging.info("Client created. Will invoke resources at: " + self.uriPath)
 		except Exception as e:
 			logging.error("Failed to create CoAP client to URI Path:" + self.uriPath)
 			traceback.print_exception(type(e), e, e.__traceback__)
 			
+	def _setPayload(self, request, payload = None):
+		# sent as bytes, so CoAPthon splits it into blocks by byte count
+		if isinstance(payload, str):
+			payload = payload.encode('utf-8')
+		
+		request.payload = (self.contentFormat, payload)
+		
+		if payload and len(payload) > self.blockSize:
+			request.block1 = (0, 1, self.blockSize)
+	
 	def _createResourcePath(self, resource: ResourceNameEnum = None, name: str = None):
 		resourcePath = ""
 		hasResponse = False
@@ -249,7 +289,7 @@ class CoapClientConnector(IRequestResponseClient):
 				logging.info("ActuatorData received: %s", jsonData)
 				
 				try:
-					ad = DataUtil().jsonToActuatorData(jsonData)
+					ad = self.dataUtil.payloadToActuatorData(jsonData, self.dataUtil.resolveContentFormat(response.content_type))
 					
 					if self.dataMsgListener:
 						self.dataMsgListener.handleActuatorCommandMessage(ad)
@@ -295,6 +335,7 @@ class HandleActuatorEvent():
 		self.listener = listener
 		self.resource = resource
 		self.observeRequests = requests
+		self.dataUtil = DataUtil()
 		
 		if not self.resource:
 			self.resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE
@@ -309,7 +350,7 @@ class HandleActuatorEvent():
 			
 			if self.listener:
 				try:
-					data = DataUtil().jsonToActuatorData(jsonData = jsonData)
+					data = self.dataUtil.payloadToActuatorData(jsonData, self.dataUtil.resolveContentFormat(response.content_type))
 					self.listener.handleActuatorCommandMessage(data = data)
 				except:
 					logging.warning("Failed to decode actuator data. Ignoring: %s", jsonData)
@@ -13,7 +13,6 @@ import traceback
 from threading import Thread
 from time import sleep
 
-from coapthon.server.coap import CoAP
 from coapthon.resources.resource import Resource
 
 import programmingtheiot.common.ConfigConst as ConfigConst
@@ -22,7 +21,10 @@ from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
+from programmingtheiot.cda.connection.CoapBlockLayer import CoapBlockLayer
+from programmingtheiot.cda.connection.PooledCoapServer import PooledCoapServer
 from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
+from programmingtheiot.cda.connection.handlers.ObservableResourceHandler import ObservableResourceHandler
 from programmingtheiot.cda.connection.handlers.UpdateActuatorResourceHandler import UpdateActuatorResourceHandler
 from programmingtheiot.cda.connection.handlers.GetSystemPerformanceResourceHandler import GetSystemPerformanceResourceHandler
 
@@ -44,15 +46,34 @@ class CoapServerAdapter():
 		self.port = \
 			self.config.getProperty(\
 				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.PORT_KEY, ConfigConst.DEFAULT_COAP_PORT)
+		
+		self.blockSize = \
+			CoapBlockLayer.getBlockSize(self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.COAP_BLOCK_SIZE_KEY, ConfigConst.DEFAULT_COAP_BLOCK_SIZE))
+		
+		self.workers = \
+			self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.COAP_SERVER_WORKERS_KEY, ConfigConst.DEFAULT_COAP_SERVER_WORKERS)
+		
+		self.updateWorkers = \
+			self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.COAP_SERVER_UPDATE_WORKERS_KEY, ConfigConst.DEFAULT_COAP_SERVER_UPDATE_WORKERS)
+		
+		self.queueSize = \
+			self.config.getInteger( \
+				ConfigConst.COAP_GATEWAY_SERVICE, ConfigConst.COAP_SERVER_QUEUE_SIZE_KEY, ConfigConst.DEFAULT_COAP_SERVER_QUEUE_SIZE)
 										
 		self.coapServer 	= None
 		self.coapServerTask = None
 		
-		self.listenTimeout  = 30
+		# how often (in seconds) the listen loop checks if it's been stopped
+		self.listenTimeout  = 1
 		
 		self._initServer()
 		
 		logging.info("CoAP server configured for host and port: coap://%s:%s",self.host,str(self.port))
+		logging.info("CoAP server block size: %d", self.blockSize)
+		logging.info("CoAP server workers: %d (GET), %d (PUT, POST, DELETE)", self.workers, self.updateWorkers)
 		
 	# add the ability to register resource handlers
 	def addResource(self, resourcePath: ResourceNameEnum = None, endName: str = None, resource = None):
@@ -84,20 +105,26 @@ class CoapServerAdapter():
 				
 				resource.path = registrationPath
 				self.coapServer.root[registrationPath] = resource
+				
+				# so the resource can notify its observers of updates
+				if isinstance(resource, ObservableResourceHandler):
+					resource.setCoapServer(self.coapServer)
 		else:
 			logging.warning("No resource provided for path: " + str(resourcePath.value))
 			
 	# start and stop CoAP server using CoAPthon3	
 	def startServer(self):
 		if self.coapServer:
+			# a closed server's socket is closed too, so it can't be restarted
+			if self.coapServerTask:
+				logging.warning("CoAP server already started. Ignoring.")
+				return
+			
 			logging.info("Starting CoAP server...")
-			# if CoAP server task is alive, close it 
-			if self.coapServerTask and self.coapServerTask.isAlive():
-				self.stopServer()
-				self.coapServer = None
 			
-			self.coapServerTask = Thread(target=self._runServer())
-			self.coapServerTask.setDaemon(True)
+			# the listen loop runs in the background; requests are processed
+			# by the server's worker pools
+			self.coapServerTask = Thread(target = self._runServer, daemon = True)
 			self.coapServerTask.start()
 			
 			logging.info("\n\n**** CoAP server started. ****")
@@ -109,7 +136,9 @@ class CoapServerAdapter():
 			logging.info("Stopping CoAP server...")
 			
 			self.coapServer.close()
-			self.coapServerTask.join(5)
+			
+			if self.coapServerTask:
+				self.coapServerTask.join(self.listenTimeout + 5)
 		else:
 			logging.warn("CoAP server not yet initialized (shouldn't happen).")
 	
@@ -119,7 +148,13 @@ class CoapServerAdapter():
 	# _initServer will be called by the constructor to configure the server
 	def _initServer(self):
 		try:
-			self.coapServer = CoAP(server_address = (self.host, int(self.port)))
+			self.coapServer = \
+				PooledCoapServer( \
+					server_address = (self.host, int(self.port)), \
+					workers = self.workers, \
+					updateWorkers = self.updateWorkers, \
+					queueSize = self.queueSize, \
+					blockSize = self.blockSize)
 			
 			self.addResource( \
 				resourcePath = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, \
@@ -128,19 +163,23 @@ class CoapServerAdapter():
 				
 			# TODO: add other actuator resource handlers (for HVAC, etc.)
 			
-			sysPerfDataListener = GetSystemPerformanceResourceHandler()
+			sysPerfDataListener = GetSystemPerformanceResourceHandler(dataMsgListener = self.dataMsgListener)
 			
 			self.addResource( \
 				resourcePath = ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, \
 				resource = sysPerfDataListener)
 			
 			# TODO: add other telemetry resource handlers (for SensorData)
-			telemtryDataListener = GetTelemetryResourceHandler()
+			telemtryDataListener = GetTelemetryResourceHandler(dataMsgListener = self.dataMsgListener)
 
 			self.addResource( \
 				resourcePath = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, \
 				resource = telemtryDataListener)
-			# TODO: register the callbacks with the data message listener instance
+			
+			# the handlers are updated (and notify their observers) as data comes in
+			if self.dataMsgListener:
+				self.dataMsgListener.setSystemPerformanceDataListener(listener = sysPerfDataListener)
+				self.dataMsgListener.setTelemetryDataListener(listener = telemtryDataListener)
 			
 			logging.info("Created CoAP server with default resources.")
 		except Exception as e:
@@ -0,0 +1,327 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import queue
+import threading
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from paho.mqtt.client import topic_matches_sub
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MessageDispatcher():
+	"""
+	Routes incoming pub/sub messages to handlers, keyed by topic.
+
+	Each handler is registered for a ResourceNameEnum or a topic filter
+	(which may include the MQTT '+' and '#' wildcards), and gets its own
+	bounded queue and worker thread. So the client's network thread only
+	queues each message, and a slow handler only delays messages for its
+	own topic. Messages for each handler are handled in the order received.
+
+	If a handler has a decoder, the worker decodes each payload with it
+	before calling the handler, so decoding doesn't run on the network
+	thread either.
+
+	When a handler's queue is full, its overflow policy applies: DROP_OLDEST
+	discards the oldest queued message, and BLOCK makes dispatch() wait for
+	room (which holds up the client's network thread, and so every topic).
+
+	"""
+
+	DROP_OLDEST = 'dropOldest'
+	BLOCK       = 'block'
+
+	def __init__(self, queueSize: int = None, overflowPolicy: str = None):
+		"""
+		Constructor. Any parameter left as None is read from the
+		Mqtt.GatewayService section of the configuration file.
+
+		@param queueSize The default max number of queued messages per handler.
+		@param overflowPolicy The default overflow policy (DROP_OLDEST or BLOCK).
+		"""
+		configUtil = ConfigUtil()
+
+		if queueSize is None:
+			queueSize = \
+				configUtil.getInteger( \
+					ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.DISPATCH_QUEUE_SIZE_KEY, ConfigConst.DEFAULT_DISPATCH_QUEUE_SIZE)
+
+		if overflowPolicy is None:
+			overflowPolicy = \
+				configUtil.getProperty( \
+					ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.DISPATCH_OVERFLOW_POLICY_KEY, ConfigConst.DEFAULT_DISPATCH_OVERFLOW_POLICY)
+
+		if queueSize <= 0:
+			queueSize = ConfigConst.DEFAULT_DISPATCH_QUEUE_SIZE
+
+		self.queueSize      = queueSize
+		self.overflowPolicy = self._getOverflowPolicy(overflowPolicy, ConfigConst.DEFAULT_DISPATCH_OVERFLOW_POLICY)
+
+		# topic filter -> handler entry; both are replaced (not modified) when
+		# handlers change, so dispatch() can read them without locking
+		self.topicHandlers    = {}
+		self.wildcardHandlers = {}
+
+		self.running = False
+
+		self.dispatchedCount = 0
+		self.droppedCount    = 0
+		self.failedCount     = 0
+
+		self.handlerLock = threading.Lock()
+		self.statsLock   = threading.Lock()
+
+		logging.info("Message dispatcher configured: queue size = %d, overflow policy = %s", self.queueSize, self.overflowPolicy)
+
+	def addHandler(self, topic = None, handler = None, decoder = None, queueSize: int = None, overflowPolicy: str = None) -> bool:
+		"""
+		Registers 'handler' for messages received on 'topic', replacing any
+		handler already registered for it.
+
+		@param topic The ResourceNameEnum, or topic filter string.
+		@param handler The function to call for each message. Must accept the
+		topic (str) and the (decoded) payload as positional arguments.
+		@param decoder The optional function to decode each payload with. Must
+		accept the topic and the payload (bytes) as positional arguments.
+		@param queueSize The max number of queued messages (None for the default).
+		@param overflowPolicy DROP_OLDEST or BLOCK (None for the default).
+		@return bool True on success; False if the request is invalid.
+		"""
+		topicFilter = self._getTopicFilter(topic)
+
+		if not topicFilter or not handler:
+			logging.warning("Message handler request has no topic or handler. Ignoring.")
+			return False
+
+		if not queueSize or queueSize <= 0:
+			queueSize = self.queueSize
+
+		entry = { \
+			'handler': handler, 'decoder': decoder, 'queue': queue.Queue(maxsize = queueSize), \
+			'overflowPolicy': self._getOverflowPolicy(overflowPolicy, self.overflowPolicy), 'worker': None}
+
+		with self.handlerLock:
+			oldEntry = self._setEntry(topicFilter, entry)
+
+			if self.running:
+				self._startWorker(topicFilter, entry)
+
+		if oldEntry:
+			self._stopWorker(oldEntry)
+
+		logging.info("Added message handler for topic %s: queue size = %d, overflow policy = %s", \
+			topicFilter, queueSize, entry['overflowPolicy'])
+
+		return True
+
+	def dispatch(self, topic: str = None, payload = None) -> int:
+		"""
+		Queues the message for every handler whose topic (filter) matches
+		'topic'. Called on the client's network thread.
+
+		@param topic The topic the message was received on.
+		@param payload The message payload.
+		@return int The number of handlers the message was queued for.
+		"""
+		entries = []
+		entry = self.topicHandlers.get(topic)
+
+		if entry:
+			entries.append(entry)
+
+		for topicFilter, entry in self.wildcardHandlers.items():
+			if topic_matches_sub(topicFilter, topic):
+				entries.append(entry)
+
+		for entry in entries:
+			self._enqueue(entry, (topic, payload))
+
+		return len(entries)
+
+	def getDispatchedCount(self) -> int:
+		return self.dispatchedCount
+
+	def getDroppedCount(self) -> int:
+		return self.droppedCount
+
+	def getFailedCount(self) -> int:
+		return self.failedCount
+
+	def hasHandler(self, topic = None) -> bool:
+		topicFilter = self._getTopicFilter(topic)
+
+		return topicFilter in self.topicHandlers or topicFilter in self.wildcardHandlers
+
+	def isRunning(self) -> bool:
+		return self.running
+
+	def removeHandler(self, topic = None) -> bool:
+		"""
+		Unregisters the handler for 'topic'. Messages already queued for it
+		are handled first.
+
+		@param topic The ResourceNameEnum, or topic filter string.
+		@return bool True if removed; False if there was no handler for 'topic'.
+		"""
+		topicFilter = self._getTopicFilter(topic)
+
+		with self.handlerLock:
+			entry = self._setEntry(topicFilter, None)
+
+		if not entry:
+			return False
+
+		self._stopWorker(entry)
+
+		return True
+
+	def startDispatcher(self) -> bool:
+		"""
+		Starts a worker thread for each handler. If already running, this
+		call is ignored.
+
+		@return bool True if started; False if already running.
+		"""
+		with self.handlerLock:
+			if self.running:
+				logging.warning("Message dispatcher already running. Ignoring start request.")
+				return False
+
+			self.running = True
+
+			for topicFilter, entry in list(self.topicHandlers.items()) + list(self.wildcardHandlers.items()):
+				self._startWorker(topicFilter, entry)
+
+		logging.info("Started message dispatcher.")
+
+		return True
+
+	def stopDispatcher(self) -> bool:
+		"""
+		Stops the worker threads once all queued messages are handled. The
+		handlers stay registered, and run again on the next start.
+
+		@return bool True if stopped; False if not running.
+		"""
+		with self.handlerLock:
+			if not self.running:
+				logging.warning("Message dispatcher not running. Ignoring stop request.")
+				return False
+
+			self.running = False
+
+			entries = list(self.topicHandlers.values()) + list(self.wildcardHandlers.values())
+
+		for entry in entries:
+			self._stopWorker(entry)
+
+		logging.info( \
+			"Stopped message dispatcher. Dispatched = %d, dropped = %d, failed = %d", \
+			self.dispatchedCount, self.droppedCount, self.failedCount)
+
+		return True
+
+	def _enqueue(self, entry: dict, item):
+		msgQueue = entry['queue']
+
+		if entry['overflowPolicy'] == self.BLOCK or item is None:
+			msgQueue.put(item)
+			return
+
+		while True:
+			try:
+				msgQueue.put_nowait(item)
+				return
+			except queue.Full:
+				try:
+					dropped = msgQueue.get_nowait()
+
+					if dropped is None:
+						# never drop a stop request - put it back and wait for room
+						msgQueue.put(dropped)
+						msgQueue.put(item)
+						return
+
+					with self.statsLock:
+						self.droppedCount += 1
+
+					logging.warning("Message queue full. Dropped oldest message for topic: %s", dropped[0])
+				except queue.Empty:
+					pass
+
+	def _getOverflowPolicy(self, overflowPolicy: str, defaultPolicy: str) -> str:
+		if overflowPolicy in (self.DROP_OLDEST, self.BLOCK):
+			return overflowPolicy
+
+		if overflowPolicy:
+			logging.warning("Unknown message overflow policy: %s. Using %s.", overflowPolicy, defaultPolicy)
+
+		return defaultPolicy
+
+	def _getTopicFilter(self, topic) -> str:
+		if isinstance(topic, ResourceNameEnum):
+			return topic.value
+
+		return topic
+
+	def _runWorker(self, entry: dict):
+		handler = entry['handler']
+		decoder = entry['decoder']
+		msgQueue = entry['queue']
+
+		while True:
+			item = msgQueue.get()
+
+			if item is None:
+				break
+
+			topic, payload = item
+
+			try:
+				handler(topic, decoder(topic, payload) if decoder else payload)
+
+				with self.statsLock:
+					self.dispatchedCount += 1
+			except Exception:
+				with self.statsLock:
+					self.failedCount += 1
+
+				logging.exception("Failed to handle message for topic: %s", topic)
+
+	def _setEntry(self, topicFilter: str, entry: dict) -> dict:
+		# called with the handler lock held; returns the replaced entry (if any)
+		isWildcard = '+' in topicFilter or '#' in topicFilter
+		handlers = dict(self.wildcardHandlers if isWildcard else self.topicHandlers)
+
+		oldEntry = handlers.pop(topicFilter, None)
+
+		if entry:
+			handlers[topicFilter] = entry
+
+		if isWildcard:
+			self.wildcardHandlers = handlers
+		else:
+			self.topicHandlers = handlers
+
+		return oldEntry
+
+	def _startWorker(self, topicFilter: str, entry: dict):
+		entry['worker'] = threading.Thread(target = self._runWorker, args = (entry,), name = "MessageDispatcher-" + topicFilter, daemon = True)
+		entry['worker'].start()
+
+	def _stopWorker(self, entry: dict):
+		worker = entry['worker']
+
+		if worker:
+			entry['worker'] = None
+
+			self._enqueue(entry, None)
+			worker.join(ConfigConst.DEFAULT_TIMEOUT)
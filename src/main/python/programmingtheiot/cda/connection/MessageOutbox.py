@@ -0,0 +1,443 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+class MessageOutbox():
+	"""
+	Durable FIFO of (topic, payload, QoS) messages awaiting publication,
+	for store-and-forward while the broker can't be reached.
+
+	Messages are appended to a log of numbered segment files in 'outboxDir'.
+	Each record is a header (CRC-32, payload length, topic length and QoS)
+	followed by the topic and payload. The CRC covers everything after it,
+	so a record torn by a power cut is detected (and the segment truncated
+	there) when the outbox is next opened.
+
+	Appends are buffered, and only fsync'd once 'syncBatchSize' records are
+	pending or 'syncIntervalSecs' have passed since the first of them was
+	appended (a timer syncs them if no more appends follow), to keep the
+	write rate on flash storage low. Up to that many records can be lost
+	on power failure.
+
+	Messages are read in batches with readBatch(), and only removed once
+	commitBatch() is called (i.e. after they've been published), so a
+	replay that fails part way through is retried from the same message.
+	The read position in the oldest segment is saved (but not fsync'd) on
+	each commit. Delivery is at-least-once: a batch that was published but
+	not committed before a restart is sent again.
+
+	If the outbox grows past 'maxSize' bytes, whole segments are evicted,
+	oldest first.
+
+	"""
+
+	SEGMENT_FILE_EXT = '.log'
+	READ_OFFSET_FILE = 'read.pos'
+
+	DEFAULT_MAX_SIZE        = 10 * 1024 * 1024
+	DEFAULT_SYNC_BATCH_SIZE = 50
+	DEFAULT_SYNC_INTERVAL   = 10.0
+
+	MIN_SEGMENT_SIZE = 4 * 1024
+	MAX_SEGMENT_SIZE = 1024 * 1024
+
+	# CRC-32, payload length, topic length, QoS
+	RECORD_HEADER = struct.Struct('>IIHB')
+
+	def __init__(self, outboxDir: str = None, maxSize: int = DEFAULT_MAX_SIZE, \
+		syncBatchSize: int = DEFAULT_SYNC_BATCH_SIZE, syncIntervalSecs: float = DEFAULT_SYNC_INTERVAL):
+		"""
+		Constructor. Any messages left in 'outboxDir' by a previous instance
+		are recovered.
+
+		@param outboxDir The directory to store the segment files in (created
+		if it doesn't exist). Must not be shared with another outbox.
+		@param maxSize The max total size of the segment files, in bytes.
+		@param syncBatchSize The number of appended records between each fsync.
+		@param syncIntervalSecs The max seconds between an append and its fsync.
+		"""
+		if maxSize <= 0:
+			maxSize = self.DEFAULT_MAX_SIZE
+
+		self.outboxDir        = outboxDir
+		self.maxSize          = maxSize
+		self.syncBatchSize    = max(syncBatchSize, 1)
+		self.syncIntervalSecs = syncIntervalSecs
+
+		# eviction is per segment, so segments are a fraction of the max size
+		self.segmentSize = min(self.MAX_SEGMENT_SIZE, max(maxSize // 8, self.MIN_SEGMENT_SIZE))
+
+		self.lock = threading.RLock()
+
+		# segment ID -> [size in bytes, unread record count], oldest first
+		self.segments = {}
+
+		self.nextSegmentID = 0
+
+		self.activeID    = None
+		self.activeFile  = None
+		self.readOffset  = 0
+		self.pendingRead = None
+
+		self.totalSize     = 0
+		self.msgCount      = 0
+		self.evictedCount  = 0
+		self.syncCount     = 0
+		self.unsyncedCount = 0
+		self.lastSyncTime  = time.monotonic()
+		self.syncTimer     = None
+
+		os.makedirs(outboxDir, exist_ok = True)
+
+		self._recoverSegments()
+
+		logging.info("Created message outbox: dir = %s, max size = %d bytes, messages = %d", \
+			outboxDir, self.maxSize, self.msgCount)
+
+	def append(self, topic: str = None, payload = None, qos: int = 0) -> bool:
+		"""
+		Adds a message to the end of the outbox, evicting the oldest segment(s)
+		if that takes the outbox past its max size.
+
+		@param topic The topic to publish the message to.
+		@param payload The message payload (str or bytes).
+		@param qos The QoS level to publish with.
+		@return bool True on success; False if the message couldn't be stored.
+		"""
+		if not topic or payload is None:
+			return False
+
+		if isinstance(payload, str):
+			payload = payload.encode('utf-8')
+
+		record = self._packRecord(topic.encode('utf-8'), payload, qos)
+
+		with self.lock:
+			try:
+				if self.activeFile is None or self.segments[self.activeID][0] >= self.segmentSize:
+					self._rollSegment()
+
+				self.activeFile.write(record)
+			except OSError as e:
+				logging.error("Failed to store message in outbox %s: %s", self.outboxDir, str(e))
+				return False
+
+			segment = self.segments[self.activeID]
+			segment[0] += len(record)
+			segment[1] += 1
+
+			self.totalSize += len(record)
+			self.msgCount  += 1
+			self.unsyncedCount += 1
+
+			if self.unsyncedCount >= self.syncBatchSize or \
+				time.monotonic() - self.lastSyncTime >= self.syncIntervalSecs:
+				self.sync()
+			elif not self.syncTimer:
+				self._startSyncTimer()
+
+			if self.totalSize > self.maxSize:
+				self._evictSegments()
+
+		return True
+
+	def close(self):
+		"""
+		Syncs and closes the active segment. The outbox can still be used
+		afterwards (a new segment is started on the next append).
+		"""
+		with self.lock:
+			if self.activeFile:
+				self.sync()
+				self.activeFile.close()
+				self.activeFile = None
+
+	def commitBatch(self) -> int:
+		"""
+		Removes the messages returned by the last call to readBatch() (less
+		any that have since been evicted).
+
+		@return int The number of messages removed.
+		"""
+		with self.lock:
+			if not self.pendingRead:
+				return 0
+
+			endID, endOffset, segmentCounts = self.pendingRead
+			self.pendingRead = None
+
+			removedCount = 0
+
+			for segmentID, count in segmentCounts:
+				segment = self.segments.get(segmentID)
+
+				if segment:
+					segment[1] -= count
+					removedCount += count
+
+			self.msgCount -= removedCount
+
+			# drop the segments that have been read completely
+			for segmentID in list(self.segments):
+				if segmentID > endID:
+					break
+
+				if segmentID == endID:
+					if endOffset < self.segments[segmentID][0]:
+						self.readOffset = endOffset
+						break
+
+					if segmentID == self.activeID:
+						self.activeFile.close()
+						self.activeFile = None
+
+				# non-zero only if corrupt records were skipped
+				self.msgCount -= self.segments[segmentID][1]
+
+				self._removeSegment(segmentID)
+
+			self._saveReadOffset()
+
+			return removedCount
+
+	def getEvictedCount(self) -> int:
+		return self.evictedCount
+
+	def getMessageCount(self) -> int:
+		return self.msgCount
+
+	def getSize(self) -> int:
+		return self.totalSize
+
+	def getSyncCount(self) -> int:
+		return self.syncCount
+
+	def isEmpty(self) -> bool:
+		return self.msgCount <= 0
+
+	def readBatch(self, maxCount: int = 1) -> list:
+		"""
+		Returns up to 'maxCount' of the oldest messages, without removing them.
+		Call commitBatch() once they've been published. Calling this again
+		before then returns the same messages (plus any newer ones, if the
+		batch wasn't full).
+
+		@param maxCount The max number of messages to return.
+		@return list The (topic, payload bytes, qos) tuples, oldest first.
+		"""
+		with self.lock:
+			msgs = []
+			segmentCounts = []
+
+			endID = None
+			endOffset = 0
+
+			if self.activeFile:
+				# the segment is read with another file handle
+				self.activeFile.flush()
+
+			readOffset = self.readOffset
+
+			for segmentID in list(self.segments):
+				if len(msgs) >= maxCount:
+					break
+
+				segmentMsgs, endOffset = self._readSegment(segmentID, readOffset, maxCount - len(msgs))
+				endID = segmentID
+				readOffset = 0
+
+				msgs.extend(segmentMsgs)
+				segmentCounts.append((segmentID, len(segmentMsgs)))
+
+			self.pendingRead = (endID, endOffset, segmentCounts) if endID is not None else None
+
+			return msgs
+
+	def sync(self):
+		"""
+		Flushes and fsyncs the active segment.
+		"""
+		with self.lock:
+			if self.activeFile and self.unsyncedCount > 0:
+				try:
+					self.activeFile.flush()
+					os.fsync(self.activeFile.fileno())
+
+					self.syncCount += 1
+				except OSError as e:
+					logging.warning("Failed to sync outbox segment in %s: %s", self.outboxDir, str(e))
+
+			self.unsyncedCount = 0
+			self.lastSyncTime  = time.monotonic()
+
+			if self.syncTimer:
+				self.syncTimer.cancel()
+				self.syncTimer = None
+
+	def _startSyncTimer(self):
+		# called with the lock held; syncs the pending records if no more appends do
+		self.syncTimer = threading.Timer(self.syncIntervalSecs, self.sync)
+		self.syncTimer.daemon = True
+		self.syncTimer.start()
+
+	def _evictSegments(self):
+		# the active segment is never evicted, so new messages are kept
+		while self.totalSize > self.maxSize and len(self.segments) > 1:
+			segmentID = next(iter(self.segments))
+
+			if segmentID == self.activeID:
+				break
+
+			evictedCount = self.segments[segmentID][1]
+
+			self.msgCount -= evictedCount
+			self.evictedCount += evictedCount
+
+			self._removeSegment(segmentID)
+
+			logging.warning("Outbox %s is full. Evicted %d oldest messages.", self.outboxDir, evictedCount)
+
+	def _getSegmentPath(self, segmentID: int) -> str:
+		return os.path.join(self.outboxDir, str(segmentID).zfill(10) + self.SEGMENT_FILE_EXT)
+
+	def _packRecord(self, topic: bytes, payload: bytes, qos: int) -> bytes:
+		body = self.RECORD_HEADER.pack(0, len(payload), len(topic), qos)[4:] + topic + payload
+		return struct.pack('>I', zlib.crc32(body)) + body
+
+	def _readRecords(self, data: bytes, offset: int, maxCount: int):
+		"""
+		Parses up to 'maxCount' records from 'data', starting at 'offset'.
+
+		@return tuple The (topic, payload, qos) tuples, and the offset of the
+		first record not parsed. Parsing stops early at a corrupt or truncated record.
+		"""
+		records = []
+		headerSize = self.RECORD_HEADER.size
+
+		while offset + headerSize <= len(data) and len(records) < maxCount:
+			crc, payloadLen, topicLen, qos = self.RECORD_HEADER.unpack_from(data, offset)
+			recordEnd = offset + headerSize + topicLen + payloadLen
+
+			if recordEnd > len(data) or zlib.crc32(data[offset + 4 : recordEnd]) != crc:
+				break
+
+			topicEnd = offset + headerSize + topicLen
+
+			records.append((data[offset + headerSize : topicEnd].decode('utf-8'), data[topicEnd : recordEnd], qos))
+			offset = recordEnd
+
+		return records, offset
+
+	def _readSegment(self, segmentID: int, offset: int, maxCount: int):
+		segmentSize = self.segments[segmentID][0]
+
+		with open(self._getSegmentPath(segmentID), 'rb') as segmentFile:
+			segmentFile.seek(offset)
+			data = segmentFile.read(segmentSize - offset)
+
+		records, endOffset = self._readRecords(data, 0, maxCount)
+
+		if len(records) < maxCount and endOffset < len(data):
+			logging.warning("Skipping %d bytes of corrupt data in outbox segment: %s", \
+				len(data) - endOffset, self._getSegmentPath(segmentID))
+
+			return records, segmentSize
+
+		return records, offset + endOffset
+
+	def _recoverSegments(self):
+		segmentIDs = sorted( \
+			int(fileName[:-len(self.SEGMENT_FILE_EXT)]) for fileName in os.listdir(self.outboxDir) \
+				if fileName.endswith(self.SEGMENT_FILE_EXT) and fileName[:-len(self.SEGMENT_FILE_EXT)].isdigit())
+
+		for segmentID in segmentIDs:
+			filePath = self._getSegmentPath(segmentID)
+
+			with open(filePath, 'rb') as segmentFile:
+				data = segmentFile.read()
+
+			records, endOffset = self._readRecords(data, 0, len(data))
+
+			if endOffset < len(data):
+				logging.warning("Truncating %d bytes of corrupt data from outbox segment: %s", len(data) - endOffset, filePath)
+
+				os.truncate(filePath, endOffset)
+
+			if records:
+				self.segments[segmentID] = [endOffset, len(records)]
+				self.totalSize += endOffset
+				self.msgCount  += len(records)
+			else:
+				os.remove(filePath)
+
+		# new messages always go to a new segment
+		self.nextSegmentID = segmentIDs[-1] + 1 if segmentIDs else 0
+
+		self._recoverReadOffset()
+
+	def _recoverReadOffset(self):
+		try:
+			with open(os.path.join(self.outboxDir, self.READ_OFFSET_FILE), 'r') as offsetFile:
+				segmentID, readOffset = [int(val) for val in offsetFile.read().split()]
+		except (OSError, ValueError):
+			return
+
+		# earlier segments are removed when committed, so it's in the oldest one
+		if segmentID != next(iter(self.segments), None) or readOffset >= self.segments[segmentID][0]:
+			return
+
+		# skip the records that were committed before the restart
+		with open(self._getSegmentPath(segmentID), 'rb') as segmentFile:
+			records, endOffset = self._readRecords(segmentFile.read(readOffset), 0, readOffset)
+
+		if endOffset == readOffset:
+			self.segments[segmentID][1] -= len(records)
+			self.msgCount  -= len(records)
+			self.readOffset = readOffset
+
+	def _removeSegment(self, segmentID: int):
+		self.totalSize -= self.segments.pop(segmentID)[0]
+		self.readOffset = 0
+
+		if segmentID == self.activeID:
+			self.activeID = None
+
+		try:
+			os.remove(self._getSegmentPath(segmentID))
+		except OSError as e:
+			logging.warning("Failed to remove outbox segment %s: %s", self._getSegmentPath(segmentID), str(e))
+
+	def _saveReadOffset(self):
+		offsetFilePath = os.path.join(self.outboxDir, self.READ_OFFSET_FILE)
+
+		try:
+			if self.readOffset > 0:
+				with open(offsetFilePath + '.tmp', 'w') as offsetFile:
+					offsetFile.write('%d %d' % (next(iter(self.segments)), self.readOffset))
+
+				os.replace(offsetFilePath + '.tmp', offsetFilePath)
+			elif os.path.exists(offsetFilePath):
+				os.remove(offsetFilePath)
+		except OSError as e:
+			logging.warning("Failed to save outbox read position in %s: %s", self.outboxDir, str(e))
+
+	def _rollSegment(self):
+		if self.activeFile:
+			self.sync()
+			self.activeFile.close()
+
+		self.activeID = self.nextSegmentID
+		self.nextSegmentID += 1
+
+		self.activeFile = open(self._getSegmentPath(self.activeID), 'ab')
+		self.segments[self.activeID] = [0, 0]
@@ -6,10 +6,20 @@
 # implementation for the Programming the Internet of Things exercises,
 # and designed to be modified by the student as needed.
 #
-import ssl
+import hashlib
+import os
+import random
 import logging
+import socket
+import threading
+import time
 import paho.mqtt.client as mqttClient
 
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+
 import programmingtheiot.common.ConfigConst as ConfigConst
 
 from programmingtheiot.common.ConfigUtil import ConfigUtil
@@ -19,6 +29,9 @@ from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
 from programmingtheiot.data.DataUtil import DataUtil
 
 from programmingtheiot.cda.connection.IPubSubClient import IPubSubClient
+from programmingtheiot.cda.connection.MessageDispatcher import MessageDispatcher
+from programmingtheiot.cda.connection.MessageOutbox import MessageOutbox
+from programmingtheiot.cda.connection.TlsSessionContext import TlsSessionContext
 from paho.mqtt import client
 
 class MqttClientConnector(IPubSubClient):
@@ -27,17 +40,25 @@ class MqttClientConnector(IPubSubClient):
 	
 	"""
 
+	# the max number of actuator command digests kept for deduplication
+	MAX_DEDUP_DIGESTS = 1024
+	
+	# the paho client's own reconnect delay (see _initClient())
+	NO_RECONNECT_DELAY = 24 * 60 * 60
+	
 	def __init__(self, clientID: str = None):
 		"""
 		Default constructor. This will set remote broker information and client connection
 		information based on the default configuration file contents.
 		
-		@param clientID Defaults to None. Can be set by caller. If this is used, it's
-		critically important that a unique, non-conflicting name be used so to avoid
-		causing the MQTT broker to disconnect any client using the same name. With
-		auto-reconnect enabled, this can cause a race condition where each client with
-		the same clientID continuously attempts to re-connect, causing the broker to
-		disconnect the previous instance.
+		@param clientID Defaults to None, in which case the device's location ID is
+		used. Can be set by caller. If this is used, it's critically important that a
+		unique, non-conflicting name be used so to avoid causing the MQTT broker to
+		disconnect any client using the same name. With auto-reconnect enabled, this
+		can cause a race condition where each client with the same clientID continuously
+		attempts to re-connect, causing the broker to disconnect the previous instance.
+		The ID must also stay the same across restarts for a persistent session
+		(see 'cleanSession') to be resumed.
 		"""
 		self.config = ConfigUtil()
 		self.dataMsgListener = None
@@ -58,6 +79,25 @@ class MqttClientConnector(IPubSubClient):
 			self.config.getInteger( \
 				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.DEFAULT_QOS_KEY, ConfigConst.DEFAULT_QOS)
 		
+		# the QoS for each resource's topic, when the caller doesn't give one
+		self.resourceQos = { }
+		
+		for resource in ResourceNameEnum:
+			qos = \
+				self.config.getInteger( \
+					ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.RESOURCE_QOS_KEY_PREFIX + self._getTopicLevel(resource), self.defaultQos)
+			
+			self.resourceQos[resource.value] = qos if 0 <= qos <= 2 else self.defaultQos
+		
+		# with a persistent (not clean) session, the broker keeps the client's
+		# subscriptions and queued messages while it's disconnected
+		self.cleanSession = ConfigConst.DEFAULT_CLEAN_SESSION
+		
+		if self.config.hasProperty(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.CLEAN_SESSION_KEY):
+			self.cleanSession = \
+				self.config.getBoolean( \
+					ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.CLEAN_SESSION_KEY)
+		
 		self.enableEncryption = \
 			self.config.getBoolean( \
 				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.ENABLE_CRYPT_KEY)
@@ -66,48 +106,138 @@ class MqttClientConnector(IPubSubClient):
 			self.config.getProperty( \
 				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.CERT_FILE_KEY)
 		
+		# shared by every client using the same cert file (see _initClient())
+		self.tlsContext = None
+		
+		# payloads are published with this format; anything other than
+		# JSON goes to the resource topic plus the codec's topic suffix
+		self.contentFormat = \
+			self.config.getInteger( \
+				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.UPSTREAM_CONTENT_FORMAT_KEY, ConfigConst.DEFAULT_CONTENT_FORMAT)
+		
+		self.dataUtil = DataUtil(contentFormat = self.contentFormat)
+		
+		# published messages awaiting completion are tracked by message ID
+		# (mid), with at most 'maxInflightMsgs' outstanding at a time
+		self.maxInflightMsgs = \
+			self.config.getInteger( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.MAX_INFLIGHT_MSGS_KEY, ConfigConst.DEFAULT_MAX_INFLIGHT_MSGS)
+		
+		if self.maxInflightMsgs <= 0:
+			self.maxInflightMsgs = ConfigConst.DEFAULT_MAX_INFLIGHT_MSGS
+		
+		self.inflightSlots   = threading.BoundedSemaphore(self.maxInflightMsgs)
+		self.inflightMsgs    = { }
+		self.completedMids   = set()
+		self.inflightLock    = threading.RLock()
+		self.inflightDrained = threading.Condition(self.inflightLock)
+		
 		self.mqttClient = None
 		
-		# TODO: the following is just a sample; use your own unique ID
+		# the ID must be stable (not generated) for a persistent session
 		if not clientID:
-			clientID = 'CDAMqttClientID001'
+			clientID = \
+				self.config.getProperty( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY, 'CDAMqttClientID001')
 		
-		self.clientID = \
-			self.config.getProperty( \
-				ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY, clientID)
+		self.clientID = clientID
 			
+		# messages that can't be published straight away are stored here (if
+		# enabled), and replayed in order once the client (re)connects
+		self.outbox          = None
+		self.outboxLock      = threading.Lock()
+		self.outboxReplaying = False
+		
+		if self.config.getBoolean(ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.ENABLE_OUTBOX_KEY):
+			self._initOutbox()
+		
+		# the connection is managed by a supervisor thread, which reconnects
+		# (with jittered exponential backoff) whenever it's lost
+		self.reconnectMinDelay = \
+			self.config.getFloat( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.RECONNECT_MIN_DELAY_KEY, ConfigConst.DEFAULT_RECONNECT_MIN_DELAY)
+		
+		self.reconnectMaxDelay = \
+			self.config.getFloat( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.RECONNECT_MAX_DELAY_KEY, ConfigConst.DEFAULT_RECONNECT_MAX_DELAY)
+		
+		if self.reconnectMinDelay <= 0.0:
+			self.reconnectMinDelay = ConfigConst.DEFAULT_RECONNECT_MIN_DELAY
+		
+		if self.reconnectMaxDelay < self.reconnectMinDelay:
+			self.reconnectMaxDelay = self.reconnectMinDelay
+		
+		# the client's is_connected() stays True after the connection is lost
+		# (until it reconnects), so the state is tracked here instead
+		self.connected      = False
+		self.sessionPresent = False
+		
+		self.supervisorThread  = None
+		self.stopEvent         = threading.Event()
+		self.disconnectedEvent = threading.Event()
+		
+		# reconnect metrics
+		self.connectAttemptCount = 0
+		self.connectCount        = 0
+		self.connectionLostTime  = None
+		self.lastReconnectSecs   = 0.0
+		self.maxReconnectSecs    = 0.0
+		
+		# every subscription (topic -> qos) is made again on each (re)connect,
+		# unless the broker still has it from a resumed session
+		self.subscriptions        = { }
+		self.sessionSubscriptions = { }
+		self.subscriptionLock     = threading.Lock()
+		
+		# incoming messages are handed to each topic's handler on its own thread
+		self.msgDispatcher = MessageDispatcher()
+		
+		# digests of recent actuator commands (digest -> expiry time), oldest
+		# first, so a redelivered command is only acted on once
+		self.dedupWindowSecs = \
+			self.config.getFloat( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.DEDUP_WINDOW_KEY, ConfigConst.DEFAULT_DEDUP_WINDOW_SECS)
+		
+		self.recentCmdDigests = OrderedDict()
+		self.duplicateCount   = 0
+		self.dedupLock        = threading.Lock()
+		
+		# actuator commands may arrive as JSON or CBOR, and aren't dropped
+		for topic in [ \
+			ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value, \
+			ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value + ConfigConst.CBOR_TOPIC_SUFFIX]:
+			self.subscriptions[topic] = self._getQos(topic)
+			
+			self.msgDispatcher.addHandler( \
+				topic = topic, handler = self.onActuatorCommandMessage, decoder = self._decodeActuatorCommand, \
+				overflowPolicy = MessageDispatcher.BLOCK)
+		
 		logging.info('\tMQTT Client ID:   ' + self.clientID)
 		logging.info('\tMQTT Broker Host: ' + self.host)
 		logging.info('\tMQTT Broker Port: ' + str(self.port))
 		logging.info('\tMQTT Keep Alive:  ' + str(self.keepAlive))
+		logging.info('\tMQTT Clean Session: ' + str(self.cleanSession))
 
 	def connectClient(self) -> bool:
+		"""
+		Starts the connection supervisor, which connects to the broker in the
+		background, and reconnects whenever the connection is lost.
+		
+		@return bool True if started; False if the client is already connected (or connecting).
+		@raise OSError If encryption is enabled, but the cert file can't be read.
+		@raise ssl.SSLError If encryption is enabled, but the cert file isn't valid.
+		"""
 		if not self.mqttClient:
-		# TODO: make clean_session configurable
-			self.mqttClient = mqttClient.Client(client_id = self.clientID, clean_session = True)
-			
-			try:
-				if self.enableEncryption:
-					logging.info("Enabling TLS encryption...")
-					
-					self.port = \
-						self.config.getInteger( \
-							ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.SECURE_PORT_KEY, ConfigConst.DEFAULT_MQTT_SECURE_PORT)
-					logging.info('\tMQTT Broker Port: ' + str(self.port))
-					self.mqttClient.tls_set(self.pemFileName, tls_version = ssl.PROTOCOL_TLSv1_2)
-			except:
-				logging.warning("Failed to enable TLS encryption. Using unencrypted connection.")
-	
-			self.mqttClient.on_connect = self.onConnect
-			self.mqttClient.on_disconnect = self.onDisconnect
-			self.mqttClient.on_message = self.onMessage
-			self.mqttClient.on_publish = self.onPublish
-			self.mqttClient.on_subscribe = self.onSubscribe
-	
-		if not self.mqttClient.is_connected():
+			self._initClient()
+	
+		if not self.supervisorThread:
 			logging.info('MQTT client connecting to broker at host: ' + self.host)
-			self.mqttClient.connect(self.host, self.port, self.keepAlive)
-			self.mqttClient.loop_start()
+			
+			self.msgDispatcher.startDispatcher()
+			self.stopEvent.clear()
+			
+			self.supervisorThread = threading.Thread(target = self._superviseConnection, daemon = True)
+			self.supervisorThread.start()
 			
 			return True
 		else:
@@ -116,41 +246,152 @@ class MqttClientConnector(IPubSubClient):
 			return False
 		
 	def disconnectClient(self) -> bool:
-		if self.mqttClient.is_connected():
+		if self.supervisorThread:
 			logging.info('Disconnecting MQTT client from broker: ' + self.host)
-			self.mqttClient.loop_stop()
-			self.mqttClient.disconnect()
+			
+			self.stopEvent.set()
+			
+			if self._isConnected():
+				self.mqttClient.disconnect()
+			
+			self.disconnectedEvent.set()
+			self.supervisorThread.join()
+			self.supervisorThread = None
+			
+			self.msgDispatcher.stopDispatcher()
+			
+			# nothing will complete them now, whatever their QoS
+			self._failInflightMessages()
+			
+			if self.outbox:
+				self.outbox.sync()
 			
 			return True
 		else:
 			logging.warning('MQTT client already disconnected. Ignoring.')
 			
 			return False
+	
+	def getConnectAttemptCount(self) -> int:
+		return self.connectAttemptCount
+	
+	def getConnectCount(self) -> int:
+		return self.connectCount
+	
+	def getDuplicateCount(self) -> int:
+		return self.duplicateCount
+	
+	def getLastReconnectSecs(self) -> float:
+		return self.lastReconnectSecs
+	
+	def getMaxReconnectSecs(self) -> float:
+		return self.maxReconnectSecs
+	
+	def getTlsContext(self) -> TlsSessionContext:
+		return self.tlsContext
 		
+	def isSessionPresent(self) -> bool:
+		return self.sessionPresent
+	
 	def onConnect(self, client, userdata, flags, rc):
 		logging.info('[Callback] Connected to MQTT broker. Result code: ' + str(rc))
-	
-		# NOTE: Be sure to set `self.defaultQos` during instantiation!
-		self.mqttClient.subscribe( \
-			topic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value, qos = self.defaultQos)
 		
-		self.mqttClient.message_callback_add( \
-			sub = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value, \
-			callback = self.onActuatorCommandMessage)
+		if rc != mqttClient.CONNACK_ACCEPTED:
+			logging.warning('MQTT broker refused connection: %s', mqttClient.connack_string(rc))
+			return
+		
+		self.connected = True
+		self.connectCount += 1
+		
+		# a TLS 1.3 session can only be resumed once the server has sent its
+		# ticket, which it does after the handshake
+		if self.tlsContext and self.mqttClient.socket():
+			self.tlsContext.saveSession(self.mqttClient.socket())
+		
+		if self.connectionLostTime is not None:
+			self.lastReconnectSecs = time.monotonic() - self.connectionLostTime
+			self.maxReconnectSecs  = max(self.maxReconnectSecs, self.lastReconnectSecs)
+			self.connectionLostTime = None
+			
+			logging.info('MQTT client reconnected after %.2f secs. Connect attempts: %d', \
+				self.lastReconnectSecs, self.connectAttemptCount)
+		
+		# the broker only resumes a session if it still has one for this client ID
+		self.sessionPresent = bool(flags.get('session present')) and not self.cleanSession
+		
+		with self.subscriptionLock:
+			if not self.sessionPresent:
+				self.sessionSubscriptions = { }
+			
+			# only changes made while disconnected are needed for a resumed session
+			subscriptions = \
+				[(topic, qos) for topic, qos in self.subscriptions.items() if self.sessionSubscriptions.get(topic) != qos]
+			unsubscriptions = \
+				[topic for topic in self.sessionSubscriptions if topic not in self.subscriptions]
+			
+			self.sessionSubscriptions = dict(self.subscriptions)
+		
+		logging.info('MQTT session present: %s. Subscribing to %d topics.', self.sessionPresent, len(subscriptions))
+		
+		if subscriptions:
+			self.mqttClient.subscribe(subscriptions)
+		
+		if unsubscriptions:
+			self.mqttClient.unsubscribe(unsubscriptions)
+		
+		if self.outbox:
+			with self.outboxLock:
+				self._startOutboxReplay()
 		
 	def onDisconnect(self, client, userdata, rc):
 		logging.info('MQTT client disconnected from broker: ' + str(client))
 		
+		self.connected = False
+		
+		if not self.stopEvent.is_set() and self.connectionLostTime is None:
+			self.connectionLostTime = time.monotonic()
+		
+		# QoS 0 messages that weren't sent are discarded by the client,
+		# so they'll never complete (QoS 1 and 2 messages are resent on
+		# the next connection)
+		self._failInflightMessages(qos = 0)
+		
+		# wakes the connection supervisor
+		self.disconnectedEvent.set()
+		
 	def onMessage(self, client, userdata, msg):
 		payload = msg.payload
 		
+		if self.msgDispatcher.dispatch(msg.topic, payload) > 0:
+			return
+		
 		if payload:
 			logging.info('MQTT message received with payload: ' + str(payload.decode("utf-8")))
 		else:
 			logging.info('MQTT message received with no payload: ' + str(msg))
 			
 	def onPublish(self, client, userdata, mid):
-		logging.info('MQTT message published: ' + str(client))
+		logging.debug('MQTT message published. Message ID: %d', mid)
+		
+		with self.inflightLock:
+			inflightMsg = self.inflightMsgs.pop(mid, None)
+			
+			if not inflightMsg:
+				# completed before publishMessageAsync() could track it
+				self.completedMids.add(mid)
+				return
+			
+			self._releaseInflightSlot()
+		
+		inflightMsg[0].set_result(mid)
+	
+	def onSocketOpen(self, client, userdata, sock):
+		# small messages are sent straight away, rather than held back (by
+		# Nagle's algorithm) until the last segment is acknowledged
+		try:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		except OSError as e:
+			logging.warning('Failed to disable Nagle\'s algorithm on MQTT socket: %s', str(e))
 	
 	def onSubscribe(self, client, userdata, mid, granted_qos):
 		logging.info('MQTT client subscribed: ' + str(client))	
@@ -158,31 +399,31 @@ class MqttClientConnector(IPubSubClient):
 	def onLog(self,userdata,level,buf):
 		logging.info("========================"+buf)
 	
-	def onActuatorCommandMessage(self, client, userdata, msg):
+	def onActuatorCommandMessage(self, topic: str, actuatorData):
 		"""
-		This callback is defined as a convenience, but does not
-		need to be used and can be ignored.
-		
-		It's simply an example for how you can create your own
-		custom callback for incoming messages from a specific
-		topic subscription (such as for actuator commands).
+		Message handler for actuator commands, called on the actuator
+		command topic's dispatcher thread once the payload is decoded.
 		
-		@param client The client reference context.
-		@param userdata The user reference context.
-		@param msg The message context, including the embedded payload.
+		@param topic The topic the command was received on.
+		@param actuatorData The decoded ActuatorData (None if decoding failed).
 		"""
-		logging.info('[Callback] Actuator command message received. Topic: %s.', msg.topic)
+		logging.info('[Callback] Actuator command message received. Topic: %s.', topic)
 	
-		if self.dataMsgListener:
-			try:
-				# assumes all data is encoded using UTF-8 (between GDA and CDA)
-				actuatorData = DataUtil().jsonToActuatorData(msg.payload.decode('utf-8'))
-				
-				self.dataMsgListener.handleActuatorCommandMessage(actuatorData)
-			except:
-				logging.exception("Failed to convert incoming actuation command payload to ActuatorData: ")
+		if self.dataMsgListener and actuatorData:
+			self.dataMsgListener.handleActuatorCommandMessage(actuatorData)
 	
-	def publishMessage(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = ConfigConst.DEFAULT_QOS):
+	def publishMessage(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = None, timeout: float = None):
+		"""
+		Publishes 'msg', and waits for it to complete. If the outbox is
+		enabled, a message that can't be published now is stored instead.
+		
+		@param resource The resource (topic) to publish to.
+		@param msg The message payload.
+		@param qos The QoS level (0 - 2), or None for the resource's default.
+		@param timeout The max time to wait for the message to complete, in
+		seconds (None for the keep alive time).
+		@return bool True if the message was published (or stored); False otherwise.
+		"""
 		# check validity of resource (topic)
 		if not resource:
 			logging.warning('No topic specified. Cannot publish message.')
@@ -193,29 +434,142 @@ class MqttClientConnector(IPubSubClient):
 			logging.warning('No message specified. Cannot publish message to topic: ' + resource.value)
 			return False
 		
-		# check validity of QoS - set to default if necessary
-		if qos < 0 or qos > 2:
-			qos = ConfigConst.DEFAULT_QOS
+		# check validity of QoS - set to the resource's default if necessary
+		qos = self._getQos(resource.value, qos)
+		
+		topic = resource.value + self.dataUtil.getCodec().getTopicSuffix()
+		
+		if self.outbox:
+			# new messages mustn't overtake stored ones, so they're stored too
+			# until the outbox has been replayed
+			with self.outboxLock:
+				if self.outboxReplaying or not self.outbox.isEmpty() or not self._isConnected():
+					return self._storeMessage(topic, msg, qos)
+			
+			# don't wait for an in-flight slot - store the message instead
+			future = self._publishToTopic(topic, msg, qos, timeout = 0)
+		elif self.mqttClient and self._isConnected():
+			future = self._publishToTopic(topic, msg, qos)
+		else:
+			logging.warning('MQTT client not connected. Cannot publish message to topic: ' + resource.value)
+			return False
 		
 		# publish message, and wait for publish to complete before returning
-		msgInfo = self.mqttClient.publish(topic = resource.value, payload = msg, qos = qos)
-		msgInfo.wait_for_publish()
+		if future:
+			try:
+				future.result(timeout = timeout if timeout is not None else self.keepAlive)
+				
+				return True
+			except FutureTimeoutError:
+				# still in flight (QoS 1 and 2 messages are resent on the next
+				# connection), so it isn't stored as well
+				logging.warning('Message to topic %s not acknowledged in time.', resource.value)
+				
+				return False
+			except Exception as e:
+				logging.warning('Failed to publish message to topic %s: %s', resource.value, str(e))
+				
+				if not self.outbox:
+					return False
 		
-		return True
+		# the in-flight window is full, or the client disconnected first
+		with self.outboxLock:
+			return self._storeMessage(topic, msg, qos)
+		
+	def publishMessageAsync(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = None) -> Future:
+		"""
+		Publishes 'msg' without waiting for it to complete. If 'maxInflightMessages'
+		messages are already awaiting completion, this waits for one of them first.
+		Unlike publishMessage(), this never stores the message in the outbox.
+		
+		@param resource The resource (topic) to publish to.
+		@param msg The message payload.
+		@param qos The QoS level (0 - 2), or None for the resource's default.
+		@return Future Completes with the message ID once the message is sent (QoS 0)
+		or acknowledged by the broker (QoS 1 and 2), or fails with a ConnectionError.
+		None if the request is invalid.
+		"""
+		# check validity of resource (topic)
+		if not resource:
+			logging.warning('No topic specified. Cannot publish message.')
+			return None
+		
+		# check validity of message
+		if not msg:
+			logging.warning('No message specified. Cannot publish message to topic: ' + resource.value)
+			return None
+		
+		if not self.mqttClient:
+			logging.warning('MQTT client not connected. Cannot publish message to topic: ' + resource.value)
+			return None
+		
+		# check validity of QoS - set to the resource's default if necessary
+		qos = self._getQos(resource.value, qos)
+		
+		topic = resource.value + self.dataUtil.getCodec().getTopicSuffix()
+		
+		return self._publishToTopic(topic, msg, qos)
+	
+	def flush(self, timeout: float = None) -> bool:
+		"""
+		Waits for all published messages to complete.
+		
+		@param timeout The max time to wait, in seconds (None to wait indefinitely).
+		@return bool True if all messages completed; False if 'timeout' elapsed first.
+		"""
+		with self.inflightDrained:
+			return self.inflightDrained.wait_for(lambda: not self.inflightMsgs, timeout = timeout)
+	
+	def getInflightCount(self) -> int:
+		return len(self.inflightMsgs)
+		
+	def subscribeToTopic(self, resource: ResourceNameEnum = None, callback = None, qos: int = None, \
+		decoder = None, queueSize: int = None, overflowPolicy: str = None):
+		"""
+		Subscribes to 'resource', now if connected, and again on every
+		reconnect. Messages are passed to 'callback' on the topic's own
+		dispatcher thread (see MessageDispatcher).
 		
-	def subscribeToTopic(self, resource: ResourceNameEnum = None, callback = None, qos: int = ConfigConst.DEFAULT_QOS):
+		@param resource The ResourceNameEnum, or a topic filter string (which may
+		include the '+' and '#' wildcards).
+		@param callback The message handler. Must accept the topic and the (decoded)
+		payload. If None, any handler already registered for the topic is kept, and
+		messages are otherwise just logged.
+		@param qos The QoS level (0 - 2), or None for the resource's default.
+		@param decoder The optional function to decode each payload with, before
+		calling 'callback'. Must accept the topic and the payload (bytes).
+		@param queueSize The max number of messages queued for 'callback' (None for the default).
+		@param overflowPolicy MessageDispatcher.DROP_OLDEST or BLOCK (None for the default).
+		@return bool True on success; False otherwise.
+		"""
 		# check validity of resource (topic)
 		if not resource:
 			logging.warning('No topic specified. Cannot subscribe.')
 			return False
 		
-		# check validity of QoS - set to default if necessary
-		if qos < 0 or qos > 2:
-			qos = ConfigConst.DEFAULT_QOS
+		topic = self._getTopic(resource)
+		
+		# check validity of QoS - set to the resource's default if necessary
+		qos = self._getQos(topic, qos)
+		
+		if callback:
+			self.msgDispatcher.addHandler( \
+				topic = topic, handler = callback, decoder = decoder, queueSize = queueSize, overflowPolicy = overflowPolicy)
+		
+		# remembered, so it's made again after a reconnect
+		with self.subscriptionLock:
+			self.subscriptions[topic] = qos
+		
+		if not self._isConnected():
+			logging.info('MQTT client not connected. Will subscribe to topic %s on connect.', topic)
+			return True
+		
+		with self.subscriptionLock:
+			self.sessionSubscriptions[topic] = qos
 		
 		# subscribe to topic
-		logging.info('Subscribing to topic %s', resource.value)
-		self.mqttClient.subscribe(resource.value, qos)
+		logging.info('Subscribing to topic %s with QoS %d', topic, qos)
+		self.mqttClient.subscribe(topic, qos)
 		
 		return True	
 	
@@ -225,11 +579,338 @@ class MqttClientConnector(IPubSubClient):
 			logging.warning('No topic specified. Cannot unsubscribe.')
 			return False
 		
-		logging.info('Unsubscribing to topic %s', resource.value)
-		self.mqttClient.unsubscribe(resource.value)
+		topic = self._getTopic(resource)
+		
+		with self.subscriptionLock:
+			self.subscriptions.pop(topic, None)
+		
+		self.msgDispatcher.removeHandler(topic)
+		
+		if self._isConnected():
+			with self.subscriptionLock:
+				self.sessionSubscriptions.pop(topic, None)
+			
+			logging.info('Unsubscribing to topic %s', topic)
+			self.mqttClient.unsubscribe(topic)
 		
 		return True		
 
 	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
 		if listener:
 			self.dataMsgListener = listener
+	
+	def _decodeActuatorCommand(self, topic: str, payload):
+		if self._isDuplicateCommand(payload):
+			logging.info('Dropped duplicate actuator command. Topic: %s', topic)
+			return None
+		
+		try:
+			# the topic suffix (if any) identifies the payload's format
+			contentFormat = ConfigConst.CONTENT_FORMAT_JSON
+			
+			if topic.endswith(ConfigConst.CBOR_TOPIC_SUFFIX):
+				contentFormat = ConfigConst.CONTENT_FORMAT_CBOR
+			
+			return self.dataUtil.payloadToActuatorData(payload, contentFormat)
+		except:
+			logging.exception("Failed to convert incoming actuation command payload to ActuatorData: ")
+			
+			return None
+	
+	def _isDuplicateCommand(self, payload) -> bool:
+		"""
+		Checks if 'payload' is the same as a command received within the
+		dedup window, and if not, adds it to the window. Commands from the
+		GDA include a time stamp, so only a resent command has the same payload.
+		
+		@param payload The command's payload.
+		@return bool True if the command is a duplicate.
+		"""
+		if self.dedupWindowSecs <= 0.0 or not payload:
+			return False
+		
+		if isinstance(payload, str):
+			payload = payload.encode('utf-8')
+		
+		digest = hashlib.blake2b(payload, digest_size = 16).digest()
+		now = time.monotonic()
+		
+		with self.dedupLock:
+			# expire the oldest digests; the count is capped too, in case of a flood
+			while self.recentCmdDigests:
+				oldestDigest, expiry = next(iter(self.recentCmdDigests.items()))
+				
+				if expiry > now and len(self.recentCmdDigests) < self.MAX_DEDUP_DIGESTS:
+					break
+				
+				self.recentCmdDigests.popitem(last = False)
+			
+			if digest in self.recentCmdDigests:
+				self.duplicateCount += 1
+				return True
+			
+			self.recentCmdDigests[digest] = now + self.dedupWindowSecs
+		
+		return False
+	
+	def _failInflightMessages(self, qos: int = None):
+		with self.inflightLock:
+			failedMids = [mid for mid, (future, msgQos) in self.inflightMsgs.items() if qos is None or msgQos == qos]
+			failedMsgs = [self.inflightMsgs.pop(mid) for mid in failedMids]
+			
+			self.completedMids.clear()
+			
+			for inflightMsg in failedMsgs:
+				self._releaseInflightSlot()
+		
+		for future, msgQos in failedMsgs:
+			future.set_exception(ConnectionError('MQTT client disconnected before message was published'))
+	
+	def _initClient(self):
+		client = mqttClient.Client(client_id = self.clientID, clean_session = self.cleanSession)
+		
+		# never falls back to an unencrypted connection
+		if self.enableEncryption:
+			logging.info("Enabling TLS encryption...")
+			
+			try:
+				self.tlsContext = TlsSessionContext.getContext(self.pemFileName)
+			except Exception as e:
+				logging.error("Failed to enable TLS encryption with cert file %s: %s", self.pemFileName, str(e))
+				raise
+			
+			client.tls_set_context(self.tlsContext)
+			
+			self.port = \
+				self.config.getInteger( \
+					ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.SECURE_PORT_KEY, ConfigConst.DEFAULT_MQTT_SECURE_PORT)
+			logging.info('\tMQTT Broker Port: ' + str(self.port))
+		
+		self.mqttClient = client
+		
+		# the client's own (QoS 1 and 2) window matches ours
+		self.mqttClient.max_inflight_messages_set(self.maxInflightMsgs)
+		
+		# reconnects are made by _superviseConnection(), so the client's own
+		# (un-jittered) reconnect delay is set longer than it's ever left running
+		self.mqttClient.reconnect_delay_set(min_delay = self.NO_RECONNECT_DELAY, max_delay = self.NO_RECONNECT_DELAY)
+		
+		self.mqttClient.on_connect = self.onConnect
+		self.mqttClient.on_disconnect = self.onDisconnect
+		self.mqttClient.on_message = self.onMessage
+		self.mqttClient.on_publish = self.onPublish
+		self.mqttClient.on_subscribe = self.onSubscribe
+		self.mqttClient.on_socket_open = self.onSocketOpen
+	
+	def _getReconnectDelay(self, attempt: int) -> float:
+		"""
+		Returns a random delay between 0 and the exponential backoff time for
+		'attempt' ('full jitter'), so clients that lost their connection at
+		the same time don't all try to reconnect at the same time.
+		
+		@param attempt The number of the connection attempt (1 or more).
+		@return float The seconds to wait before the attempt.
+		"""
+		backoff = min(self.reconnectMaxDelay, self.reconnectMinDelay * (2 ** min(attempt, 32)))
+		
+		return random.uniform(0.0, backoff)
+	
+	def _getQos(self, topic: str, qos: int = None) -> int:
+		"""
+		Returns 'qos' if valid, otherwise the QoS configured for the
+		resource 'topic' belongs to (ignoring any codec topic suffix), or
+		the default QoS if there's none.
+		
+		@param topic The topic (or topic filter).
+		@param qos The QoS requested by the caller (None for the default).
+		@return int The QoS level (0 - 2).
+		"""
+		if qos is not None and 0 <= qos <= 2:
+			return qos
+		
+		if topic.endswith(ConfigConst.CBOR_TOPIC_SUFFIX):
+			topic = topic[:-len(ConfigConst.CBOR_TOPIC_SUFFIX)]
+		
+		return self.resourceQos.get(topic, self.defaultQos)
+	
+	def _getTopic(self, resource) -> str:
+		if isinstance(resource, ResourceNameEnum):
+			return resource.value
+		
+		return resource
+	
+	def _getTopicLevel(self, resource: ResourceNameEnum) -> str:
+		# e.g. 'SensorMsg' for PIOT/ConstrainedDevice/SensorMsg
+		return resource.value.rsplit('/', 1)[-1]
+	
+	def _initOutbox(self):
+		outboxDir = \
+			self.config.getProperty( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.OUTBOX_DIR_KEY)
+		
+		if not outboxDir:
+			logging.warning('No MQTT outbox directory configured. Outbox disabled.')
+			return
+		
+		maxSizeKB = \
+			self.config.getInteger( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.OUTBOX_MAX_SIZE_KEY, ConfigConst.DEFAULT_OUTBOX_MAX_SIZE)
+		syncBatchSize = \
+			self.config.getInteger( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.OUTBOX_SYNC_BATCH_SIZE_KEY, ConfigConst.DEFAULT_OUTBOX_SYNC_BATCH_SIZE)
+		syncIntervalSecs = \
+			self.config.getFloat( \
+				ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.OUTBOX_SYNC_INTERVAL_KEY, ConfigConst.DEFAULT_OUTBOX_SYNC_INTERVAL)
+		
+		if maxSizeKB <= 0:
+			maxSizeKB = ConfigConst.DEFAULT_OUTBOX_MAX_SIZE
+		
+		try:
+			# each client has its own outbox
+			self.outbox = \
+				MessageOutbox( \
+					outboxDir = os.path.join(outboxDir, self.clientID), maxSize = maxSizeKB * 1024, \
+					syncBatchSize = syncBatchSize, syncIntervalSecs = syncIntervalSecs)
+		except OSError as e:
+			logging.warning('Failed to open MQTT outbox in %s. Outbox disabled: %s', outboxDir, str(e))
+	
+	def _isConnected(self) -> bool:
+		return self.connected
+	
+	def _publishToTopic(self, topic: str, msg, qos: int, timeout: float = None) -> Future:
+		"""
+		Publishes 'msg' to 'topic', once an in-flight slot is available.
+		
+		@param timeout The max time to wait for a slot, in seconds (None to wait indefinitely).
+		@return Future The message's future, or None if 'timeout' elapsed first.
+		"""
+		if not self.inflightSlots.acquire(timeout = timeout):
+			return None
+		
+		future = Future()
+		
+		# not called with the in-flight lock held: the client holds its own
+		# message lock while calling onPublish(), so that would deadlock
+		msgInfo = self.mqttClient.publish(topic = topic, payload = msg, qos = qos)
+		
+		with self.inflightLock:
+			# QoS 1 and 2 messages are queued (and resent) while disconnected
+			if msgInfo.rc != mqttClient.MQTT_ERR_SUCCESS and not (msgInfo.rc == mqttClient.MQTT_ERR_NO_CONN and qos > 0):
+				self._releaseInflightSlot()
+				future.set_exception(ConnectionError(mqttClient.error_string(msgInfo.rc)))
+			elif msgInfo.mid in self.completedMids:
+				self.completedMids.discard(msgInfo.mid)
+				self._releaseInflightSlot()
+				future.set_result(msgInfo.mid)
+			else:
+				self.inflightMsgs[msgInfo.mid] = (future, qos)
+		
+		return future
+	
+	def _releaseInflightSlot(self):
+		# called with the in-flight lock held
+		self.inflightSlots.release()
+		
+		if not self.inflightMsgs:
+			self.inflightDrained.notify_all()
+	
+	def _replayOutbox(self):
+		"""
+		Publishes the outbox's messages in order, a batch (of up to
+		'maxInflightMsgs') at a time. Each batch is removed from the outbox
+		once all its messages have completed. Stops (leaving the rest for
+		the next connection) if any message in a batch fails or times out.
+		"""
+		replayCount = 0
+		
+		try:
+			while True:
+				with self.outboxLock:
+					msgs = self.outbox.readBatch(self.maxInflightMsgs) if self._isConnected() else None
+					
+					if not msgs:
+						self.outboxReplaying = False
+						break
+				
+				futures = [self._publishToTopic(topic, payload, qos) for topic, payload, qos in msgs]
+				doneFutures, pendingFutures = wait(futures, timeout = self.keepAlive)
+				
+				if pendingFutures or any(future.exception() for future in doneFutures):
+					logging.warning('MQTT outbox replay interrupted. Messages left: %d', self.outbox.getMessageCount())
+					
+					with self.outboxLock:
+						self.outboxReplaying = False
+						
+					break
+				
+				with self.outboxLock:
+					replayCount += self.outbox.commitBatch()
+		except:
+			logging.exception('MQTT outbox replay failed.')
+			
+			with self.outboxLock:
+				self.outboxReplaying = False
+		
+		logging.info('Replayed %d messages from MQTT outbox.', replayCount)
+	
+	def _superviseConnection(self):
+		"""
+		Runs on the supervisor thread until disconnectClient() is called.
+		Connects the client and runs its network loop until the connection
+		is lost, then waits a backoff time and reconnects.
+		"""
+		attempt = 0
+		
+		while not self.stopEvent.is_set():
+			self.disconnectedEvent.clear()
+			self.connectAttemptCount += 1
+			
+			connectCount = self.connectCount
+			
+			try:
+				self.mqttClient.connect(self.host, self.port, self.keepAlive)
+				self.mqttClient.loop_start()
+				
+				# set by onDisconnect() or disconnectClient()
+				self.disconnectedEvent.wait()
+				
+				self.mqttClient.loop_stop()
+			except OSError as e:
+				logging.warning('Failed to connect to MQTT broker at %s:%d: %s', self.host, self.port, str(e))
+				
+				if self.connectionLostTime is None:
+					self.connectionLostTime = time.monotonic()
+			
+			if self.stopEvent.is_set():
+				break
+			
+			# the backoff restarts once a connection is made
+			attempt = 1 if self.connectCount > connectCount else attempt + 1
+			delay = self._getReconnectDelay(attempt)
+			
+			logging.info('MQTT client reconnecting in %.2f secs. Attempt: %d', delay, attempt)
+			
+			self.stopEvent.wait(delay)
+		
+		# messages still queued in the client won't be sent now
+		self._failInflightMessages()
+	
+	def _startOutboxReplay(self):
+		# called with the outbox lock held
+		if self.outboxReplaying or self.outbox.isEmpty() or not self._isConnected():
+			return
+		
+		self.outboxReplaying = True
+		
+		# not on the client's network thread, as that handles the completions
+		threading.Thread(target = self._replayOutbox, daemon = True).start()
+	
+	def _storeMessage(self, topic: str, msg, qos: int) -> bool:
+		# called with the outbox lock held
+		if not self.outbox.append(topic = topic, payload = msg, qos = qos):
+			return False
+		
+		# covers messages stored due to backpressure, rather than disconnection
+		self._startOutboxReplay()
+		
+		return True
@@ -0,0 +1,173 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import zlib
+
+from concurrent.futures import Future
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.common.IDataMessageListener import IDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.cda.connection.IPubSubClient import IPubSubClient
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+
+class MqttClientConnectorPool(IPubSubClient):
+	"""
+	A pool of MQTT connections behind the IPubSubClient interface, so
+	publishing isn't limited to the one network thread of a single client.
+
+	Each topic is assigned to one connection by the CRC-32 of its name,
+	so its messages are always sent (and received) over that connection,
+	and stay in order. Throughput therefore only scales with the number
+	of topics in use - messages for a single topic share one connection.
+
+	"""
+
+	def __init__(self, poolSize: int = None, clientID: str = None):
+		"""
+		Constructor.
+
+		@param poolSize The number of connections. If None, this is read from the
+		Mqtt.GatewayService section of the configuration file.
+		@param clientID The base client ID; each connection's is '<clientID>-<n>'
+		(unless there's only one). If None, the device's location ID is used.
+		"""
+		config = ConfigUtil()
+
+		if poolSize is None:
+			poolSize = \
+				config.getInteger( \
+					ConfigConst.MQTT_GATEWAY_SERVICE, ConfigConst.CONNECTION_POOL_SIZE_KEY, ConfigConst.DEFAULT_CONNECTION_POOL_SIZE)
+
+		if poolSize <= 0:
+			poolSize = ConfigConst.DEFAULT_CONNECTION_POOL_SIZE
+
+		if not clientID:
+			clientID = \
+				config.getProperty( \
+					ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY, 'CDAMqttClientID001')
+
+		if poolSize == 1:
+			self.connectors = [MqttClientConnector(clientID = clientID)]
+		else:
+			self.connectors = [MqttClientConnector(clientID = clientID + '-' + str(i)) for i in range(poolSize)]
+
+		# each connector subscribes to actuator commands, but they must only
+		# be received once - over the connection the topic is assigned to
+		actuatorCmdTopic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value
+		actuatorCmdConnector = self._getConnector(actuatorCmdTopic)
+
+		for connector in self.connectors:
+			if connector is not actuatorCmdConnector:
+				connector.unsubscribeFromTopic(actuatorCmdTopic)
+				connector.unsubscribeFromTopic(actuatorCmdTopic + ConfigConst.CBOR_TOPIC_SUFFIX)
+
+		logging.info("Created MQTT connection pool: size = %d, client ID = %s", poolSize, clientID)
+
+	def connectClient(self) -> bool:
+		"""
+		Connects every connection in the pool.
+
+		@return bool True if any connection was started; False if all were already.
+		"""
+		results = [connector.connectClient() for connector in self.connectors]
+
+		return any(results)
+
+	def disconnectClient(self) -> bool:
+		"""
+		Disconnects every connection in the pool.
+
+		@return bool True if any connection was stopped; False if none were connected.
+		"""
+		results = [connector.disconnectClient() for connector in self.connectors]
+
+		return any(results)
+
+	def flush(self, timeout: float = None) -> bool:
+		"""
+		Waits for all published messages (over every connection) to complete.
+
+		@param timeout The max time to wait for each connection, in seconds
+		(None to wait indefinitely).
+		@return bool True if all messages completed; False if 'timeout' elapsed first.
+		"""
+		results = [connector.flush(timeout = timeout) for connector in self.connectors]
+
+		return all(results)
+
+	def getConnectors(self) -> list:
+		return self.connectors
+
+	def getInflightCount(self) -> int:
+		return sum(connector.getInflightCount() for connector in self.connectors)
+
+	def getPoolSize(self) -> int:
+		return len(self.connectors)
+
+	def publishMessage(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = None, timeout: float = None) -> bool:
+		if not resource:
+			logging.warning('No topic specified. Cannot publish message.')
+			return False
+
+		return self._getConnector(resource.value).publishMessage(resource = resource, msg = msg, qos = qos, timeout = timeout)
+
+	def publishMessageAsync(self, resource: ResourceNameEnum = None, msg: str = None, qos: int = None) -> Future:
+		if not resource:
+			logging.warning('No topic specified. Cannot publish message.')
+			return None
+
+		return self._getConnector(resource.value).publishMessageAsync(resource = resource, msg = msg, qos = qos)
+
+	def subscribeToTopic(self, resource: ResourceNameEnum = None, callback = None, qos: int = None, \
+		decoder = None, queueSize: int = None, overflowPolicy: str = None) -> bool:
+		"""
+		Subscribes to 'resource' over the connection it's assigned to.
+		See MqttClientConnector.subscribeToTopic().
+		"""
+		if not resource:
+			logging.warning('No topic specified. Cannot subscribe.')
+			return False
+
+		return self._getConnector(resource).subscribeToTopic( \
+			resource = resource, callback = callback, qos = qos, decoder = decoder, queueSize = queueSize, overflowPolicy = overflowPolicy)
+
+	def unsubscribeFromTopic(self, resource: ResourceNameEnum = None) -> bool:
+		if not resource:
+			logging.warning('No topic specified. Cannot unsubscribe.')
+			return False
+
+		return self._getConnector(resource).unsubscribeFromTopic(resource)
+
+	def setDataMessageListener(self, listener: IDataMessageListener = None) -> bool:
+		if not listener:
+			return False
+
+		for connector in self.connectors:
+			connector.setDataMessageListener(listener)
+
+		return True
+
+	def _getConnector(self, topic) -> MqttClientConnector:
+		"""
+		Returns the connection 'topic' is assigned to. A topic with a codec
+		suffix (e.g. '/cbor') is assigned with its resource.
+
+		@param topic The ResourceNameEnum, or topic (filter) string.
+		@return MqttClientConnector The connection.
+		"""
+		if isinstance(topic, ResourceNameEnum):
+			topic = topic.value
+
+		if topic.endswith(ConfigConst.CBOR_TOPIC_SUFFIX):
+			topic = topic[:-len(ConfigConst.CBOR_TOPIC_SUFFIX)]
+
+		return self.connectors[zlib.crc32(topic.encode('utf-8')) % len(self.connectors)]
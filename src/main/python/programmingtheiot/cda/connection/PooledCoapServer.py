@@ -0,0 +1,204 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import socket
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from coapthon import defines
+from coapthon.messages.message import Message
+from coapthon.messages.request import Request
+from coapthon.messages.response import Response
+from coapthon.server.coap import CoAP
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapBlockLayer import CoapBlockLayer, CoapSerializer
+
+class PooledCoapServer(CoAP):
+	"""
+	CoAPthon server whose requests are processed by bounded worker pools,
+	rather than a new thread per request.
+
+	Requests that update a resource (PUT, POST and DELETE - actuator
+	commands, mainly) have their own pool, so a few slow ones can't hold
+	up the GETs (telemetry, and observe registrations) - and vice versa.
+	Requests are queued when all of their pool's workers are busy, and
+	once 'queueSize' are waiting, the rest are answered with 5.03 Service
+	Unavailable (and a Max-Age of 1s, so the client can retry) instead.
+
+	"""
+
+	# the request methods processed by the update pool
+	UPDATE_CODES = [ \
+		defines.Codes.POST.number, \
+		defines.Codes.PUT.number, \
+		defines.Codes.DELETE.number]
+
+	def __init__(self, server_address, \
+		workers: int = ConfigConst.DEFAULT_COAP_SERVER_WORKERS, \
+		updateWorkers: int = ConfigConst.DEFAULT_COAP_SERVER_UPDATE_WORKERS, \
+		queueSize: int = ConfigConst.DEFAULT_COAP_SERVER_QUEUE_SIZE, \
+		blockSize: int = ConfigConst.DEFAULT_COAP_BLOCK_SIZE, \
+		**kwargs):
+		super().__init__(server_address, **kwargs)
+
+		# CoAPthon's block layer only supports its fixed block size, and
+		# one token per transfer (see CoapBlockLayer)
+		self._blockLayer = CoapBlockLayer(blockSize = blockSize)
+
+		self.requestPool = RequestPool('CoapRequest', workers, queueSize)
+		self.updatePool  = RequestPool('CoapUpdate', updateWorkers, queueSize)
+
+	def listen(self, timeout = 10):
+		"""
+		Receives requests until the server is closed, handing each to a
+		worker. This is CoAPthon's listen loop, other than that.
+
+		@param timeout The socket timeout, in seconds - how often the loop
+		checks whether the server has been closed.
+		"""
+		self._socket.settimeout(float(timeout))
+
+		try:
+			while not self.stopped.is_set():
+				try:
+					data, clientAddress = self._socket.recvfrom(4096)
+				except socket.timeout:
+					continue
+				except Exception as e:
+					if callable(self._cb_ignore_listen_exception) and self._cb_ignore_listen_exception(e, self):
+						continue
+
+					raise
+
+				self._receiveDatagram(data, (clientAddress[0], clientAddress[1]))
+		finally:
+			# requests still queued are dropped - clients will retry (CON)
+			self.requestPool.shutdown()
+			self.updatePool.shutdown()
+
+			self._socket.close()
+
+	def _receiveDatagram(self, data, clientAddress: tuple):
+		# a request block may split a character, which CoAPthon's serializer rejects
+		message = CoapSerializer.deserialize(data, clientAddress)
+
+		if isinstance(message, int):
+			logging.error("Bad request from %s. Sending reset.", str(clientAddress))
+
+			rst = Message()
+			rst.destination = clientAddress
+			rst.type = defines.Types["RST"]
+			rst.code = message
+			rst.mid = self._messageLayer.fetch_mid()
+			self.send_datagram(rst)
+		elif isinstance(message, Request):
+			transaction = self._messageLayer.receive_request(message)
+
+			if transaction.request.duplicated:
+				# a retransmission - of a request already answered, or in progress
+				if transaction.completed:
+					if transaction.response is not None:
+						self.send_datagram(transaction.response)
+				else:
+					self._send_ack(transaction)
+			else:
+				pool = self.updatePool if message.code in self.UPDATE_CODES else self.requestPool
+
+				if not pool.submit(self.receive_request, transaction):
+					self._rejectRequest(transaction)
+		elif isinstance(message, Response):
+			logging.error("Received response from %s. Ignoring.", str(message.source))
+		else:
+			transaction = self._messageLayer.receive_empty(message)
+
+			if transaction is not None:
+				with transaction:
+					self._blockLayer.receive_empty(message, transaction)
+					self._observeLayer.receive_empty(message, transaction)
+
+	def _rejectRequest(self, transaction):
+		logging.warning("CoAP server busy. Rejecting request from %s.", str(transaction.request.source))
+
+		with transaction:
+			response = Response()
+			response.destination = transaction.request.source
+			response.token = transaction.request.token
+			response.code = defines.Codes.SERVICE_UNAVAILABLE.number
+			response.max_age = 1
+
+			transaction.response = response
+
+			self._messageLayer.send_response(transaction)
+			self.send_datagram(transaction.response)
+
+class RequestPool():
+	"""
+	A fixed number of worker threads, and a limit on how many requests
+	may wait for one.
+
+	"""
+
+	def __init__(self, name: str, workers: int, queueSize: int):
+		self.workers   = max(1, workers)
+		self.queueSize = max(0, queueSize)
+		self.pending   = 0
+
+		self.executor = ThreadPoolExecutor(max_workers = self.workers, thread_name_prefix = name)
+		self.lock     = threading.Lock()
+
+	def getPendingCount(self) -> int:
+		"""
+		Returns the number of requests being processed, or waiting to be.
+
+		@return int
+		"""
+		return self.pending
+
+	def submit(self, fn, *args) -> bool:
+		"""
+		Queues fn(*args) for a worker.
+
+		@param fn The function to call.
+		@return bool False if the queue is full (or the pool is shut down),
+		so it isn't called.
+		"""
+		with self.lock:
+			if self.pending >= self.workers + self.queueSize:
+				return False
+
+			self.pending += 1
+
+		try:
+			self.executor.submit(self._run, fn, *args)
+		except RuntimeError:
+			with self.lock:
+				self.pending -= 1
+
+			return False
+
+		return True
+
+	def shutdown(self):
+		"""
+		Stops the workers once their current requests are done. Queued
+		requests are cancelled.
+
+		"""
+		self.executor.shutdown(wait = False, cancel_futures = True)
+
+	def _run(self, fn, *args):
+		try:
+			fn(*args)
+		except Exception as e:
+			logging.exception("Failed to process CoAP request: %s", str(e))
+		finally:
+			with self.lock:
+				self.pending -= 1
@@ -0,0 +1,148 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import os
+import ssl
+import threading
+import time
+
+class TlsSocket(ssl.SSLSocket):
+	"""
+	An SSL socket that times its handshake, and hands its session back
+	to its TlsSessionContext for reuse.
+
+	"""
+
+	def do_handshake(self, block = False):
+		startTime = time.monotonic()
+
+		super().do_handshake(block)
+
+		self.context.saveSession(self, handshakeSecs = time.monotonic() - startTime)
+
+class TlsSessionContext(ssl.SSLContext):
+	"""
+	A client SSL context, shared by every connection using the same CA
+	certificate file (see getContext()), so the file is only loaded once.
+
+	Each connection's TLS session is kept (per server address), and reused
+	for the next connection to the same server. If the server accepts it,
+	the handshake is abbreviated - it skips the certificate exchange and
+	key agreement, which is the CPU-heavy part on small devices.
+
+	Handshake times are logged, and counted by getHandshakeCount() etc.
+
+	"""
+
+	sslsocket_class = TlsSocket
+
+	# CA certificate file path -> context
+	contexts    = { }
+	contextLock = threading.Lock()
+
+	@classmethod
+	def getContext(cls, certFileName: str = None):
+		"""
+		Returns the shared context for 'certFileName', creating it first
+		if necessary.
+
+		@param certFileName The CA certificate (PEM) file to verify servers with.
+		If None, the system's default CA certificates are used.
+		@return TlsSessionContext The context.
+		@raise OSError If 'certFileName' can't be read.
+		@raise ssl.SSLError If 'certFileName' isn't a valid certificate file.
+		"""
+		key = os.path.realpath(certFileName) if certFileName else None
+
+		with cls.contextLock:
+			context = cls.contexts.get(key)
+
+			if not context:
+				context = cls(ssl.PROTOCOL_TLS_CLIENT)
+				context.minimum_version = ssl.TLSVersion.TLSv1_2
+
+				if certFileName:
+					context.load_verify_locations(cafile = certFileName)
+				else:
+					context.load_default_certs()
+
+				cls.contexts[key] = context
+
+				logging.info("Created TLS context for CA certificate file: %s", certFileName)
+
+			return context
+
+	def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT):
+		super().__init__()
+
+		# server address -> the last session made with it
+		self.sessions    = { }
+		self.sessionLock = threading.Lock()
+
+		self.handshakeCount    = 0
+		self.resumedCount      = 0
+		self.lastHandshakeSecs = 0.0
+		self.maxHandshakeSecs  = 0.0
+
+	def getHandshakeCount(self) -> int:
+		return self.handshakeCount
+
+	def getLastHandshakeSecs(self) -> float:
+		return self.lastHandshakeSecs
+
+	def getMaxHandshakeSecs(self) -> float:
+		return self.maxHandshakeSecs
+
+	def getResumedCount(self) -> int:
+		return self.resumedCount
+
+	def saveSession(self, sock: ssl.SSLSocket, handshakeSecs: float = None):
+		"""
+		Keeps 'sock's session, to be resumed by the next connection to
+		the same server. Called once the handshake completes, and should
+		be called again once data has been received, as TLS 1.3 servers
+		only send a resumable session (ticket) after the handshake.
+
+		@param sock The connected socket.
+		@param handshakeSecs The handshake time, if just completed.
+		"""
+		try:
+			serverAddress = sock.getpeername()[:2]
+		except OSError:
+			return
+
+		with self.sessionLock:
+			if sock.session:
+				self.sessions[serverAddress] = sock.session
+
+			if handshakeSecs is None:
+				return
+
+			self.handshakeCount += 1
+			self.lastHandshakeSecs = handshakeSecs
+			self.maxHandshakeSecs = max(self.maxHandshakeSecs, handshakeSecs)
+
+			if sock.session_reused:
+				self.resumedCount += 1
+
+		logging.info( \
+			"TLS handshake with %s:%d took %.1f ms. Session resumed: %s", \
+			serverAddress[0], serverAddress[1], handshakeSecs * 1000, sock.session_reused)
+
+	def wrap_socket(self, sock, server_side = False, do_handshake_on_connect = True, \
+		suppress_ragged_eofs = True, server_hostname = None, session = None):
+		if session is None and not server_side:
+			try:
+				with self.sessionLock:
+					session = self.sessions.get(sock.getpeername()[:2])
+			except OSError:
+				pass
+
+		return super().wrap_socket( \
+			sock, server_side = server_side, do_handshake_on_connect = do_handshake_on_connect, \
+			suppress_ragged_eofs = suppress_ragged_eofs, server_hostname = server_hostname, session = session)
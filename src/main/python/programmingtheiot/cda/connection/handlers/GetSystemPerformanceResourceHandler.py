@@ -10,18 +10,18 @@
 import logging
 
 from coapthon import defines
-from coapthon.resources.resource import Resource
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
-from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.cda.connection.handlers.ObservableResourceHandler import ObservableResourceHandler
+
+from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 from programmingtheiot.common.ITelemetryDataListener import ITelemetryDataListener
 from programmingtheiot.common.ISystemPerformanceDataListener import ISystemPerformanceDataListener
 
-from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
 
-class GetSystemPerformanceResourceHandler(Resource,ISystemPerformanceDataListener):
+class GetSystemPerformanceResourceHandler(ObservableResourceHandler,ISystemPerformanceDataListener):
 	"""
 	Observable resource that will collect system performance data based on the
 	given name from the data message listener implementation.
@@ -30,46 +30,60 @@ class GetSystemPerformanceResourceHandler(Resource,ISystemPerformanceDataListene
 	callback function for the DeviceDataManager to use to send the latest 
 	SystemPerformanceData to the implementing class.
 	
-	NOTE: Your implementation will likely need to extend from the selected
-	CoAP library's observable resource base class.
+	Observers are notified of each update (see ObservableResourceHandler).
 	
 	"""
 
-	def __init__(self,name: str=ConfigConst.SYSTEM_PERF_MSG,coap_server=None):
-		super(GetSystemPerformanceResourceHandler, self).__init__( \
-			name, coap_server, visible = True, observable = True, allow_children = True)
+	def __init__(self,name: str=ConfigConst.SYSTEM_PERF_MSG,coap_server=None, dataMsgListener: IDataMessageListener = None):
+		super(GetSystemPerformanceResourceHandler, self).__init__(name, coap_server)
 		
-		self.pollCycles = \
-			ConfigUtil().getInteger( \
-				section = ConfigConst.CONSTRAINED_DEVICE, \
-				key = ConfigConst.POLL_CYCLES_KEY, \
-				defaultVal = ConfigConst.DEFAULT_POLL_CYCLES)
+		self.dataMsgListener = dataMsgListener
 		
 		self.sysPerfData = None
-		self.dataUtil = DataUtil()
+		self.emptySysPerfData = SystemPerformanceData()
 		
 		# for testing
 		self.payload = "GetSysPerfData"
 		
 	def onSystemPerformanceDataUpdate(self, data: SystemPerformanceData) -> bool:
-		pass
+		if not data:
+			return False
+		
+		self.sysPerfData = data
+		
+		return self._onDataUpdate()
 	
 	def render_GET_advanced(self,request,response):
 		if request:
 			response.code = defines.Codes.CONTENT.number
 			
-			if not self.sysPerfData:
+			sysPerfData = self._getLatestSystemPerformanceData()
+			
+			if not sysPerfData:
 				response.code = defines.Codes.EMPTY.number
-				self.sysPerfData = SystemPerformanceData()
+				sysPerfData = self.emptySysPerfData
 				
-			jsonData = DataUtil().systemPerformanceDataToJson(self.sysPerfData)
+			# reply in the format asked for via the Accept option (JSON by default),
+			# or with 2.03 Valid if the client's ETag is current
+			self._setResponsePayload(request, response, sysPerfData)
 			
-			response.payload = (defines.Content_types["application/json"], jsonData)
 			response.max_age = self.pollCycles
 	
-			# 'changed' will be discussed in a later exercise
+			# observers are notified by onSystemPerformanceDataUpdate(), not by
+			# CoAPthon after this request
 			self.changed = False
 				
 		return self, response
+	
+	def _getLatestSystemPerformanceData(self) -> SystemPerformanceData:
+		"""
+		Returns the latest SystemPerformanceData from the data message listener's
+		cache, falling back to the last pushed update (if any).
+		"""
+		if self.dataMsgListener:
+			sysPerfData = self.dataMsgListener.getLatestSystemPerformanceDataFromCache(name = self.name)
+			
+			if sysPerfData:
+				return sysPerfData
 		
-	
\ No newline at end of file
+		return self.sysPerfData
@@ -10,17 +10,17 @@
 import logging
 
 from coapthon import defines
-from coapthon.resources.resource import Resource
 
 import programmingtheiot.common.ConfigConst as ConfigConst
 
-from programmingtheiot.common.ConfigUtil import ConfigUtil
+from programmingtheiot.cda.connection.handlers.ObservableResourceHandler import ObservableResourceHandler
+
+from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 from programmingtheiot.common.ITelemetryDataListener import ITelemetryDataListener
 
-from programmingtheiot.data.DataUtil import DataUtil
 from programmingtheiot.data.SensorData import SensorData
 
-class GetTelemetryResourceHandler(Resource,ITelemetryDataListener):
+class GetTelemetryResourceHandler(ObservableResourceHandler,ITelemetryDataListener):
 	"""
 	Observable resource that will collect telemetry based on the given
 	name from the data message listener implementation.
@@ -29,45 +29,64 @@ class GetTelemetryResourceHandler(Resource,ITelemetryDataListener):
 	function for the DeviceDataManager to use to send the latest SensorData 
 	to the implementing class.
 	
-	NOTE: Your implementation will likely need to extend from the selected
-	CoAP library's observable resource base class.
+	Observers are notified of each update (see ObservableResourceHandler).
+	The generic resource (SensorMsg) is updated with readings from every
+	sensor; otherwise, only readings with the resource's name are used.
 	
 	"""
 
-	def __init__(self, name: str = ConfigConst.SENSOR_MSG, coap_server = None):
-		super(GetTelemetryResourceHandler, self).__init__( \
-			name, coap_server, visible = True, observable = True, allow_children = True)
+	def __init__(self, name: str = ConfigConst.SENSOR_MSG, coap_server = None, dataMsgListener: IDataMessageListener = None):
+		super(GetTelemetryResourceHandler, self).__init__(name, coap_server)
+		
+		self.dataMsgListener = dataMsgListener
 		
-		self.pollCycles = \
-			ConfigUtil().getInteger( \
-				section = ConfigConst.CONSTRAINED_DEVICE, \
-				key = ConfigConst.POLL_CYCLES_KEY, \
-				defaultVal = ConfigConst.DEFAULT_POLL_CYCLES)
-			
 		self.sensorData = None
-		self.dataUtil = DataUtil()
+		self.emptySensorData = SensorData()
 		
 		# for testing
 		self.payload = "GetSensorData"
 		
 	def onSensorDataUpdate(self, data: SensorData = None) -> bool:
-		pass
+		if not data or (self.name != ConfigConst.SENSOR_MSG and data.getName() != self.name):
+			return False
+		
+		self.sensorData = data
+		
+		return self._onDataUpdate()
 	
 	def render_GET_advanced(self,request,response):
 		if request:
 			response.code = defines.Codes.CONTENT.number
 			
-			if not self.sensorData:
+			sensorData = self._getLatestSensorData()
+			
+			if not sensorData:
 				response.code = defines.Codes.EMPTY.number
-				self.sensorData = SensorData()
+				sensorData = self.emptySensorData
 				
-			jsonData = DataUtil().sensorDataToJson(self.sensorData )
+			# reply in the format asked for via the Accept option (JSON by default),
+			# or with 2.03 Valid if the client's ETag is current
+			self._setResponsePayload(request, response, sensorData)
 			
-			response.payload = (defines.Content_types["application/json"], jsonData)
 			response.max_age = self.pollCycles
 	
-			# 'changed' will be discussed in a later exercise
+			# observers are notified by onSensorDataUpdate(), not by CoAPthon
+			# after this request
 			self.changed = False
 				
 		return self, response
-	
\ No newline at end of file
+	
+	def _getLatestSensorData(self) -> SensorData:
+		"""
+		Returns the latest SensorData for this resource from the data message
+		listener's cache, falling back to the last pushed update (if any).
+		The generic resource name (SensorMsg) maps to the latest reading of any sensor.
+		"""
+		if self.dataMsgListener:
+			name = None if self.name == ConfigConst.SENSOR_MSG else self.name
+			sensorData = self.dataMsgListener.getLatestSensorDataFromCache(name = name)
+			
+			if sensorData:
+				return sensorData
+		
+		return self.sensorData
@@ -0,0 +1,162 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import random
+import threading
+import time
+
+from coapthon import defines
+from coapthon.resources.resource import Resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
+from programmingtheiot.data.DataUtil import DataUtil
+
+class ObservableResourceHandler(Resource):
+	"""
+	Base class for the observable (GET) resource handlers, whose data is
+	pushed to them by the data message listener.
+
+	Each update marks the resource changed (until it's next rendered), and
+	notifies its observers - at most once per max age (the poll cycle).
+	Updates arriving faster than that are coalesced: the next notification
+	is sent once the max age has passed since the last one, with the
+	latest data.
+
+	CoAPthon renders the resource once per observer when notifying, so
+	payloads are encoded once per update (and Content-Format), and the
+	same payload is sent to every observer - and to every poller. Each
+	payload has an ETag, so clients with the latest one can revalidate
+	it (2.03 Valid) rather than get it again.
+
+	"""
+
+	def __init__(self, name: str = None, coap_server = None):
+		super(ObservableResourceHandler, self).__init__( \
+			name, coap_server, visible = True, observable = True, allow_children = True)
+
+		self.pollCycles = \
+			ConfigUtil().getInteger( \
+				section = ConfigConst.CONSTRAINED_DEVICE, \
+				key = ConfigConst.POLL_CYCLES_KEY, \
+				defaultVal = ConfigConst.DEFAULT_POLL_CYCLES)
+
+		self.dataUtil = DataUtil()
+
+		# the data the cached payloads (and ETags) were encoded from, and its
+		# version - which starts at random, so a restart doesn't reuse ETags
+		self.payloadData = None
+		self.payloadVersion = random.getrandbits(32)
+		self.payloads = { }
+
+		self.lastNotifyTime = None
+		self.notifyTimer = None
+		self.notifyCount = 0
+
+		self.lock = threading.Lock()
+
+	def getNotifyCount(self) -> int:
+		"""
+		Returns the number of notifications sent (to all observers).
+
+		@return int
+		"""
+		return self.notifyCount
+
+	def setCoapServer(self, coapServer = None):
+		"""
+		Sets the CoAP server whose observers are notified of updates.
+
+		@param coapServer The CoAPthon server the resource is added to.
+		"""
+		self._coap_server = coapServer
+
+	def _getPayload(self, data, contentFormat: int) -> tuple:
+		# returns the payload and its ETag
+		with self.lock:
+			if data is not self.payloadData:
+				self.payloadData = data
+				self.payloadVersion = (self.payloadVersion + 1) & 0xFFFFFFFF
+				self.payloads = { }
+
+			entry = self.payloads.get(contentFormat)
+
+			if entry is None:
+				etag = self.payloadVersion.to_bytes(4, 'big') + contentFormat.to_bytes(2, 'big')
+				entry = (self.dataUtil.dataToPayload(data, contentFormat), etag)
+
+				self.payloads[contentFormat] = entry
+
+		return entry
+
+	def _setResponsePayload(self, request, response, data):
+		"""
+		Sets the response payload and ETag for 'data', in the format asked
+		for via the Accept option (JSON by default). If the request has the
+		same ETag, the response is 2.03 Valid, with no payload.
+
+		@param request The GET request.
+		@param response The response, with its code set.
+		@param data The data to send.
+		"""
+		contentFormat = self.dataUtil.resolveContentFormat(request.accept)
+		payload, etag = self._getPayload(data, contentFormat)
+
+		response.etag = etag
+
+		if response.code == defines.Codes.CONTENT.number and etag in request.etag:
+			response.code = defines.Codes.VALID.number
+		else:
+			response.payload = (contentFormat, payload)
+
+	def _notifyObservers(self):
+		with self.lock:
+			self.notifyTimer = None
+			self.lastNotifyTime = time.monotonic()
+			self.observe_count += 1
+			self.notifyCount += 1
+
+		# each observer's notification is rendered (from the cached payload)
+		try:
+			if self._coap_server:
+				self._coap_server.notify(self)
+		except Exception as e:
+			logging.warning("Failed to notify observers of %s: %s", self.name, str(e))
+
+	def _onDataUpdate(self) -> bool:
+		"""
+		Marks the resource changed, and notifies its observers now, or once
+		the max age has passed since the last notification.
+
+		@return bool True if a notification is sent (or scheduled); False
+		if the update is coalesced into one already scheduled.
+		"""
+		with self.lock:
+			self.changed = True
+
+			# the scheduled notification will get the latest data
+			if self.notifyTimer:
+				return False
+
+			now = time.monotonic()
+
+			if self.lastNotifyTime is not None and now - self.lastNotifyTime < self.pollCycles:
+				self.notifyTimer = threading.Timer(self.lastNotifyTime + self.pollCycles - now, self._notifyObservers)
+				self.notifyTimer.daemon = True
+				self.notifyTimer.start()
+
+				return True
+
+			# so updates arriving while this one is sent are coalesced
+			self.lastNotifyTime = now
+
+		self._notifyObservers()
+
+		return True
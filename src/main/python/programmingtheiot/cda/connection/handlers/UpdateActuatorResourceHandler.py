@@ -12,6 +12,9 @@ import logging
 from coapthon import defines
 from coapthon.resources.resource import Resource
 
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
 from programmingtheiot.common.IDataMessageListener import IDataMessageListener
 
 from programmingtheiot.data.DataUtil import DataUtil
@@ -27,21 +30,33 @@ class UpdateActuatorResourceHandler(Resource):
 	
 	"""
 
-	def __init__(self, dataMsgListener: IDataMessageListener = None):
+	def __init__(self, name: str = ConfigConst.ACTUATOR_CMD, coap_server = None, dataMsgListener: IDataMessageListener = None):
+		super(UpdateActuatorResourceHandler, self).__init__( \
+			name, coap_server, visible = True, observable = False, allow_children = True)
+		
+		self.pollCycles = \
+			ConfigUtil().getInteger( \
+				section = ConfigConst.CONSTRAINED_DEVICE, \
+				key = ConfigConst.POLL_CYCLES_KEY, \
+				defaultVal = ConfigConst.DEFAULT_POLL_CYCLES)
+		
 		self.dataMsgListener = dataMsgListener
 		self.dataUtil = DataUtil()
 		
 	def render_PUT_advanced(self, request, response):
 		if request:
 			# Check payload
-			# Check content-type (should be JSON)
-			requestPayload = request.get_payload()	
-			actuatorCmdData = self.dataUtil.jsonToActuatorData(requestPayload)
+			# Check content-type (JSON or CBOR); the response uses the same format
+			contentFormat = self.dataUtil.resolveContentFormat(request.content_type)
+			requestPayload = request.payload	
+			actuatorCmdData = self.dataUtil.payloadToActuatorData(requestPayload, contentFormat)
 			
-			response.payload = self._createResponse(response = response,data = actuatorCmdData)
+			response.payload = self._createResponse(response = response,data = actuatorCmdData, contentFormat = contentFormat)
 			response.max_age = self.pollCycles
+			
+		return self, response
 	
-	def _createResponse(self,response = None,data: ActuatorData = None) -> str:
+	def _createResponse(self,response = None,data: ActuatorData = None, contentFormat: int = None) -> tuple:
 		actuatorResponseData = self.dataMsgListener.handleActuatorCommandMessage(data)
 		
 		if not actuatorResponseData:
@@ -52,10 +67,19 @@ class UpdateActuatorResourceHandler(Resource):
 			
 			response.code = defines.Codes.PRECONDITION_FAILED.number
 		else:
+			# some listeners only return True - the command is the response
+			if not isinstance(actuatorResponseData, ActuatorData):
+				actuatorResponseData = ActuatorData()
+				actuatorResponseData.updateData(data)
+				actuatorResponseData.setAsResponse()
+				
 			response.code = defines.Codes.CHANGED.number
 			
-		jsonData = self.dataUtil.actuatorDataToJson(actuatorResponseData)
+		if contentFormat is None:
+			contentFormat = defines.Content_types["application/json"]
+			
+		payload = self.dataUtil.dataToPayload(actuatorResponseData, contentFormat)
 		
-		return (defines.Content_types["application/json"],jsonData)
+		return (contentFormat,payload)
 		
 		
\ No newline at end of file
@@ -7,8 +7,10 @@
 # Copyright (c) 2020 by Andrew D. King
 # 
 
+import hashlib
 import logging
 import math
+import os
 import numpy as calcLib
 import matplotlib.pyplot as plotLib
 
@@ -67,7 +69,9 @@ class SensorDataGenerator(object):
 	DEFAULT_HUMIDITY_CURVE = BELL_CURVE
 	DEFAULT_PRESSURE_CURVE = INVERSE_CURVE
 	
-	def __init__(self, epochOffsetSeconds: float = 0.0, useCurrentTime: bool = True, alignGeneratorToDay: bool = True):
+	DEFAULT_CHUNK_SIZE = 3600
+	
+	def __init__(self, epochOffsetSeconds: float = 0.0, useCurrentTime: bool = True, alignGeneratorToDay: bool = True, seed: int = None, cacheDir: str = None):
 		"""
 		Constructor.
 		
@@ -81,13 +85,22 @@ class SensorDataGenerator(object):
 		generator logic will be aligned to create a single sine wave for
 		a day - meaning the 24 hr start and end values will be approximately
 		the same.
+		@param seed The optional (non-negative) seed for the noise added to data sets and
+		streams. If set, each data set or stream generated by this instance produces the
+		same values on every run; if not, the noise is random.
+		@param cacheDir The optional directory to cache generated data sets in. If set,
+		a data set that's already in the cache is memory-mapped from its file instead of
+		being generated again. Data sets with random noise (no seed) aren't cached.
 		"""
 		self.epochOffsetSeconds = epochOffsetSeconds
 		self.useCurrentTime = useCurrentTime
 		self.alignGeneratorToDay = alignGeneratorToDay
 		self.dayDenominator = (1 - (calcLib.pi / 10)) + calcLib.pi
+		self.seed = seed
+		self.cacheDir = cacheDir
+		self.dataSetCount = 0
 		
-	def generateDailyEnvironmentHumidityDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_ENV_HUMIDITY, maxValue: float = MAX_ENV_HUMIDITY, useSeconds: bool = False):
+	def generateDailyEnvironmentHumidityDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_ENV_HUMIDITY, maxValue: float = MAX_ENV_HUMIDITY, useSeconds: bool = False, endHour: int = 24, useStream: bool = False):
 		"""
 		Generates a time-series data set for indoor temperature simulation over a 24-hour period.
 		
@@ -102,15 +115,18 @@ class SensorDataGenerator(object):
 		@param: useSeconds Defaults to False. If True, the data set will be generated using
 		second-level granularity; that is, one data pair for every second between
 		startHour and endHour.
+		@param: endHour Defaults to 24. The number of hours of data to generate.
+		@param: useStream Defaults to False. If True, a SensorDataStream is returned
+		instead, which computes its data in chunks as it's read (see generateSensorDataStream()).
 		@return SensorDataSet The sensor data set containing both time entries and data
 		values for those time entries.
 		"""
 		if maxValue < self.MIN_ENV_HUMIDITY or maxValue > self.MAX_ENV_HUMIDITY: maxValue = self.MAX_ENV_HUMIDITY
 		if minValue < self.MIN_ENV_HUMIDITY or minValue >= maxValue: minValue = maxValue - 1
 		
-		return self.generateDailySensorDataSet(curveType = self.DEFAULT_HUMIDITY_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = 24, useSeconds = useSeconds)
+		return self._generateDataSet(useStream, curveType = self.DEFAULT_HUMIDITY_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = endHour, useSeconds = useSeconds)
 		
-	def generateDailyEnvironmentPressureDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_ENV_PRESSURE, maxValue: float = MAX_ENV_PRESSURE, useSeconds: bool = False):
+	def generateDailyEnvironmentPressureDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_ENV_PRESSURE, maxValue: float = MAX_ENV_PRESSURE, useSeconds: bool = False, endHour: int = 24, useStream: bool = False):
 		"""
 		Generates a time-series data set for indoor temperature simulation over a 24-hour period.
 		
@@ -125,15 +141,18 @@ class SensorDataGenerator(object):
 		@param: useSeconds Defaults to False. If True, the data set will be generated using
 		second-level granularity; that is, one data pair for every second between
 		startHour and endHour.
+		@param: endHour Defaults to 24. The number of hours of data to generate.
+		@param: useStream Defaults to False. If True, a SensorDataStream is returned
+		instead, which computes its data in chunks as it's read (see generateSensorDataStream()).
 		@return SensorDataSet The sensor data set containing both time entries and data
 		values for those time entries.
 		"""
 		if maxValue < self.MIN_ENV_PRESSURE or maxValue > self.MAX_ENV_PRESSURE: maxValue = self.MAX_ENV_PRESSURE
 		if minValue < self.MIN_ENV_PRESSURE or minValue >= maxValue: minValue = maxValue - 1
 		
-		return self.generateDailySensorDataSet(curveType = self.DEFAULT_PRESSURE_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = 24, useSeconds = useSeconds)
+		return self._generateDataSet(useStream, curveType = self.DEFAULT_PRESSURE_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = endHour, useSeconds = useSeconds)
 		
-	def generateDailyIndoorTemperatureDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_INDOOR_TEMP, maxValue: float = MAX_INDOOR_TEMP, useSeconds: bool = False):
+	def generateDailyIndoorTemperatureDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_INDOOR_TEMP, maxValue: float = MAX_INDOOR_TEMP, useSeconds: bool = False, endHour: int = 24, useStream: bool = False):
 		"""
 		Generates a time-series data set for indoor temperature simulation over a 24-hour period.
 		
@@ -148,15 +167,18 @@ class SensorDataGenerator(object):
 		@param: useSeconds Defaults to False. If True, the data set will be generated using
 		second-level granularity; that is, one data pair for every second between
 		startHour and endHour.
+		@param: endHour Defaults to 24. The number of hours of data to generate.
+		@param: useStream Defaults to False. If True, a SensorDataStream is returned
+		instead, which computes its data in chunks as it's read (see generateSensorDataStream()).
 		@return SensorDataSet The sensor data set containing both time entries and data
 		values for those time entries.
 		"""
 		if maxValue < self.MIN_ENV_TEMP or maxValue > self.MAX_ENV_TEMP: maxValue = self.MAX_ENV_TEMP
 		if minValue < self.MIN_ENV_TEMP or minValue >= maxValue: minValue = maxValue - 1
 		
-		return self.generateDailySensorDataSet(curveType = self.DEFAULT_TEMP_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = 24, useSeconds = useSeconds)
+		return self._generateDataSet(useStream, curveType = self.DEFAULT_TEMP_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = endHour, useSeconds = useSeconds)
 		
-	def generateDailyMonitorTemperatureDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_MONITOR_TEMP, maxValue: float = MAX_MONITOR_TEMP, useSeconds: bool = False):
+	def generateDailyMonitorTemperatureDataSet(self, noiseLevel: int = DEFAULT_NOISE, minValue: float = MIN_MONITOR_TEMP, maxValue: float = MAX_MONITOR_TEMP, useSeconds: bool = False, endHour: int = 24, useStream: bool = False):
 		"""
 		Generates a time-series data set for indoor temperature simulation over a 24-hour period.
 		
@@ -171,13 +193,16 @@ class SensorDataGenerator(object):
 		@param: useSeconds Defaults to False. If True, the data set will be generated using
 		second-level granularity; that is, one data pair for every second between
 		startHour and endHour.
+		@param: endHour Defaults to 24. The number of hours of data to generate.
+		@param: useStream Defaults to False. If True, a SensorDataStream is returned
+		instead, which computes its data in chunks as it's read (see generateSensorDataStream()).
 		@return SensorDataSet The sensor data set containing both time entries and data
 		values for those time entries.
 		"""
 		if maxValue < self.MIN_MONITOR_TEMP or maxValue > self.MAX_MONITOR_TEMP: maxValue = self.MAX_MONITOR_TEMP
 		if minValue < self.MIN_MONITOR_TEMP or minValue >= maxValue: minValue = maxValue - 1
 		
-		return self.generateDailySensorDataSet(curveType = self.DEFAULT_TEMP_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = 24, useSeconds = useSeconds)
+		return self._generateDataSet(useStream, curveType = self.DEFAULT_TEMP_CURVE, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, startHour = 0, endHour = endHour, useSeconds = useSeconds)
 		
 	def generateDailySensorDataSet(self, curveType: int = FULL_WAVE, noiseLevel: int = DEFAULT_NOISE, minValue: float = DEFAULT_MIN_VALUE, maxValue: float = DEFAULT_MAX_VALUE, startHour: int = MIN_HOURS, endHour: int = MAX_HOURS, useSeconds = False):
 		"""
@@ -227,29 +252,26 @@ class SensorDataGenerator(object):
 		if useSeconds: totalDataPoints = totalDataPoints * 60
 		if totalDataPoints == 0: totalDataPoints = 1
 		
+		seed = self._getNextDataSetSeed()
+		
+		# only data sets that come out the same every time can be cached
+		cacheFilePath = None
+		
+		if self.cacheDir and (seed or noiseLevel == self.NO_NOISE):
+			cacheFilePath = self._getCacheFilePath( \
+				curveType, noiseLevel, minValue, maxValue, startHour, endHour, totalDataPoints, seed)
+			
+			dataSet = SensorDataSet.load(cacheFilePath, epochOffsetSeconds = self.epochOffsetSeconds, useCurrentTime = self.useCurrentTime)
+			
+			if dataSet:
+				return dataSet
+		
 		# create evenly spaced number of 'totalDataPoints' between 'startHour' and 'endHour'
 		timeEntries = calcLib.linspace(start = startHour, stop = endHour, num = totalDataPoints)
 		
 		# generate the distribution data for each point - quick ramp up curve
 		# followed by a more gradual ramp down
-		if self.alignGeneratorToDay:
-			if curveType > 0:
-				denominator = (curveType + self.dayDenominator)
-			elif curveType == 0:
-				denominator = self.dayDenominator
-			else:
-				denominator = abs(curveType) * self.dayDenominator
-				
-			dataValuesClean = calcLib.sin(timeEntries / denominator)
-		else:
-			if curveType > 0:
-				denominator = curveType
-			elif curveType == 0:
-				denominator = 1
-			else:
-				denominator = 1 / abs(curveType)
-				
-			dataValuesClean = calcLib.sin(timeEntries / denominator)
+		dataValuesClean = calcLib.sin(timeEntries / self._getCurveDenominator(curveType))
 		
 		# re-scale array with 'minValue' as floor and 'maxValue' as ceiling
 		scaledValuesClean = calcLib.interp(dataValuesClean, (dataValuesClean.min(), dataValuesClean.max()), (minValue, maxValue))
@@ -259,14 +281,12 @@ class SensorDataGenerator(object):
 		if noiseLevel != self.NO_NOISE:
 			# get the mean value, generate base10 log and calculate noise numerator
 			meanValue = calcLib.mean(scaledValuesClean)
+			noiseScale = self._getNoiseScale(noiseLevel, meanValue)
 			
-			# calc order of magnitude of mean value - this is necessary to ensure
-			# the generated noisyness aligns with the magnitude of the values
-			meanMag = int(math.log10(meanValue))
-			noiseScale = ((noiseLevel / 100) * ((10 ** meanMag) / 10))
-			noisyTemp = calcLib.random.normal(0, noiseScale, len(scaledValuesClean))
-			
-			logging.debug("Noise=%f; Noise Scale=%f; Mean Magnitude=%f" % (noiseLevel, noiseScale, meanMag))
+			if seed:
+				noisyTemp = calcLib.random.default_rng(seed).normal(0, noiseScale, len(scaledValuesClean))
+			else:
+				noisyTemp = calcLib.random.normal(0, noiseScale, len(scaledValuesClean))
 			
 			# update the data set to add in noise with clean values
 			scaledValuesNoisy = (scaledValuesClean + noisyTemp)
@@ -275,8 +295,63 @@ class SensorDataGenerator(object):
 		else:
 			dataSet.setDataEntries(scaledValuesClean)
 		
+		if cacheFilePath:
+			dataSet.save(cacheFilePath)
+		
 		return dataSet
 		
+	def generateSensorDataStream(self, curveType: int = FULL_WAVE, noiseLevel: int = DEFAULT_NOISE, minValue: float = DEFAULT_MIN_VALUE, maxValue: float = DEFAULT_MAX_VALUE, startHour: int = MIN_HOURS, endHour: int = MAX_HOURS, useSeconds = False, chunkSize: int = DEFAULT_CHUNK_SIZE):
+		"""
+		Generates a time-series data stream. This is the streaming version of
+		generateDailySensorDataSet(), using the same parameters and curve, but
+		nothing is computed up front: the returned SensorDataStream computes
+		'chunkSize' data pairs at a time as they're read, so its memory use
+		stays the same however long the simulated period is.
+		
+		As no data set is held in memory, endHour isn't limited to MAX_HOURS,
+		which allows for multi-week (or longer) simulations.
+		
+		@param curveType The type of curve to implement - FULL_WAVE, CURVE_UP, CURVE_DOWN,
+		BELL_CURVE, INVERSE_CURVE. Defaults to FULL_WAVE.
+		@param: noiseLevel Any positive integer between 0 (no noise) and 100 (max noise).
+		Defaults to DEFAULT_NOISE (some noise).
+		@param: minValue The minimum value, or floor, of the data. Defaults to DEFAULT_MIN_VALUE.
+		@param: maxValue The maximum value, or ceiling, of the data. Defaults to DEFAULT_MAX_VALUE.
+		If less than minValue, will be set to minValue.
+		@param: startHour The beginning hour. If less than MIN_HOURS, will be set to MIN_HOURS.
+		@param: endHour The ending hour. If less than startHour, will be set to startHour.
+		@param: useSeconds Defaults to False. If True, the data stream will be generated using
+		second-level granularity.
+		@param: chunkSize The number of data pairs computed at a time. Defaults to DEFAULT_CHUNK_SIZE.
+		@return SensorDataStream The sensor data stream, which can be read in the same way
+		as a SensorDataSet.
+		"""
+		return self._generateDataStream( \
+			curveType = curveType, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, \
+			startHour = startHour, endHour = endHour, useSeconds = useSeconds, chunkSize = chunkSize)
+		
+	def generateFleetSensorDataStream(self, deviceCount: int = 1, curveType: int = FULL_WAVE, noiseLevel: int = DEFAULT_NOISE, minValue: float = DEFAULT_MIN_VALUE, maxValue: float = DEFAULT_MAX_VALUE, startHour: int = MIN_HOURS, endHour: int = MAX_HOURS, useSeconds = False, chunkSize: int = DEFAULT_CHUNK_SIZE):
+		"""
+		Generates a time-series data stream for a fleet of 'deviceCount' devices.
+		This works like generateSensorDataStream(), except each chunk holds the
+		data entries of every device as a (devices, time) array. Each device's
+		curve is offset by its own random phase (of up to a day), and has its
+		own noise, so the devices don't all report the same values.
+		
+		@param deviceCount The number of devices.
+		@return FleetSensorDataStream The fleet data stream. See generateSensorDataStream()
+		for the other parameters.
+		"""
+		if deviceCount <= 0: deviceCount = 1
+		
+		# the phases are seeded separately from the noise, but in the same way
+		phaseSeed = self._getNextDataSetSeed()
+		phaseOffsets = calcLib.random.default_rng(phaseSeed).uniform(0, 24, deviceCount)
+		
+		return self._generateDataStream( \
+			curveType = curveType, noiseLevel = noiseLevel, minValue = minValue, maxValue = maxValue, \
+			startHour = startHour, endHour = endHour, useSeconds = useSeconds, chunkSize = chunkSize, phaseOffsets = phaseOffsets)
+		
 	def generateOnScreenGraph(self, dataSet = None, chartTitle: str = "Sample Data", chartXLabel: str = "X Axis", chartYLabel: str = "Y Axis"):
 		"""
 		A simple graph generator using the title info passed in
@@ -299,6 +374,88 @@ class SensorDataGenerator(object):
 		self.plotter.grid(True, which = 'both')
 		self.plotter.show()
 		
+	def _generateDataSet(self, useStream: bool = False, **kwargs):
+		if useStream:
+			return self.generateSensorDataStream(**kwargs)
+		
+		return self.generateDailySensorDataSet(**kwargs)
+		
+	def _generateDataStream(self, curveType: int, noiseLevel: int, minValue: float, maxValue: float, startHour: int, endHour: int, useSeconds: bool, chunkSize: int, phaseOffsets = None):
+		if noiseLevel < self.NO_NOISE: noiseLevel = self.NO_NOISE
+		if noiseLevel > self.MAX_NOISE: noiseLevel = self.MAX_NOISE
+		
+		if maxValue < minValue: maxValue = minValue
+		
+		if startHour < self.MIN_HOURS: startHour = self.MIN_HOURS
+		if endHour < startHour: endHour = startHour
+		
+		if chunkSize <= 0: chunkSize = self.DEFAULT_CHUNK_SIZE
+		
+		totalDataPoints = (endHour - startHour) * 60
+		
+		if useSeconds: totalDataPoints = totalDataPoints * 60
+		if totalDataPoints == 0: totalDataPoints = 1
+		
+		seed = self._getNextDataSetSeed()
+		
+		if not seed:
+			seed = [calcLib.random.SeedSequence().entropy]
+		
+		streamClass = FleetSensorDataStream if phaseOffsets is not None else SensorDataStream
+		streamParams = {'phaseOffsets': phaseOffsets} if phaseOffsets is not None else { }
+		
+		dataStream = streamClass( \
+			epochOffsetSeconds = self.epochOffsetSeconds, useCurrentTime = self.useCurrentTime, \
+			startHour = startHour, endHour = endHour, totalDataPoints = totalDataPoints, \
+			curveDenominator = self._getCurveDenominator(curveType), minValue = minValue, maxValue = maxValue, \
+			chunkSize = chunkSize, seed = seed, **streamParams)
+		
+		if noiseLevel != self.NO_NOISE:
+			dataStream.setNoiseScale(self._getNoiseScale(noiseLevel, dataStream.getMeanValue()))
+		
+		return dataStream
+		
+	def _getCacheFilePath(self, *dataSetParams) -> str:
+		# the file name is a digest of everything that determines the data set's contents
+		cacheKey = repr((self.alignGeneratorToDay,) + dataSetParams).encode('utf-8')
+		fileName = 'sensorDataSet-' + hashlib.blake2b(cacheKey, digest_size = 12).hexdigest() + '.npy'
+		
+		return os.path.join(self.cacheDir, fileName)
+		
+	def _getNextDataSetSeed(self) -> list:
+		# each data set (or stream) gets its own seed, so the data sets from
+		# one generator don't share noise
+		seed = [self.seed, self.dataSetCount] if self.seed is not None else None
+		self.dataSetCount += 1
+		
+		return seed
+		
+	def _getCurveDenominator(self, curveType: int = FULL_WAVE) -> float:
+		if self.alignGeneratorToDay:
+			if curveType > 0:
+				return (curveType + self.dayDenominator)
+			elif curveType == 0:
+				return self.dayDenominator
+			else:
+				return abs(curveType) * self.dayDenominator
+		else:
+			if curveType > 0:
+				return curveType
+			elif curveType == 0:
+				return 1
+			else:
+				return 1 / abs(curveType)
+		
+	def _getNoiseScale(self, noiseLevel: int, meanValue: float) -> float:
+		# calc order of magnitude of mean value - this is necessary to ensure
+		# the generated noisyness aligns with the magnitude of the values
+		meanMag = int(math.log10(meanValue)) if meanValue > 0 else 0
+		noiseScale = ((noiseLevel / 100) * ((10 ** meanMag) / 10))
+		
+		logging.debug("Noise=%f; Noise Scale=%f; Mean Magnitude=%f" % (noiseLevel, noiseScale, meanMag))
+		
+		return noiseScale
+		
 
 from time import time, ctime
 
@@ -409,6 +566,72 @@ class SensorDataSet():
 		"""
 		return self.dataEntries.size
 	
+	def save(self, filePath: str) -> bool:
+		"""
+		Saves the time entries and data entries to 'filePath' as a single
+		(2 x entry count) .npy file, which load() can memory-map. The file
+		is written under a temporary name and then renamed, so a reader
+		never sees a partially written file.
+		
+		@param filePath The path of the .npy file to write.
+		@return bool True on success; False otherwise.
+		"""
+		tmpFilePath = filePath + '.tmp'
+		
+		try:
+			os.makedirs(os.path.dirname(filePath) or '.', exist_ok = True)
+			
+			entries = calcLib.lib.format.open_memmap( \
+				tmpFilePath, mode = 'w+', dtype = calcLib.float64, shape = (2, self.dataEntries.size))
+			entries[0] = self.timeEntries
+			entries[1] = self.dataEntries
+			entries.flush()
+			
+			del entries
+			
+			os.replace(tmpFilePath, filePath)
+			
+			logging.info("Saved sensor data set to: " + filePath)
+			
+			return True
+		except Exception as e:
+			logging.warning("Failed to save sensor data set to %s: %s", filePath, str(e))
+			
+			if os.path.exists(tmpFilePath):
+				os.remove(tmpFilePath)
+			
+			return False
+	
+	@staticmethod
+	def load(filePath: str, epochOffsetSeconds: float = 0.0, useCurrentTime: bool = True):
+		"""
+		Loads a data set written by save(). The file is memory-mapped (read
+		only) rather than read, so the entries are paged in as they're used,
+		and nothing is copied.
+		
+		@param filePath The path of the .npy file to load.
+		@param epochOffsetSeconds See the constructor.
+		@param useCurrentTime See the constructor.
+		@return SensorDataSet The data set, or None if the file doesn't exist or is invalid.
+		"""
+		if not os.path.isfile(filePath):
+			return None
+		
+		try:
+			entries = calcLib.load(filePath, mmap_mode = 'r')
+			
+			if entries.ndim != 2 or entries.shape[0] != 2:
+				raise ValueError("Unexpected shape: " + str(entries.shape))
+		except Exception as e:
+			logging.warning("Ignoring invalid sensor data set file %s: %s", filePath, str(e))
+			return None
+		
+		logging.info("Loaded sensor data set from: " + filePath)
+		
+		return SensorDataSet( \
+			epochOffsetSeconds = epochOffsetSeconds, useCurrentTime = useCurrentTime, \
+			timeEntries = entries[0], dataEntries = entries[1])
+	
 	def setTimeEntries(self, timeEntries):
 		"""
 		Setter for time entry values.
@@ -417,8 +640,7 @@ class SensorDataSet():
 		(evenly spaced from start to end) that should correspond to dataEntries - element by element.
 		"""
 		if not timeEntries is None:
-			# data generator uses a single dimension array, so it's safe to flatten
-			self.timeEntries = timeEntries.flatten()
+			self.timeEntries = self._toFlatArray(timeEntries)
 			logging.info("timeEntries tuple. Array Size: %s  ND Size: %s  Dimensions: %s  Shape: %s  Type: %s", self.timeEntries.size, timeEntries.size, timeEntries.ndim, timeEntries.shape, timeEntries.dtype)
 		
 	def setDataEntries(self, dataEntries):
@@ -429,10 +651,341 @@ class SensorDataSet():
 		that should correspond to timeEntries - element by element.
 		"""
 		if not dataEntries is None:
-			# data generator uses a single dimension array, so it's safe to flatten
-			self.dataEntries = dataEntries.flatten()
+			self.dataEntries = self._toFlatArray(dataEntries)
 			logging.info("dataEntries tuple. Array Size: %s  ND Size: %s  Dimensions: %s  Shape: %s  Type: %s", self.dataEntries.size, dataEntries.size, dataEntries.ndim, dataEntries.shape, dataEntries.dtype)
+	
+	def _toFlatArray(self, entries):
+		# data generator uses a single dimension array, so it's safe to flatten, but
+		# there's no need to copy one that's already flat (e.g. a memory-mapped file)
+		if isinstance(entries, calcLib.ndarray) and entries.ndim == 1 and entries.flags.c_contiguous:
+			return entries
+		
+		return calcLib.ravel(entries)
+		
+class SensorDataStream(SensorDataSet):
+	"""
+	Read-only, streaming version of SensorDataSet. The time and data entries
+	are computed in fixed-size chunks when they're first read, and only the
+	most recently used chunk is kept, so memory use doesn't depend on the
+	length of the simulated period.
+	
+	The curve's floor and ceiling are found analytically (rather than by
+	scanning the whole curve), and the noise for each chunk comes from its
+	own generator seeded with the stream seed and chunk index, so a chunk
+	has the same values however often (and in whatever order) it's computed.
+	
+	Instances are created by SensorDataGenerator.generateSensorDataStream().
+	"""
+	
+	def __init__(self, epochOffsetSeconds: float = 0.0, useCurrentTime: bool = True, startHour: float = 0.0, endHour: float = 24.0, totalDataPoints: int = 1, curveDenominator: float = 1.0, minValue: float = 0.0, maxValue: float = 100.0, chunkSize: int = 3600, seed: list = None):
+		"""
+		Constructor.
+		
+		@param epochOffsetSeconds The float representing the start time - in seconds - for this data set.
+		@param useCurrentTime If True (default), the current time (since Epoch) will be used as
+		the starting time, regardless of the startTime parameter.
+		@param startHour The first time entry.
+		@param endHour The last time entry.
+		@param totalDataPoints The number of evenly spaced entries from startHour to endHour.
+		@param curveDenominator The divisor applied to each time entry before taking its sine.
+		@param minValue The floor of the (noise free) data.
+		@param maxValue The ceiling of the (noise free) data.
+		@param chunkSize The number of entries computed at a time.
+		@param seed The list of ints used to seed each chunk's noise generator.
+		"""
+		super().__init__(epochOffsetSeconds = epochOffsetSeconds, useCurrentTime = useCurrentTime)
+		
+		self.startHour = startHour
+		self.totalDataPoints = totalDataPoints
+		self.curveDenominator = curveDenominator
+		self.minValue = minValue
+		self.maxValue = maxValue
+		self.chunkSize = chunkSize
+		self.seed = list(seed) if seed else [0]
+		self.noiseScale = 0.0
+		
+		self.timeStep = (endHour - startHour) / (totalDataPoints - 1) if totalDataPoints > 1 else 0.0
+		
+		# (chunk index, time entries, data entries), replaced as a whole so readers
+		# on other threads never see a mismatched chunk
+		self.currentChunk = None
+		
+		self.curveMin, self.curveMax = self._getCurveRange()
+		
+		# a flat curve (e.g. a single entry) maps to maxValue, as numpy.interp() does
+		if self.curveMax > self.curveMin:
+			self.valueScale = (maxValue - minValue) / (self.curveMax - self.curveMin)
+			self.valueOffset = minValue
+		else:
+			self.valueScale = 0.0
+			self.valueOffset = maxValue
+		
+		logging.info("Created sensor data stream. Entries: %s  Chunk size: %s", totalDataPoints, chunkSize)
+		
+	def getChunk(self, chunkIndex: int = 0) -> tuple:
+		"""
+		Returns the time entries and data entries for chunk 'chunkIndex', computing
+		them if it's not the most recently used chunk.
+		
+		@param chunkIndex The index of the chunk (0 to getChunkCount() - 1).
+		@return tuple The time entries array and data entries array, or None if
+		'chunkIndex' is out of range.
+		"""
+		currentChunk = self.currentChunk
+		
+		if currentChunk and currentChunk[0] == chunkIndex:
+			return currentChunk[1], currentChunk[2]
+		
+		firstIndex = chunkIndex * self.chunkSize
+		lastIndex = min(firstIndex + self.chunkSize, self.totalDataPoints)
 		
+		if chunkIndex < 0 or firstIndex >= lastIndex:
+			return None
+		
+		# same calculations as SensorDataGenerator.generateDailySensorDataSet(), done
+		# in place to avoid the full-size temporaries
+		timeEntries = calcLib.arange(firstIndex, lastIndex, dtype = calcLib.float64)
+		timeEntries *= self.timeStep
+		timeEntries += self.startHour
+		
+		dataEntries = timeEntries / self.curveDenominator
+		calcLib.sin(dataEntries, out = dataEntries)
+		dataEntries -= self.curveMin
+		dataEntries *= self.valueScale
+		dataEntries += self.valueOffset
+		calcLib.clip(dataEntries, self.minValue, self.maxValue, out = dataEntries)
+		
+		if self.noiseScale > 0:
+			noiseGenerator = calcLib.random.default_rng(self.seed + [chunkIndex])
+			dataEntries += noiseGenerator.normal(0, self.noiseScale, dataEntries.size)
+		
+		self.currentChunk = (chunkIndex, timeEntries, dataEntries)
+		
+		return timeEntries, dataEntries
+	
+	def getChunkCount(self) -> int:
+		"""
+		Returns the number of chunks in this stream.
+		
+		@return int
+		"""
+		return -(-self.totalDataPoints // self.chunkSize)
+	
+	def getChunkSize(self) -> int:
+		"""
+		Returns the (maximum) number of entries in each chunk.
+		
+		@return int
+		"""
+		return self.chunkSize
+	
+	def generateChunks(self):
+		"""
+		Yields the time entries and data entries of each chunk in order.
+		"""
+		for chunkIndex in range(self.getChunkCount()):
+			yield self.getChunk(chunkIndex)
+	
+	def getTimeEntries(self):
+		"""
+		Returns all time entries as a single array. NOTE: This computes (and holds)
+		the whole data stream, so should only be used for short streams (e.g. for
+		graphing); use getChunk() or generateChunks() otherwise.
+		"""
+		return calcLib.concatenate([chunk[0] for chunk in self.generateChunks()])
+	
+	def getTimeEntry(self, index: int = 0) -> float:
+		"""
+		Returns the float value at 'index' in the time entries.
+		If index is < 0 or > getDataEntryCount() - 1, 0 will be used.
+		
+		@return float
+		"""
+		if index < 0 or index > self.totalDataPoints - 1:
+			index = 0
+		
+		chunkIndex, chunkOffset = divmod(index, self.chunkSize)
+		
+		return self.getChunk(chunkIndex)[0][chunkOffset]
+	
+	def getDataEntries(self):
+		"""
+		Returns all data entries as a single array. NOTE: This computes (and holds)
+		the whole data stream, so should only be used for short streams (e.g. for
+		graphing); use getChunk() or generateChunks() otherwise.
+		"""
+		return calcLib.concatenate([chunk[1] for chunk in self.generateChunks()])
+	
+	def getDataEntry(self, index = 0) -> float:
+		"""
+		Returns the float value at 'index' in the data entries.
+		If index is < 0 or > getDataEntryCount() - 1, 0 will be used.
+		
+		@return float
+		"""
+		if index < 0 or index > self.totalDataPoints - 1:
+			index = 0
+		
+		chunkIndex, chunkOffset = divmod(index, self.chunkSize)
+		
+		return self.getChunk(chunkIndex)[1][chunkOffset]
+	
+	def getDataEntryCount(self) -> int:
+		"""
+		Returns the number of data entries in the data stream.
+		
+		@return int
+		"""
+		return self.totalDataPoints
+	
+	def getMeanValue(self) -> float:
+		"""
+		Returns the mean of the (noise free) curve over the stream's time period.
+		
+		@return float
+		"""
+		startVal = self.startHour / self.curveDenominator
+		endVal = (self.startHour + self.timeStep * (self.totalDataPoints - 1)) / self.curveDenominator
+		
+		if endVal > startVal:
+			meanCurveVal = (math.cos(startVal) - math.cos(endVal)) / (endVal - startVal)
+		else:
+			meanCurveVal = math.sin(startVal)
+		
+		return self.valueOffset + (meanCurveVal - self.curveMin) * self.valueScale
+	
+	def setNoiseScale(self, noiseScale: float = 0.0):
+		"""
+		Sets the standard deviation of the noise added to the data entries.
+		
+		@param noiseScale The noise scale. 0 disables noise.
+		"""
+		self.noiseScale = max(0.0, noiseScale)
+		self.currentChunk = None
+	
+	def setTimeEntries(self, timeEntries):
+		if not timeEntries is None:
+			logging.warning("Sensor data stream entries can't be set. Ignoring.")
+	
+	def setDataEntries(self, dataEntries):
+		if not dataEntries is None:
+			logging.warning("Sensor data stream entries can't be set. Ignoring.")
+	
+	def _getCurveRange(self) -> tuple:
+		# the sampled curve's min and max are at the first or last entry, or
+		# at an entry either side of one of the sine's peaks or troughs, so
+		# only those entries need checking
+		lastIndex = self.totalDataPoints - 1
+		candidates = [0, lastIndex]
+		
+		if self.timeStep > 0:
+			startVal = self.startHour / self.curveDenominator
+			endVal = (self.startHour + self.timeStep * lastIndex) / self.curveDenominator
+			
+			peakIndex = math.ceil((startVal - math.pi / 2) / math.pi)
+			
+			while math.pi / 2 + peakIndex * math.pi <= endVal:
+				entryIndex = ((math.pi / 2 + peakIndex * math.pi) * self.curveDenominator - self.startHour) / self.timeStep
+				candidates.append(min(max(math.floor(entryIndex), 0), lastIndex))
+				candidates.append(min(max(math.ceil(entryIndex), 0), lastIndex))
+				peakIndex += 1
+		
+		curveVals = calcLib.sin((self.startHour + self.timeStep * calcLib.array(candidates, dtype = calcLib.float64)) / self.curveDenominator)
+		
+		return float(curveVals.min()), float(curveVals.max())
+	
+class FleetSensorDataStream(SensorDataStream):
+	"""
+	Fleet version of SensorDataStream, in which every data entry holds one
+	value per device: chunks are (devices, time) arrays, and getDataEntry()
+	returns a (devices,) array. Each device's curve is offset in time by
+	its phase offset, in hours.
+	
+	Instances are created by SensorDataGenerator.generateFleetSensorDataStream().
+	"""
+	
+	def __init__(self, phaseOffsets = None, **kwargs):
+		"""
+		Constructor.
+		
+		@param phaseOffsets The 1-D array of per-device time offsets, in hours.
+		@param kwargs The curve parameters (see SensorDataStream).
+		"""
+		self.phaseOffsets = calcLib.asarray(phaseOffsets if phaseOffsets is not None else [0.0], dtype = calcLib.float64).reshape(-1, 1)
+		
+		super().__init__(**kwargs)
+		
+	def getChunk(self, chunkIndex: int = 0) -> tuple:
+		"""
+		Returns the time entries and the (devices, time) data entries for chunk
+		'chunkIndex', computing them if it's not the most recently used chunk.
+		
+		@param chunkIndex The index of the chunk (0 to getChunkCount() - 1).
+		@return tuple The time entries array and data entries array, or None if
+		'chunkIndex' is out of range.
+		"""
+		currentChunk = self.currentChunk
+		
+		if currentChunk and currentChunk[0] == chunkIndex:
+			return currentChunk[1], currentChunk[2]
+		
+		firstIndex = chunkIndex * self.chunkSize
+		lastIndex = min(firstIndex + self.chunkSize, self.totalDataPoints)
+		
+		if chunkIndex < 0 or firstIndex >= lastIndex:
+			return None
+		
+		timeEntries = calcLib.arange(firstIndex, lastIndex, dtype = calcLib.float64)
+		timeEntries *= self.timeStep
+		timeEntries += self.startHour
+		
+		# one (devices, time) temporary, updated in place
+		dataEntries = calcLib.add(self.phaseOffsets, timeEntries)
+		dataEntries /= self.curveDenominator
+		calcLib.sin(dataEntries, out = dataEntries)
+		dataEntries -= self.curveMin
+		dataEntries *= self.valueScale
+		dataEntries += self.valueOffset
+		calcLib.clip(dataEntries, self.minValue, self.maxValue, out = dataEntries)
+		
+		if self.noiseScale > 0:
+			noiseGenerator = calcLib.random.default_rng(self.seed + [chunkIndex])
+			dataEntries += noiseGenerator.normal(0, self.noiseScale, dataEntries.shape)
+		
+		self.currentChunk = (chunkIndex, timeEntries, dataEntries)
+		
+		return timeEntries, dataEntries
+	
+	def getDataEntries(self):
+		"""
+		Returns all data entries as a single (devices, time) array. NOTE: This
+		computes (and holds) the whole data stream, so should only be used for
+		short streams; use getChunk() or generateChunks() otherwise.
+		"""
+		return calcLib.concatenate([chunk[1] for chunk in self.generateChunks()], axis = 1)
+	
+	def getDataEntry(self, index = 0):
+		"""
+		Returns every device's value at 'index' in the data entries.
+		If index is < 0 or > getDataEntryCount() - 1, 0 will be used.
+		
+		@return ndarray The (devices,) array of values.
+		"""
+		if index < 0 or index > self.totalDataPoints - 1:
+			index = 0
+		
+		chunkIndex, chunkOffset = divmod(index, self.chunkSize)
+		
+		return self.getChunk(chunkIndex)[1][:, chunkOffset]
+	
+	def getDeviceCount(self) -> int:
+		"""
+		Returns the number of devices in the fleet.
+		
+		@return int
+		"""
+		return self.phaseOffsets.shape[0]
+	
 def main():
 	"""
 	Main function definition for running as an application.
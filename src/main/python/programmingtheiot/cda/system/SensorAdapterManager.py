@@ -108,18 +108,38 @@ class SensorAdapterManager(object):
 			self.configUtil.getFloat( \
 				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.TEMP_SIM_CEILING_KEY, defaultVal = SensorDataGenerator.HI_NORMAL_INDOOR_TEMP)
 		
+		# streamed data is computed as it's used, so there's no startup cost
+		# for long (e.g. multi-week) simulations
+		useStream       = \
+			self.configUtil.getBoolean( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.ENABLE_SIM_DATA_STREAMING_KEY)
+		simDataHours    = \
+			self.configUtil.getInteger( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.SIM_DATA_HOURS_KEY, defaultVal = ConfigConst.DEFAULT_SIM_DATA_HOURS)
+		simDataSeed     = \
+			self.configUtil.getInteger( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.SIM_DATA_SEED_KEY, defaultVal = ConfigConst.DEFAULT_SIM_DATA_SEED)
+		simDataCacheDir = \
+			self.configUtil.getProperty( \
+				section = ConfigConst.CONSTRAINED_DEVICE, key = ConfigConst.SIM_DATA_CACHE_DIR_KEY)
+		
+		if simDataHours <= 0:
+			simDataHours = ConfigConst.DEFAULT_SIM_DATA_HOURS
+		
 		if not self.useEmulator:
-			self.dataGenerator = SensorDataGenerator()
+			self.dataGenerator = \
+				SensorDataGenerator( \
+					seed = simDataSeed if simDataSeed >= 0 else None, cacheDir = simDataCacheDir)
 			
 			humidityData = \
 				self.dataGenerator.generateDailyEnvironmentHumidityDataSet( \
-					minValue = humidityFloor, maxValue = humidityCeiling, useSeconds = False)
+					minValue = humidityFloor, maxValue = humidityCeiling, useSeconds = False, endHour = simDataHours, useStream = useStream)
 			pressureData = \
 				self.dataGenerator.generateDailyEnvironmentPressureDataSet( \
-					minValue = pressureFloor, maxValue = pressureCeiling, useSeconds = False)
+					minValue = pressureFloor, maxValue = pressureCeiling, useSeconds = False, endHour = simDataHours, useStream = useStream)
 			tempData     = \
 				self.dataGenerator.generateDailyIndoorTemperatureDataSet( \
-					minValue = tempFloor, maxValue = tempCeiling, useSeconds = False)
+					minValue = tempFloor, maxValue = tempCeiling, useSeconds = False, endHour = simDataHours, useStream = useStream)
 			
 			self.humidityAdapter = HumiditySensorSimTask(dataSet=humidityData)
 			self.pressureAdapter = PressureSensorSimTask(dataSet = pressureData)
@@ -26,6 +26,22 @@ DEFAULT_MQTT_PORT        = 1883
 DEFAULT_MQTT_SECURE_PORT = 8883
 DEFAULT_RTSP_STREAM_PORT = 8554
 DEFAULT_KEEP_ALIVE       = 60
+DEFAULT_MAX_INFLIGHT_MSGS = 20
+DEFAULT_MAX_INFLIGHT_REQUESTS = 128
+DEFAULT_COAP_BLOCK_SIZE  = 1024
+DEFAULT_COAP_SERVER_WORKERS = 8
+DEFAULT_COAP_SERVER_UPDATE_WORKERS = 4
+DEFAULT_COAP_SERVER_QUEUE_SIZE = 64
+DEFAULT_OUTBOX_MAX_SIZE  = 10240
+DEFAULT_OUTBOX_SYNC_BATCH_SIZE = 50
+DEFAULT_OUTBOX_SYNC_INTERVAL   = 10.0
+DEFAULT_RECONNECT_MIN_DELAY = 1.0
+DEFAULT_RECONNECT_MAX_DELAY = 120.0
+DEFAULT_DISPATCH_QUEUE_SIZE = 64
+DEFAULT_DISPATCH_OVERFLOW_POLICY = 'dropOldest'
+DEFAULT_DEDUP_WINDOW_SECS   = 60.0
+DEFAULT_CLEAN_SESSION       = True
+DEFAULT_CONNECTION_POOL_SIZE = 1
 DEFAULT_POLL_CYCLES      = 60
 DEFAULT_VAL              = 0.0
 DEFAULT_COMMAND          = 0
@@ -34,6 +50,21 @@ DEFAULT_TIMEOUT          = 5
 DEFAULT_TTL              = 300
 DEFAULT_QOS              = 0
 
+DEFAULT_UPSTREAM_QUEUE_SIZE   = 256
+DEFAULT_UPSTREAM_WORKER_COUNT = 2
+DEFAULT_UPSTREAM_RATE_LIMIT   = 1.0
+DEFAULT_UPSTREAM_BURST_SIZE   = 5
+DEFAULT_UPSTREAM_PUBLISH_TIMEOUT = 5.0
+DEFAULT_DATA_CACHE_TTL        = 0.0
+DEFAULT_TELEMETRY_BATCH_SIZE  = 12
+DEFAULT_TELEMETRY_BATCH_AGE   = 30.0
+DEFAULT_TELEMETRY_DEADBAND    = 0.0
+DEFAULT_TELEMETRY_HEARTBEAT   = 300.0
+DEFAULT_SIM_DATA_HOURS        = 24
+DEFAULT_SIM_DATA_SEED         = 0
+DEFAULT_FLEET_DEVICE_COUNT    = 100
+DEFAULT_FLEET_BATCH_SIZE      = 100
+
 # for purposes of this library, float precision is more then sufficient
 DEFAULT_LAT = DEFAULT_VAL
 DEFAULT_LON = DEFAULT_VAL
@@ -86,6 +117,8 @@ STATE_DATA_PROP  = 'stateData'
 VALUE_PROP       = 'value'
 IS_RESPONSE_PROP = 'isResponse'
 
+SENSOR_DATA_LIST_PROP = 'sensorDataList'
+
 CPU_UTIL_PROP    = 'cpuUtil'
 DISK_UTIL_PROP   = 'diskUtil'
 MEM_UTIL_PROP    = 'memUtil'
@@ -113,6 +146,7 @@ MGMT_STATUS_MSG   = 'MgmtStatusMsg'
 MGMT_STATUS_CMD   = 'MgmtStatusCmd'
 MEDIA_MSG         = 'MediaMsg'
 SENSOR_MSG        = 'SensorMsg'
+SENSOR_MSG_BATCH  = 'SensorMsgBatch'
 SYSTEM_PERF_MSG   = 'SystemPerfMsg'
 
 UPDATE_NOTIFICATIONS_MSG      = 'UpdateMsg'
@@ -144,6 +178,7 @@ LED_ACTUATOR_TYPE         = 2001
 HUMIDITY_SENSOR_TYPE      = 1010
 PRESSURE_SENSOR_TYPE      = 1012
 TEMP_SENSOR_TYPE          = 1013
+SENSOR_DATA_BATCH_TYPE    = 1099
 
 DISPLAY_DEVICE_TYPE       = 2000
 LED_DISPLAY_ACTUATOR_TYPE = 2001
@@ -187,8 +222,22 @@ CDA_MGMT_CMD_MSG_RESOURCE             = PRODUCT_NAME + '/' + CONSTRAINED_DEVICE
 CDA_MEDIA_DATA_MSG_RESOURCE           = PRODUCT_NAME + '/' + CONSTRAINED_DEVICE + '/' + MEDIA_MSG
 CDA_REGISTRATION_REQUEST_RESOURCE     = PRODUCT_NAME + '/' + CONSTRAINED_DEVICE + '/' + RESOURCE_REGISTRATION_REQUEST
 CDA_SENSOR_DATA_MSG_RESOURCE          = PRODUCT_NAME + '/' + CONSTRAINED_DEVICE + '/' + SENSOR_MSG
+CDA_SENSOR_DATA_MSG_BATCH_RESOURCE    = PRODUCT_NAME + '/' + CONSTRAINED_DEVICE + '/' + SENSOR_MSG_BATCH
 CDA_SYSTEM_PERF_MSG_RESOURCE          = PRODUCT_NAME + '/' + CONSTRAINED_DEVICE + '/' + SYSTEM_PERF_MSG
 
+#####
+# Payload content formats (CoAP Content-Format IDs)
+#
+
+CONTENT_FORMAT_JSON    = 50
+CONTENT_FORMAT_CBOR    = 60
+DEFAULT_CONTENT_FORMAT = CONTENT_FORMAT_JSON
+
+# MQTT has no content type header, so non-JSON payloads are
+# published to the resource topic with a format suffix
+# e.g., PIOT/ConstrainedDevice/SensorMsg/cbor
+CBOR_TOPIC_SUFFIX = '/cbor'
+
 #####
 # Configuration Sections, Keys and Defaults
 #
@@ -255,14 +304,54 @@ USE_WEB_ACCESS_KEY   = 'useWebAccess'
 POLL_CYCLES_KEY      = 'pollCycleSecs'
 KEEP_ALIVE_KEY       = 'keepAlive'
 DEFAULT_QOS_KEY      = 'defaultQos'
+MAX_INFLIGHT_MSGS_KEY = 'maxInflightMessages'
+ENABLE_OUTBOX_KEY     = 'enableOutbox'
+OUTBOX_DIR_KEY        = 'outboxDir'
+OUTBOX_MAX_SIZE_KEY   = 'outboxMaxSizeKB'
+OUTBOX_SYNC_BATCH_SIZE_KEY = 'outboxSyncBatchSize'
+OUTBOX_SYNC_INTERVAL_KEY   = 'outboxSyncIntervalSecs'
+RECONNECT_MIN_DELAY_KEY = 'reconnectMinDelaySecs'
+RECONNECT_MAX_DELAY_KEY = 'reconnectMaxDelaySecs'
+DISPATCH_QUEUE_SIZE_KEY = 'dispatchQueueSize'
+DISPATCH_OVERFLOW_POLICY_KEY = 'dispatchOverflowPolicy'
+DEDUP_WINDOW_KEY        = 'dedupWindowSecs'
+CLEAN_SESSION_KEY       = 'cleanSession'
+RESOURCE_QOS_KEY_PREFIX = 'qos.'
+CONNECTION_POOL_SIZE_KEY = 'connectionPoolSize'
+COAP_BLOCK_SIZE_KEY     = 'blockSize'
+COAP_SERVER_WORKERS_KEY = 'serverWorkers'
+COAP_SERVER_UPDATE_WORKERS_KEY = 'serverUpdateWorkers'
+COAP_SERVER_QUEUE_SIZE_KEY = 'serverQueueSize'
 
 ENABLE_MQTT_CLIENT_KEY = 'enableMqttClient'
 ENABLE_COAP_CLIENT_KEY = 'enableCoapClient'
+ENABLE_ASYNC_COAP_CLIENT_KEY = 'enableAsyncCoapClient'
 ENABLE_COAP_SERVER_KEY = 'enableCoapServer'
 
 ENABLE_SYSTEM_PERF_KEY = 'enableSystemPerformance'
 ENABLE_SENSING_KEY     = 'enableSensing'
 
+UPSTREAM_QUEUE_SIZE_KEY   = 'upstreamQueueSize'
+UPSTREAM_WORKER_COUNT_KEY = 'upstreamWorkerCount'
+UPSTREAM_RATE_LIMIT_KEY   = 'upstreamRateLimit'
+UPSTREAM_BURST_SIZE_KEY   = 'upstreamBurstSize'
+UPSTREAM_PUBLISH_TIMEOUT_KEY = 'upstreamPublishTimeoutSecs'
+UPSTREAM_CONTENT_FORMAT_KEY = 'upstreamContentFormat'
+DATA_CACHE_TTL_KEY        = 'dataCacheTtlSecs'
+
+ENABLE_TELEMETRY_BATCHING_KEY = 'enableTelemetryBatching'
+TELEMETRY_BATCH_SIZE_KEY      = 'telemetryBatchSize'
+TELEMETRY_BATCH_AGE_KEY       = 'telemetryBatchMaxAgeSecs'
+
+ENABLE_TELEMETRY_FILTER_KEY   = 'enableTelemetryFilter'
+TELEMETRY_HEARTBEAT_KEY       = 'telemetryHeartbeatSecs'
+HUMIDITY_DEADBAND_KEY         = 'humidityDeadband'
+HUMIDITY_HEARTBEAT_KEY        = 'humidityHeartbeatSecs'
+PRESSURE_DEADBAND_KEY         = 'pressureDeadband'
+PRESSURE_HEARTBEAT_KEY        = 'pressureHeartbeatSecs'
+TEMP_DEADBAND_KEY             = 'tempDeadband'
+TEMP_HEARTBEAT_KEY            = 'tempHeartbeatSecs'
+
 HUMIDITY_SIM_FLOOR_KEY   = 'humiditySimFloor'
 HUMIDITY_SIM_CEILING_KEY = 'humiditySimCeiling'
 PRESSURE_SIM_FLOOR_KEY   = 'pressureSimFloor'
@@ -270,6 +359,15 @@ PRESSURE_SIM_CEILING_KEY = 'pressureSimCeiling'
 TEMP_SIM_FLOOR_KEY       = 'tempSimFloor'
 TEMP_SIM_CEILING_KEY     = 'tempSimCeiling'
 
+ENABLE_SIM_DATA_STREAMING_KEY = 'enableSimDataStreaming'
+SIM_DATA_HOURS_KEY            = 'simDataHours'
+SIM_DATA_SEED_KEY             = 'simDataSeed'
+SIM_DATA_CACHE_DIR_KEY        = 'simDataCacheDir'
+
+ENABLE_FLEET_MODE_KEY  = 'enableFleetMode'
+FLEET_DEVICE_COUNT_KEY = 'fleetDeviceCount'
+FLEET_BATCH_SIZE_KEY   = 'fleetBatchSize'
+
 HANDLE_TEMP_CHANGE_ON_DEVICE_KEY = 'handleTempChangeOnDevice'
 TRIGGER_HVAC_TEMP_FLOOR_KEY   = 'triggerHvacTempFloor'
 TRIGGER_HVAC_TEMP_CEILING_KEY = 'triggerHvacTempCeiling'
@@ -0,0 +1,163 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class DataCache():
+	"""
+	Thread-safe latest-value cache for IoT data containers.
+
+	Entries are keyed by (resource, name, locationID), and the most recent
+	entry for each resource is also tracked under (resource, None, None)
+	so callers can ask for 'whatever came in last' on a resource.
+
+	The key space is split across a fixed number of lock stripes, so
+	readers (e.g. CoAP GET handlers) and writers (e.g. scheduler threads)
+	only contend when they happen to hash to the same stripe. Reads and
+	writes are O(1).
+
+	If 'ttlSecs' is greater than 0, entries older than 'ttlSecs' are
+	treated as misses and evicted on access (or via evictExpired()).
+
+	"""
+
+	DEFAULT_STRIPE_COUNT = 16
+
+	def __init__(self, ttlSecs: float = 0.0, stripeCount: int = DEFAULT_STRIPE_COUNT):
+		"""
+		Constructor.
+
+		@param ttlSecs The time-to-live for each entry in seconds. 0 (or less) disables expiry.
+		@param stripeCount The number of lock stripes to use.
+		"""
+		if stripeCount <= 0:
+			stripeCount = self.DEFAULT_STRIPE_COUNT
+
+		self.ttlSecs     = ttlSecs
+		self.stripeCount = stripeCount
+
+		self.stripes = [{} for i in range(stripeCount)]
+		self.locks   = [threading.Lock() for i in range(stripeCount)]
+
+		# counted per stripe (under its lock), and summed when read
+		self.hitCounts  = [0] * stripeCount
+		self.missCounts = [0] * stripeCount
+
+		logging.info("Created data cache: TTL = %s secs, stripes = %d", str(self.ttlSecs), self.stripeCount)
+
+	def clear(self):
+		for i in range(self.stripeCount):
+			with self.locks[i]:
+				self.stripes[i].clear()
+
+	def evictExpired(self) -> int:
+		"""
+		Removes all expired entries.
+
+		@return int The number of entries removed.
+		"""
+		if self.ttlSecs <= 0:
+			return 0
+
+		now = time.monotonic()
+		evictedCount = 0
+
+		for i in range(self.stripeCount):
+			with self.locks[i]:
+				stripe = self.stripes[i]
+				expiredKeys = [key for key, entry in stripe.items() if entry[1] <= now]
+
+				for key in expiredKeys:
+					del stripe[key]
+
+				evictedCount += len(expiredKeys)
+
+		return evictedCount
+
+	def get(self, resource: ResourceNameEnum = None, name: str = None, locationID: str = None):
+		"""
+		Returns the cached data for the given key, or None if there's no
+		(unexpired) entry. If 'name' is None, the latest entry for 'resource'
+		is returned regardless of name or location ID.
+
+		@param resource The resource the data is associated with.
+		@param name The data name (e.g. ConfigConst.TEMP_SENSOR_NAME).
+		@param locationID The location ID of the device the data belongs to.
+		@return The cached data instance, or None.
+		"""
+		if not name:
+			locationID = None
+
+		key = (resource, name, locationID)
+		index = hash(key) % self.stripeCount
+
+		with self.locks[index]:
+			entry = self.stripes[index].get(key)
+
+			if entry:
+				if entry[1] is None or entry[1] > time.monotonic():
+					self.hitCounts[index] += 1
+					return entry[0]
+
+				del self.stripes[index][key]
+
+			self.missCounts[index] += 1
+
+		return None
+
+	def getHitCount(self) -> int:
+		return sum(self.hitCounts)
+
+	def getMissCount(self) -> int:
+		return sum(self.missCounts)
+
+	def getSize(self) -> int:
+		return sum(len(stripe) for stripe in self.stripes)
+
+	def put(self, resource: ResourceNameEnum = None, data = None) -> bool:
+		"""
+		Stores 'data' as the latest value for its (resource, name, locationID)
+		key, and as the latest value for 'resource'.
+
+		@param resource The resource the data is associated with.
+		@param data The BaseIotData instance to cache.
+		@return bool True on success; False if either parameter is invalid.
+		"""
+		if not resource or not data:
+			return False
+
+		expiry = None
+
+		if self.ttlSecs > 0:
+			expiry = time.monotonic() + self.ttlSecs
+
+		entry = (data, expiry)
+
+		self._putEntry((resource, data.getName(), data.getLocationID()), entry)
+		self._putEntry((resource, None, None), entry)
+
+		return True
+
+	def remove(self, resource: ResourceNameEnum = None, name: str = None, locationID: str = None) -> bool:
+		if not name:
+			locationID = None
+
+		key = (resource, name, locationID)
+		index = hash(key) % self.stripeCount
+
+		with self.locks[index]:
+			return self.stripes[index].pop(key, None) is not None
+
+	def _putEntry(self, key, entry):
+		index = hash(key) % self.stripeCount
+
+		with self.locks[index]:
+			self.stripes[index][key] = entry
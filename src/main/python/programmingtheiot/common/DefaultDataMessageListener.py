@@ -108,8 +108,9 @@ class DefaultDataMessageListener(IDataMessageListener):
 		if data:
 			logging.info('Sensor Message: ' + str(data))
 			
-			if data.getName() in self.telemetryDataListeners:
-				self.telemetryDataListeners[data.getName()].onSensorDataUpdate(data)
+			for name in [data.getName(), None]:
+				if name in self.telemetryDataListeners:
+					self.telemetryDataListeners[name].onSensorDataUpdate(data)
 			
 		return True
 	
@@ -141,7 +142,7 @@ class DefaultDataMessageListener(IDataMessageListener):
 	def setTelemetryDataListener(self, name: str = None, listener: ITelemetryDataListener = None):
 		"""
 		Sets the named telemetry data listener. The listener's callback function will be invoked
-		when telemetry data is available for the given name.
+		when telemetry data is available for the given name (or for any name, if None).
 		
 		@param name The name of the listener.
 		@param listener The listener reference.
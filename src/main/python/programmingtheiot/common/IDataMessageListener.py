@@ -109,7 +109,7 @@ class IDataMessageListener():
 	def setTelemetryDataListener(self, name: str = None, listener: ITelemetryDataListener = None):
 		"""
 		Sets the named telemetry data listener. The listener's callback function will be invoked
-		when telemetry data is available for the given name.
+		when telemetry data is available for the given name (or for any name, if None).
 		
 		@param name The name of the listener.
 		@param listener The listener reference.
@@ -0,0 +1,115 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import threading
+import time
+
+class TokenBucket():
+	"""
+	Simple thread-safe token bucket rate limiter.
+
+	Tokens are replenished continuously at 'rate' tokens per second, up
+	to a maximum of 'capacity' tokens (the burst size). A rate of 0 (or
+	less) disables rate limiting, and every acquire call succeeds immediately.
+
+	"""
+
+	def __init__(self, rate: float = 1.0, capacity: float = 1.0):
+		"""
+		Constructor.
+
+		@param rate The number of tokens added to the bucket per second.
+		@param capacity The maximum number of tokens the bucket can hold.
+		"""
+		self.rate     = float(rate)
+		self.capacity = max(float(capacity), 1.0)
+		self.tokens   = self.capacity
+		self.lastTime = time.monotonic()
+
+		self.lock = threading.Lock()
+
+	def getCapacity(self) -> float:
+		return self.capacity
+
+	def getRate(self) -> float:
+		return self.rate
+
+	def isUnlimited(self) -> bool:
+		return self.rate <= 0.0
+
+	def tryAcquire(self, tokens: float = 1.0) -> bool:
+		"""
+		Attempts to remove 'tokens' from the bucket without blocking.
+
+		@param tokens The number of tokens to remove.
+		@return bool True if the tokens were available; False otherwise.
+		"""
+		return self._reserve(tokens) == 0.0
+
+	def getWaitTime(self, tokens: float = 1.0) -> float:
+		"""
+		Returns the estimated time until 'tokens' will be available,
+		without removing any.
+
+		@param tokens The number of tokens needed.
+		@return float 0.0 if available now; otherwise, the seconds to wait.
+		"""
+		if self.isUnlimited():
+			return 0.0
+
+		with self.lock:
+			available = min(self.capacity, self.tokens + (time.monotonic() - self.lastTime) * self.rate)
+
+			return max(0.0, (tokens - available) / self.rate)
+
+	def acquire(self, tokens: float = 1.0, timeout: float = None) -> bool:
+		"""
+		Removes 'tokens' from the bucket, blocking the calling thread
+		until they're available or 'timeout' seconds have elapsed.
+
+		@param tokens The number of tokens to remove.
+		@param timeout The max time to wait in seconds. None means wait forever.
+		@return bool True if the tokens were acquired; False on timeout.
+		"""
+		deadline = None if timeout is None else time.monotonic() + timeout
+
+		while True:
+			waitTime = self._reserve(tokens)
+
+			if waitTime == 0.0:
+				return True
+
+			if deadline is not None:
+				remaining = deadline - time.monotonic()
+
+				if remaining <= 0.0:
+					return False
+
+				waitTime = min(waitTime, remaining)
+
+			time.sleep(waitTime)
+
+	def _reserve(self, tokens: float) -> float:
+		"""
+		Refills the bucket and removes 'tokens' if available.
+
+		@return float 0.0 on success; otherwise, the estimated seconds
+		until enough tokens will be available.
+		"""
+		if self.isUnlimited():
+			return 0.0
+
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.capacity, self.tokens + (now - self.lastTime) * self.rate)
+			self.lastTime = now
+
+			if self.tokens >= tokens:
+				self.tokens -= tokens
+				return 0.0
+
+			return (tokens - self.tokens) / self.rate
@@ -7,6 +7,8 @@
 # Copyright (c) 2020 by Andrew D. King
 # 
 
+import time
+
 from datetime import datetime, timezone
 
 import programmingtheiot.common.ConfigConst as ConfigConst
@@ -21,8 +23,23 @@ class BaseIotData(object):
 	
 	Sub-classes add parameters and accessors specific to their needs.
 	
+	All containers use __slots__ (sub-classes declare their own) to keep
+	per-instance memory and allocation cost down, as many short-lived
+	instances are created on the sensing and actuation paths.
+	
 	"""
 
+	# the time stamp is held as raw wall clock and monotonic times, and only
+	# formatted (once) when read - see the 'timeStamp' property below
+	__slots__ = ( \
+		'_timeStamp', '_timeStampSecs', '_timeStampMonotonic', \
+		'hasError', 'name', 'typeID', 'statusCode', \
+		'latitude', 'longitude', 'elevation', 'locationID')
+	
+	# the location ID never changes at runtime, so it's read from
+	# the configuration file once and shared by all instances
+	_locationID = ConfigConst.NOT_SET
+	
 	def __init__(self, name = ConfigConst.NOT_SET, typeID = ConfigConst.DEFAULT_TYPE_ID, d = None):
 		"""
 		Constructor.
@@ -61,8 +78,8 @@ class BaseIotData(object):
 		if not self.name:
 			self.name = ConfigConst.NOT_SET
 			
-		# always pull location ID from configuration file
-		self.locationID = ConfigUtil().getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY)
+		# always pull location ID from configuration file (resolved once per process)
+		self.locationID = BaseIotData._getConfiguredLocationID()
 		
 	def getElevation(self) -> float:
 		"""
@@ -112,14 +129,40 @@ class BaseIotData(object):
 		"""
 		return self.statusCode
 	
+	def getMonotonicTimeStamp(self) -> float:
+		"""
+		Returns the monotonic clock time (in seconds) captured along with
+		the time stamp, which is suitable for measuring the data's age.
+		
+		@return The monotonic time as a float, or None if the time stamp
+		was set from an incoming message.
+		"""
+		return self._timeStampMonotonic
+	
 	def getTimeStamp(self) -> str:
 		"""
 		Returns the time stamp in ISO 8601 format, as follows:
 		%Y%m%dT%H:%M:%S%z
 		
+		The string is built on first use after each update, then reused.
+		
 		@return The time stamp as a string.
 		"""
-		return self.timeStamp
+		if self._timeStamp is None:
+			self._timeStamp = datetime.fromtimestamp(self._timeStampSecs, timezone.utc).isoformat()
+			
+		return self._timeStamp
+	
+	@property
+	def timeStamp(self) -> str:
+		return self.getTimeStamp()
+	
+	@timeStamp.setter
+	def timeStamp(self, timeStamp: str):
+		# used when decoding a message, which only carries the formatted string
+		self._timeStamp = timeStamp
+		self._timeStampSecs = None
+		self._timeStampMonotonic = None
 	
 	def getTypeID(self) -> int:
 		"""
@@ -235,8 +278,13 @@ class BaseIotData(object):
 		NOTE: the '+00:00' is the offset from GMT, and can be replaced
 		with 'Z' if desired. In testing, the format above is
 		compatible with the GDA's parsing logic.
+		
+		NOTE: only the raw times are captured here; the string itself is
+		built by getTimeStamp() (or on serialization) when first needed.
 		"""
-		self.timeStamp = str(datetime.now(timezone.utc).isoformat())
+		self._timeStamp = None
+		self._timeStampSecs = time.time()
+		self._timeStampMonotonic = time.monotonic()
 	
 	def __str__(self):
 		"""
@@ -255,6 +303,14 @@ class BaseIotData(object):
 			ConfigConst.LATITUDE_PROP, self.latitude,
 			ConfigConst.LONGITUDE_PROP, self.longitude)
 			
+	@staticmethod
+	def _getConfiguredLocationID() -> str:
+		if BaseIotData._locationID is ConfigConst.NOT_SET:
+			BaseIotData._locationID = \
+				ConfigUtil().getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY)
+			
+		return BaseIotData._locationID
+	
 	def _handleUpdateData(self, data):
 		"""
 		Template method definition to update sub-class data.
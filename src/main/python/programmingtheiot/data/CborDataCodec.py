@@ -0,0 +1,334 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import numbers
+import struct
+
+try:
+	# optional accelerator (C extension); without it the built-in encoder / decoder is used
+	import cbor2
+except ImportError:
+	cbor2 = None
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.data.IDataCodec import IDataCodec
+
+FLOAT16 = struct.Struct('>e')
+FLOAT32 = struct.Struct('>f')
+FLOAT64 = struct.Struct('>d')
+UINT16  = struct.Struct('>H')
+UINT32  = struct.Struct('>I')
+UINT64  = struct.Struct('>Q')
+
+SIMPLE_VALUES = {0xf4: False, 0xf5: True, 0xf6: None}
+
+class CborDataCodec(IDataCodec):
+	"""
+	Compact binary codec (Content-Format 60), using CBOR (RFC 8949).
+
+	The field names of the IoT data containers are sent as small integer
+	map keys (their index in FIELD_KEYS, so one byte each) instead of
+	text; any other key is sent as-is (so integer keys below 24 are
+	reserved). Floats use the shortest of single or double precision
+	that holds the value exactly.
+
+	If the 'cbor2' package is installed it's used for both encoding and
+	decoding (unless 'useCbor2' is False). Otherwise, a built-in
+	implementation of the subset of CBOR the containers need (maps,
+	arrays, text and byte strings, integers, floats, booleans and null)
+	is used. Both read any standard CBOR, and encode the same bytes.
+
+	"""
+
+	# wire key for each field name is its index, so only ever append to this
+	FIELD_KEYS = ( \
+		ConfigConst.TIMESTAMP_PROP, ConfigConst.HAS_ERROR_PROP, ConfigConst.NAME_PROP, \
+		ConfigConst.TYPE_ID_PROP, ConfigConst.STATUS_CODE_PROP, ConfigConst.LATITUDE_PROP, \
+		ConfigConst.LONGITUDE_PROP, ConfigConst.ELEVATION_PROP, ConfigConst.LOCATION_ID_PROP, \
+		ConfigConst.VALUE_PROP, ConfigConst.COMMAND_PROP, ConfigConst.STATE_DATA_PROP, \
+		ConfigConst.IS_RESPONSE_PROP, ConfigConst.CPU_UTIL_PROP, ConfigConst.MEM_UTIL_PROP, \
+		ConfigConst.DISK_UTIL_PROP, ConfigConst.SENSOR_DATA_LIST_PROP, ConfigConst.DEVICE_ID_PROP, \
+		ConfigConst.TYPE_CATEGORY_ID_PROP)
+
+	def __init__(self, useCbor2: bool = True):
+		self.cbor2    = cbor2 if useCbor2 else None
+		self.keyIDs   = {name: keyID for keyID, name in enumerate(self.FIELD_KEYS)}
+		self.keyNames = dict(enumerate(self.FIELD_KEYS))
+
+		# cbor2 always sends floats in double precision, so it's given the built-in float encoding
+		self.cbor2Encoders = {float: self._writeFloat}
+
+		# by exact type; sub-classes (e.g. numpy scalars) take the slower path in _encodeItem()
+		self.encoders = { \
+			type(None): self._encodeSimple, \
+			bool: self._encodeSimple, \
+			int: self._encodeInt, \
+			float: self._encodeFloat, \
+			str: self._encodeText, \
+			bytes: self._encodeBytes, \
+			bytearray: self._encodeBytes, \
+			list: self._encodeArray, \
+			tuple: self._encodeArray, \
+			dict: self._encodeMap}
+
+	def decode(self, payload) -> dict:
+		if isinstance(payload, str):
+			payload = payload.encode('latin-1')
+
+		if self.cbor2:
+			return self._mapKeys(self.cbor2.loads(payload), self.keyNames)
+
+		obj, pos = self._decodeItem(bytes(payload), 0)
+
+		if pos != len(payload):
+			raise ValueError("Trailing bytes in CBOR payload: " + str(len(payload) - pos))
+
+		return obj
+
+	def encode(self, dataStruct: dict = None) -> bytes:
+		if self.cbor2:
+			return self.cbor2.dumps( \
+				self._mapKeys(dataStruct, self.keyIDs), encoders = self.cbor2Encoders, default = self._encodeNumber)
+
+		buf = bytearray()
+		self._encodeItem(dataStruct, buf)
+
+		return bytes(buf)
+
+	def getContentFormat(self) -> int:
+		return ConfigConst.CONTENT_FORMAT_CBOR
+
+	def getTopicSuffix(self) -> str:
+		return ConfigConst.CBOR_TOPIC_SUFFIX
+
+	def _mapKeys(self, obj, keyMap: dict):
+		# converts map keys found in 'keyMap' (both ways), for the cbor2 path
+		if isinstance(obj, dict):
+			return {keyMap.get(key, key): self._mapKeys(val, keyMap) for key, val in obj.items()}
+
+		if isinstance(obj, list):
+			return [self._mapKeys(item, keyMap) for item in obj]
+
+		return obj
+
+	def _encodeNumber(self, encoder, obj):
+		# cbor2's fallback for types it doesn't know, e.g. numpy scalars from the simulators
+		if isinstance(obj, numbers.Integral):
+			encoder.encode(int(obj))
+		elif isinstance(obj, numbers.Real):
+			encoder.encode(float(obj))
+		else:
+			raise TypeError("Can't encode type as CBOR: " + type(obj).__name__)
+
+	def _writeFloat(self, encoder, obj: float):
+		# cbor2's encoder for floats
+		buf = bytearray()
+		self._encodeFloat(obj, buf)
+
+		encoder.write(bytes(buf))
+
+	def _encodeHead(self, majorType: int, val: int, buf: bytearray):
+		majorType <<= 5
+
+		if val < 24:
+			buf.append(majorType | val)
+		elif val < 0x100:
+			buf.append(majorType | 24)
+			buf.append(val)
+		elif val < 0x10000:
+			buf.append(majorType | 25)
+			buf += UINT16.pack(val)
+		elif val < 0x100000000:
+			buf.append(majorType | 26)
+			buf += UINT32.pack(val)
+		else:
+			buf.append(majorType | 27)
+			buf += UINT64.pack(val)
+
+	def _encodeItem(self, obj, buf: bytearray):
+		encodeFunc = self.encoders.get(type(obj))
+
+		if encodeFunc:
+			encodeFunc(obj, buf)
+		elif isinstance(obj, numbers.Integral):
+			self._encodeInt(int(obj), buf)
+		elif isinstance(obj, numbers.Real):
+			self._encodeFloat(float(obj), buf)
+		elif isinstance(obj, str):
+			self._encodeText(str(obj), buf)
+		elif isinstance(obj, dict):
+			self._encodeMap(obj, buf)
+		elif isinstance(obj, (list, tuple)):
+			self._encodeArray(obj, buf)
+		else:
+			raise TypeError("Can't encode type as CBOR: " + type(obj).__name__)
+
+	def _encodeSimple(self, obj, buf: bytearray):
+		buf.append(0xf6 if obj is None else 0xf5 if obj else 0xf4)
+
+	def _encodeInt(self, obj: int, buf: bytearray):
+		if 0 <= obj < 24:
+			buf.append(obj)
+		elif obj >= 0:
+			self._encodeHead(0, obj, buf)
+		else:
+			self._encodeHead(1, -1 - obj, buf)
+
+	def _encodeFloat(self, obj: float, buf: bytearray):
+		try:
+			packed = FLOAT32.pack(obj)
+
+			# NaN never equals itself, but is the same in either precision
+			if FLOAT32.unpack(packed)[0] == obj or obj != obj:
+				buf.append(0xfa)
+				buf += packed
+
+				return
+		except OverflowError:
+			pass
+
+		buf.append(0xfb)
+		buf += FLOAT64.pack(obj)
+
+	def _encodeText(self, obj: str, buf: bytearray):
+		encoded = obj.encode('utf-8')
+
+		if len(encoded) < 24:
+			buf.append(0x60 | len(encoded))
+		else:
+			self._encodeHead(3, len(encoded), buf)
+
+		buf += encoded
+
+	def _encodeBytes(self, obj, buf: bytearray):
+		self._encodeHead(2, len(obj), buf)
+		buf += obj
+
+	def _encodeArray(self, obj, buf: bytearray):
+		self._encodeHead(4, len(obj), buf)
+
+		for item in obj:
+			self._encodeItem(item, buf)
+
+	def _encodeMap(self, obj: dict, buf: bytearray):
+		self._encodeHead(5, len(obj), buf)
+
+		keyIDs = self.keyIDs
+		encoders = self.encoders
+
+		for key, val in obj.items():
+			keyID = keyIDs.get(key)
+
+			if keyID is None:
+				self._encodeItem(key, buf)
+			else:
+				buf.append(keyID)
+
+			encodeFunc = encoders.get(type(val))
+
+			if encodeFunc:
+				encodeFunc(val, buf)
+			else:
+				self._encodeItem(val, buf)
+
+	def _decodeItem(self, payload: bytes, pos: int):
+		initialByte = payload[pos]
+		majorType = initialByte >> 5
+		info = initialByte & 0x1f
+		pos += 1
+
+		if majorType == 7:
+			if info == 20:
+				return False, pos
+			elif info == 21:
+				return True, pos
+			elif info == 22 or info == 23:
+				return None, pos
+			elif info == 25:
+				return FLOAT16.unpack_from(payload, pos)[0], pos + 2
+			elif info == 26:
+				return FLOAT32.unpack_from(payload, pos)[0], pos + 4
+			elif info == 27:
+				return FLOAT64.unpack_from(payload, pos)[0], pos + 8
+
+			raise ValueError("Unsupported CBOR simple value: " + str(info))
+
+		if info < 24:
+			val = info
+		elif info == 24:
+			val = payload[pos]
+			pos += 1
+		elif info == 25:
+			val = UINT16.unpack_from(payload, pos)[0]
+			pos += 2
+		elif info == 26:
+			val = UINT32.unpack_from(payload, pos)[0]
+			pos += 4
+		elif info == 27:
+			val = UINT64.unpack_from(payload, pos)[0]
+			pos += 8
+		else:
+			raise ValueError("Unsupported CBOR additional info: " + str(info))
+
+		if majorType == 0:
+			return val, pos
+		elif majorType == 1:
+			return -1 - val, pos
+		elif majorType == 2:
+			return bytes(payload[pos:pos + val]), pos + val
+		elif majorType == 3:
+			return payload[pos:pos + val].decode('utf-8'), pos + val
+		elif majorType == 4:
+			items = []
+
+			for i in range(val):
+				item, pos = self._decodeItem(payload, pos)
+				items.append(item)
+
+			return items, pos
+		elif majorType == 5:
+			items = {}
+			keyNames = self.keyNames
+
+			for i in range(val):
+				keyByte = payload[pos]
+
+				# field name keys are always a single byte (an int < 24)
+				if keyByte < 24:
+					key = keyNames.get(keyByte, keyByte)
+					pos += 1
+				else:
+					key, pos = self._decodeItem(payload, pos)
+
+				# ... and most values are single precision floats, text, small ints or simple values
+				valByte = payload[pos]
+
+				if valByte == 0xfa:
+					items[key] = FLOAT32.unpack_from(payload, pos + 1)[0]
+					pos += 5
+				elif 0x60 <= valByte < 0x78:
+					end = pos + valByte - 0x5f
+					items[key] = payload[pos + 1:end].decode('utf-8')
+					pos = end
+				elif valByte == 0x78:
+					end = pos + 2 + payload[pos + 1]
+					items[key] = payload[pos + 2:end].decode('utf-8')
+					pos = end
+				elif valByte < 24:
+					items[key] = valByte
+					pos += 1
+				elif valByte in SIMPLE_VALUES:
+					items[key] = SIMPLE_VALUES[valByte]
+					pos += 1
+				else:
+					items[key], pos = self._decodeItem(payload, pos)
+
+			return items, pos
+
+		# major type 6 (tags) isn't used by the data containers
+		raise ValueError("Unsupported CBOR major type: " + str(majorType))
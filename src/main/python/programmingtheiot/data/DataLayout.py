@@ -0,0 +1,126 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import operator
+import threading
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+class DataLayout():
+	"""
+	Precomputed field layout for an IoT data container class (e.g.
+	SensorData), used by DataUtil to convert between instances and
+	plain dicts without walking the instance dict or checking each key.
+
+	The field names are the class's public properties and __slots__
+	(base class first, plus any instance dict entries for sub-classes
+	that don't use slots), and their default values are taken once from
+	a default-constructed prototype, so the wire field names are exactly
+	the attribute names. Private ('_' prefixed) slots are not fields.
+	The time stamp has no default: an instance decoded without one gets
+	the current time, as a constructed one would.
+
+	fromDict() sets each field from a precomputed list of (name, default)
+	pairs, so decoding is one dict lookup and one attribute store per
+	field, without running the class constructor.
+
+	Use getLayout() to retrieve the shared layout for a class.
+
+	"""
+
+	_layouts = { }
+	_lock = threading.Lock()
+
+	@classmethod
+	def getLayout(cls, dataClass):
+		"""
+		Returns the shared layout for 'dataClass', building it on first use.
+
+		@param dataClass The BaseIotData sub-class.
+		@return DataLayout
+		"""
+		layout = cls._layouts.get(dataClass)
+
+		if not layout:
+			with cls._lock:
+				layout = cls._layouts.get(dataClass)
+
+				if not layout:
+					layout = DataLayout(dataClass)
+					cls._layouts[dataClass] = layout
+
+		return layout
+
+	def __init__(self, dataClass):
+		prototype = dataClass()
+
+		self.dataClass     = dataClass
+		self.fieldNames    = self._getFieldNames(prototype)
+		self.fieldDefaults = { \
+			name: getattr(prototype, name) for name in self.fieldNames if name != ConfigConst.TIMESTAMP_PROP}
+
+		self._getFieldValues = operator.attrgetter(*self.fieldNames)
+		self._fieldItems     = tuple(self.fieldDefaults.items())
+		self._hasTimeStamp   = ConfigConst.TIMESTAMP_PROP in self.fieldNames
+
+	def fromDict(self, dataStruct: dict):
+		"""
+		Creates a new instance from 'dataStruct' without running the
+		class constructor. Fields missing from 'dataStruct' get their
+		default values, and keys not in the layout are ignored.
+
+		@param dataStruct The dict to convert.
+		@return A new instance of the layout's data class.
+		"""
+		data = self.dataClass.__new__(self.dataClass)
+
+		# slots are stored directly; properties go through their setters
+		try:
+			for name in self.fieldNames:
+				setattr(data, name, dataStruct[name])
+		except KeyError:
+			# missing fields (i.e. not encoded by DataUtil) get their defaults
+			get = dataStruct.get
+
+			for name, default in self._fieldItems:
+				setattr(data, name, get(name, default))
+
+			if self._hasTimeStamp:
+				timeStamp = get(ConfigConst.TIMESTAMP_PROP)
+
+				if timeStamp is None:
+					data.updateTimeStamp()
+				else:
+					data.timeStamp = timeStamp
+
+		return data
+
+	def toDict(self, data) -> dict:
+		"""
+		Returns the layout's fields of 'data' as a new dict.
+
+		@param data The instance to convert.
+		@return dict
+		"""
+		return dict(zip(self.fieldNames, self._getFieldValues(data)))
+
+	def _getFieldNames(self, prototype) -> tuple:
+		fieldNames = []
+
+		for cls in reversed(type(prototype).__mro__):
+			names = [name for name, attr in cls.__dict__.items() if isinstance(attr, property)]
+			names.extend(cls.__dict__.get('__slots__', ()))
+
+			for name in names:
+				if name not in fieldNames and not name.startswith('_'):
+					fieldNames.append(name)
+
+		for name in getattr(prototype, '__dict__', { }):
+			if name not in fieldNames:
+				fieldNames.append(name)
+
+		return tuple(fieldNames)
@@ -15,49 +15,201 @@ import logging
 from decimal import Decimal
 from json import JSONEncoder
 
+import programmingtheiot.common.ConfigConst as ConfigConst
+
 from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.CborDataCodec import CborDataCodec
+from programmingtheiot.data.DataLayout import DataLayout
+from programmingtheiot.data.IDataCodec import IDataCodec
+from programmingtheiot.data.JsonDataCodec import JsonDataCodec
 from programmingtheiot.data.SensorData import SensorData
+from programmingtheiot.data.SensorDataBatch import SensorDataBatch
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
 
 class DataUtil():
-	def __init__(self, encodeToUtf8 = False):
+	def __init__(self, encodeToUtf8 = False, contentFormat: int = ConfigConst.DEFAULT_CONTENT_FORMAT):
 		self.encodeToUtf8 = encodeToUtf8
 		
+		# codecs used by the payload conversion methods, keyed by content format
+		self.codecs = { }
+		self.addCodec(JsonDataCodec(encodeToUtf8 = encodeToUtf8))
+		self.addCodec(CborDataCodec())
+		
+		if contentFormat not in self.codecs:
+			logging.warning("Unsupported content format %s. Using default.", str(contentFormat))
+			contentFormat = ConfigConst.DEFAULT_CONTENT_FORMAT
+			
+		self.contentFormat = contentFormat
+		
+		# precomputed field layouts for the fixed-schema data containers
+		self.layouts = { }
+		
+		for dataClass in (ActuatorData, SensorData, SystemPerformanceData):
+			self.layouts[dataClass] = DataLayout.getLayout(dataClass)
+		
 		logging.info("Created DataUtil instance.")
 		
-	# convert JSON to an Data instance
-	# Replace each quote with single quote, and any boolean with an upper case name to lower case.
-	def _formatDataAndLoadDictionary(self, jsonData: str, useDecForFloat: bool = False) -> dict:
-		jsonData = jsonData.replace("\'", "\"").replace('False', 'false').replace('True', 'true')
+	def addCodec(self, codec: IDataCodec = None) -> bool:
+		"""
+		Registers 'codec' for use by the payload conversion methods,
+		replacing any codec already registered for its content format.
+		
+		@param codec The IDataCodec instance to register.
+		@return bool True on success; False if 'codec' is invalid.
+		"""
+		if not codec:
+			return False
+		
+		self.codecs[codec.getContentFormat()] = codec
+		
+		return True
+	
+	def getCodec(self, contentFormat: int = None) -> IDataCodec:
+		"""
+		Returns the codec for 'contentFormat', or this instance's default
+		codec if 'contentFormat' is None.
+		
+		@param contentFormat The CoAP Content-Format ID (e.g. ConfigConst.CONTENT_FORMAT_CBOR).
+		@return IDataCodec The codec, or None if the format isn't supported.
+		"""
+		if contentFormat is None:
+			contentFormat = self.contentFormat
+			
+		return self.codecs.get(contentFormat)
+	
+	def getContentFormat(self) -> int:
+		return self.contentFormat
+	
+	def resolveContentFormat(self, contentFormat: int = None) -> int:
+		"""
+		Returns 'contentFormat' if there's a codec registered for it, or
+		JSON otherwise (e.g. a CoAP message with no Content-Format option
+		reports 0, which is treated as JSON).
+		
+		@param contentFormat The CoAP Content-Format ID from the message.
+		@return int
+		"""
+		if contentFormat in self.codecs:
+			return contentFormat
+		
+		return ConfigConst.CONTENT_FORMAT_JSON
+	
+	def dataToPayload(self, data = None, contentFormat: int = None):
+		"""
+		Encodes 'data' (any IoT data container, including SensorDataBatch)
+		using the codec for 'contentFormat' (or the default codec).
+		
+		@param data The BaseIotData instance to encode.
+		@param contentFormat The CoAP Content-Format ID to encode with.
+		@return The encoded payload (str or bytes), or None on failure.
+		"""
+		if not data:
+			logging.debug("Data is null. Returning null.")
+			return None
+		
+		codec = self.getCodec(contentFormat)
+		
+		if not codec:
+			logging.warning("Unsupported content format %s. Returning null.", str(contentFormat))
+			return None
+		
+		return codec.encode(self._toDataStruct(data))
+	
+	def payloadToActuatorData(self, payload = None, contentFormat: int = None) -> ActuatorData:
+		dataStruct = self._decodePayload(payload, contentFormat)
+		
+		if dataStruct is None:
+			return None
+		
+		return self.layouts[ActuatorData].fromDict(dataStruct)
+	
+	def payloadToSensorData(self, payload = None, contentFormat: int = None) -> SensorData:
+		dataStruct = self._decodePayload(payload, contentFormat)
+		
+		if dataStruct is None:
+			return None
+		
+		return self.layouts[SensorData].fromDict(dataStruct)
+	
+	def payloadToSensorDataBatch(self, payload = None, contentFormat: int = None) -> SensorDataBatch:
+		dataStruct = self._decodePayload(payload, contentFormat)
+		
+		if dataStruct is None:
+			return None
+		
+		return self._structToSensorDataBatch(dataStruct)
+	
+	def payloadToSystemPerformanceData(self, payload = None, contentFormat: int = None) -> SystemPerformanceData:
+		dataStruct = self._decodePayload(payload, contentFormat)
 		
+		if dataStruct is None:
+			return None
+		
+		return self.layouts[SystemPerformanceData].fromDict(dataStruct)
+	
+	def _decodePayload(self, payload = None, contentFormat: int = None) -> dict:
+		if not payload:
+			logging.warning("Payload is empty or null. Returning null.")
+			return None
+		
+		codec = self.getCodec(contentFormat)
+		
+		if not codec:
+			logging.warning("Unsupported content format %s. Returning null.", str(contentFormat))
+			return None
+		
+		return codec.decode(payload)
+	
+	def _structToSensorDataBatch(self, dataStruct: dict) -> SensorDataBatch:
+		sensorDataList = dataStruct.pop(ConfigConst.SENSOR_DATA_LIST_PROP, [])
+		
+		batch = SensorDataBatch()
+		self._updateIotData(dataStruct, batch)
+		
+		sensorDataLayout = self.layouts[SensorData]
+		
+		for sensorDataStruct in sensorDataList:
+			batch.addSensorData(sensorDataLayout.fromDict(sensorDataStruct))
+		
+		return batch
+	
+	def _toDataStruct(self, data) -> dict:
+		layout = self.layouts.get(type(data))
+		
+		if layout:
+			return layout.toDict(data)
+		
+		dataStruct = DataLayout.getLayout(type(data)).toDict(data)
+		
+		if isinstance(data, SensorDataBatch):
+			sensorDataLayout = self.layouts[SensorData]
+			dataStruct[ConfigConst.SENSOR_DATA_LIST_PROP] = [sensorDataLayout.toDict(sd) for sd in data.getSensorDataList()]
+			
+		return dataStruct
+		
+	# convert JSON to a dict
+	# the JSON is expected to be valid (as generated by the GDA or this class), so no
+	# quote or boolean rewriting is done beforehand
+	def _formatDataAndLoadDictionary(self, jsonData: str, useDecForFloat: bool = False) -> dict:
 		jsonStruct = None
 		
 		# Load the dictionary data for the JSON string
 		if useDecForFloat:
 			jsonStruct = json.loads(jsonData, parse_float = Decimal)
 		else:
-			jsonStruct = json.loads(jsonData)
+			jsonStruct = self.codecs[ConfigConst.CONTENT_FORMAT_JSON].decode(jsonData)
 		
 		return jsonStruct
 		
-	# To convert Data to JSON, do the following:
+	# convert Data to compact JSON via its field layout and the JSON codec's
+	# precompiled (C-accelerated) encoder; the output is valid JSON as-is
 	def _generateJsonData(self, obj, useDecForFloat: bool = False) -> str:
-		jsonData = None
-		
-		if self.encodeToUtf8:
-			jsonData = json.dumps(obj, cls = JsonDataEncoder).encode('utf8')
-		else:
-			jsonData = json.dumps(obj, cls = JsonDataEncoder, indent = 4)
-		
-		if jsonData:
-			jsonData = jsonData.replace("\'", "\"").replace('False', 'false').replace('True', 'true')
-		
-		return jsonData
+		return self.codecs[ConfigConst.CONTENT_FORMAT_JSON].encode(self._toDataStruct(obj))
 	
 	def _updateIotData(self, jsonStruct, obj):
 		# Create an instance of obj, extract the variables, 
 		# then map the JSON dict into the new object via an iterative lookup of each key / value pair.
-		varStruct = vars(obj)
+		varStruct = DataLayout.getLayout(type(obj)).fieldNames
 		
 		for key in jsonStruct:
 			if key in varStruct:
@@ -79,9 +231,7 @@ class DataUtil():
 			return None
 		
 		jsonStruct = self._formatDataAndLoadDictionary(jsonData, useDecForFloat = useDecForFloat)
-		ad = ActuatorData()
-		self._updateIotData(jsonStruct, ad)
-		return ad
+		return self.layouts[ActuatorData].fromDict(jsonStruct)
 	
 	def sensorDataToJson(self, data: SensorData = None, useDecForFloat: bool = False):
 		if not data:
@@ -97,9 +247,23 @@ class DataUtil():
 			return None
 		
 		jsonStruct = self._formatDataAndLoadDictionary(jsonData, useDecForFloat = useDecForFloat)
-		sd = SensorData()
-		self._updateIotData(jsonStruct, sd)
-		return sd
+		return self.layouts[SensorData].fromDict(jsonStruct)
+	
+	def sensorDataBatchToJson(self, data: SensorDataBatch = None, useDecForFloat: bool = False):
+		if not data:
+			logging.debug("SensorDataBatch is null. Returning empty string.")
+			return ""
+		
+		jsonData = self._generateJsonData(obj = data, useDecForFloat = False)
+		return jsonData
+	
+	def jsonToSensorDataBatch(self, jsonData: str = None, useDecForFloat: bool = False):
+		if not jsonData:
+			logging.warning("JSON data is empty or null. Returning null.")
+			return None
+		
+		jsonStruct = self._formatDataAndLoadDictionary(jsonData, useDecForFloat = useDecForFloat)
+		return self._structToSensorDataBatch(jsonStruct)
 	
 	def systemPerformanceDataToJson(self, data: SystemPerformanceData = None, useDecForFloat: bool = False):
 		if not data:
@@ -115,9 +279,7 @@ class DataUtil():
 			return None
 		
 		jsonStruct = self._formatDataAndLoadDictionary(jsonData, useDecForFloat = useDecForFloat)
-		spd = SystemPerformanceData()
-		self._updateIotData(jsonStruct, spd)
-		return spd
+		return self.layouts[SystemPerformanceData].fromDict(jsonStruct)
 	
 		
 	
@@ -125,8 +287,9 @@ class DataUtil():
 class JsonDataEncoder(JSONEncoder):
 	"""
 	Convenience class to facilitate JSON encoding of an object that
-	can be converted to a dict.
+	can be converted to a dict (via its field layout, as the data
+	containers use __slots__ rather than an instance dict).
 	
 	"""
 	def default(self, o):
-		return o.__dict__
\ No newline at end of file
+		return DataLayout.getLayout(type(o)).toDict(o)
\ No newline at end of file
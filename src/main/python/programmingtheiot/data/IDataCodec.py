@@ -0,0 +1,52 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+class IDataCodec():
+	"""
+	Interface definition for payload codecs used by DataUtil.
+
+	A codec converts between a plain dict (as built by DataUtil from an
+	IoT data container) and its wire representation. Each codec is
+	identified by its CoAP Content-Format ID, which is also what's used
+	to negotiate the format with the remote end.
+
+	"""
+
+	def decode(self, payload) -> dict:
+		"""
+		Converts the wire representation of a message into a dict.
+
+		@param payload The encoded payload (str or bytes).
+		@return dict
+		"""
+		pass
+
+	def encode(self, dataStruct: dict = None):
+		"""
+		Converts 'dataStruct' into its wire representation.
+
+		@param dataStruct The dict to encode.
+		@return The encoded payload (str or bytes).
+		"""
+		pass
+
+	def getContentFormat(self) -> int:
+		"""
+		Returns the CoAP Content-Format ID for this codec.
+
+		@return int
+		"""
+		pass
+
+	def getTopicSuffix(self) -> str:
+		"""
+		Returns the suffix appended to MQTT topics for payloads
+		encoded with this codec (empty for the default format).
+
+		@return str
+		"""
+		pass
@@ -0,0 +1,43 @@
+#####
+#
+# This class is part of the Programming the Internet of Things project.
+#
+# It is provided as a simple shell to guide the student and assist with
+# implementation for the Programming the Internet of Things exercises,
+# and designed to be modified by the student as needed.
+#
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.data.BaseIotData import BaseIotData
+from programmingtheiot.data.SensorData import SensorData
+
+class SensorDataBatch(BaseIotData):
+	"""
+	Envelope that carries multiple SensorData readings (across sensors
+	and poll cycles) as a single upstream message.
+
+	"""
+
+	__slots__ = ('sensorDataList',)
+
+	def __init__(self, name = ConfigConst.SENSOR_MSG_BATCH, d = None):
+		super(SensorDataBatch, self).__init__(name = name, typeID = ConfigConst.SENSOR_DATA_BATCH_TYPE, d = d)
+		self.sensorDataList = []
+
+	def addSensorData(self, data: SensorData) -> bool:
+		if data:
+			self.sensorDataList.append(data)
+			return True
+
+		return False
+
+	def getSensorDataCount(self) -> int:
+		return len(self.sensorDataList)
+
+	def getSensorDataList(self) -> list:
+		return self.sensorDataList
+
+	def _handleUpdateData(self, data):
+		if data and isinstance(data, SensorDataBatch):
+			self.sensorDataList = list(data.getSensorDataList())
@@ -16,6 +16,8 @@ class SystemPerformanceData(BaseIotData):
 	Shell representation of class for student implementation.
 	
 	"""
+	__slots__ = ('cpuUtil', 'memUtil')
+	
 	DEFAULT_VAL = 0.0
 	
 	def __init__(self, d = None):
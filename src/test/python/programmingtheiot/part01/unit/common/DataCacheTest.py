@@ -0,0 +1,109 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.DataCache import DataCache
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.SensorData import SensorData
+
+class DataCacheTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	DataCache. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	LOCATION_ID = "TestLocation"
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing DataCache class...")
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def testPutAndGet(self):
+		cache = DataCache()
+
+		tempData = self._createSensorData(ConfigConst.TEMP_SENSOR_NAME, 20.0)
+		humidityData = self._createSensorData(ConfigConst.HUMIDITY_SENSOR_NAME, 40.0)
+
+		self.assertTrue(cache.put(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, tempData))
+		self.assertTrue(cache.put(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, humidityData))
+
+		self.assertIs(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, self.LOCATION_ID), tempData)
+		self.assertIs(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.HUMIDITY_SENSOR_NAME, self.LOCATION_ID), humidityData)
+
+		# no name means latest for the resource
+		self.assertIs(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE), humidityData)
+
+		self.assertIsNone(cache.get(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, self.LOCATION_ID))
+		self.assertIsNone(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, "OtherLocation"))
+
+		self.assertEqual(cache.getHitCount(), 3)
+		self.assertEqual(cache.getMissCount(), 2)
+
+	def testTtlEviction(self):
+		cache = DataCache(ttlSecs = 0.05)
+		cache.put(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createSensorData(ConfigConst.TEMP_SENSOR_NAME, 20.0))
+
+		self.assertIsNotNone(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, self.LOCATION_ID))
+
+		time.sleep(0.1)
+
+		self.assertIsNone(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, ConfigConst.TEMP_SENSOR_NAME, self.LOCATION_ID))
+		self.assertEqual(cache.evictExpired(), 1)
+		self.assertEqual(cache.getSize(), 0)
+
+	def testConcurrentAccess(self):
+		cache = DataCache()
+		names = [ConfigConst.TEMP_SENSOR_NAME, ConfigConst.HUMIDITY_SENSOR_NAME, ConfigConst.PRESSURE_SENSOR_NAME]
+
+		def writer(name):
+			for i in range(2000):
+				cache.put(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, self._createSensorData(name, float(i)))
+
+		def reader():
+			for i in range(2000):
+				cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, names[i % 3], self.LOCATION_ID)
+
+		threads = [threading.Thread(target = writer, args = (name,)) for name in names]
+		threads += [threading.Thread(target = reader) for i in range(3)]
+
+		for t in threads:
+			t.start()
+
+		for t in threads:
+			t.join()
+
+		for name in names:
+			self.assertEqual(cache.get(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, name, self.LOCATION_ID).getValue(), 1999.0)
+
+		self.assertEqual(cache.getHitCount() + cache.getMissCount(), 6003)
+
+	def _createSensorData(self, name: str, val: float) -> SensorData:
+		sensorData = SensorData(name = name)
+		sensorData.setLocationID(self.LOCATION_ID)
+		sensorData.setValue(val)
+
+		return sensorData
+
+if __name__ == "__main__":
+	unittest.main()
@@ -10,6 +10,8 @@
 import logging
 import unittest
 
+from datetime import datetime
+
 import programmingtheiot.common.ConfigConst as ConfigConst
 
 from programmingtheiot.data.BaseIotData import BaseIotData
@@ -71,6 +73,27 @@ class BaseIotDataTest(unittest.TestCase):
 		self.assertEquals(td.getLocationID(), self.DEFAULT_LOCATION_ID)
 		self.assertEquals(td.getStatusCode(), self.DEFAULT_STATUS_CODE)
 		
+	def testTimeStamp(self):
+		td = TestIotData()
+		
+		timeStamp = td.getTimeStamp()
+		
+		# same ISO 8601 format (with UTC offset) as before, and reused until the next update
+		self.assertEqual(datetime.fromisoformat(timeStamp).isoformat(), timeStamp)
+		self.assertTrue(timeStamp.endswith("+00:00"))
+		self.assertIs(td.getTimeStamp(), timeStamp)
+		self.assertIsNotNone(td.getMonotonicTimeStamp())
+		
+		td.updateTimeStamp()
+		
+		self.assertGreaterEqual(td.getTimeStamp(), timeStamp)
+		
+		# setting the formatted string directly (as when decoding) is kept as-is
+		td.timeStamp = "2021-01-01T00:00:00+00:00"
+		
+		self.assertEqual(td.getTimeStamp(), "2021-01-01T00:00:00+00:00")
+		self.assertIsNone(td.getMonotonicTimeStamp())
+		
 	def _createTestIotData(self):
 		td = TestIotData()
 		
@@ -0,0 +1,243 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import json
+import logging
+import time
+import unittest
+
+try:
+	import cbor2
+except ImportError:
+	cbor2 = None
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.data.DataUtil import DataUtil
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.CborDataCodec import CborDataCodec
+from programmingtheiot.data.DataLayout import DataLayout
+from programmingtheiot.data.SensorData import SensorData
+from programmingtheiot.data.SensorDataBatch import SensorDataBatch
+from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
+
+class DataCodecTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	DataUtil codecs (JSON and CBOR), plus a small benchmark that
+	compares each codec, and the JSON fast path, against the original
+	JSON conversion path. It should not be considered complete, but
+	serve as a starting point for the student implementing additional functionality
+	within their Programming the IoT environment.
+	"""
+
+	NS_IN_MICROS  = 1000
+	MAX_TEST_RUNS = 2000
+
+	# field names are sent as one byte keys, so CBOR is well under the JSON size
+	MAX_CBOR_SIZE_RATIO = 0.6
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing DataUtil codecs...")
+
+		self.dataUtil = DataUtil()
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def testActuatorDataRoundTrip(self):
+		ad = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE, name = ConfigConst.HVAC_ACTUATOR_NAME)
+		ad.setCommand(ConfigConst.COMMAND_ON)
+		ad.setValue(22.5)
+		ad.setStateData("Fan on, mode 'heat'")
+
+		for contentFormat in [ConfigConst.CONTENT_FORMAT_JSON, ConfigConst.CONTENT_FORMAT_CBOR]:
+			payload = self.dataUtil.dataToPayload(ad, contentFormat)
+			ad2 = self.dataUtil.payloadToActuatorData(payload, contentFormat)
+
+			self.assertEqual(self._toDict(ad), self._toDict(ad2))
+
+	def testSensorDataRoundTrip(self):
+		sd = self._createSensorData(20.123456789)
+
+		for contentFormat in [ConfigConst.CONTENT_FORMAT_JSON, ConfigConst.CONTENT_FORMAT_CBOR]:
+			payload = self.dataUtil.dataToPayload(sd, contentFormat)
+			sd2 = self.dataUtil.payloadToSensorData(payload, contentFormat)
+
+			self.assertEqual(self._toDict(sd), self._toDict(sd2))
+
+	def testSensorDataBatchRoundTrip(self):
+		batch = SensorDataBatch()
+
+		for i in range(5):
+			batch.addSensorData(self._createSensorData(20.0 + i))
+
+		payload = self.dataUtil.dataToPayload(batch, ConfigConst.CONTENT_FORMAT_CBOR)
+		batch2 = self.dataUtil.payloadToSensorDataBatch(payload, ConfigConst.CONTENT_FORMAT_CBOR)
+
+		self.assertEqual([self._toDict(sd) for sd in batch.getSensorDataList()], [self._toDict(sd) for sd in batch2.getSensorDataList()])
+
+	def testSystemPerformanceDataRoundTrip(self):
+		spd = SystemPerformanceData()
+		spd.setCpuUtilization(12.5)
+		spd.setMemoryUtilization(45.25)
+
+		for contentFormat in [ConfigConst.CONTENT_FORMAT_JSON, ConfigConst.CONTENT_FORMAT_CBOR]:
+			payload = self.dataUtil.dataToPayload(spd, contentFormat)
+			spd2 = self.dataUtil.payloadToSystemPerformanceData(payload, contentFormat)
+
+			self.assertEqual(self._toDict(spd), self._toDict(spd2))
+
+	def testCodecSelection(self):
+		cborUtil = DataUtil(contentFormat = ConfigConst.CONTENT_FORMAT_CBOR)
+
+		self.assertIsInstance(cborUtil.dataToPayload(self._createSensorData(1.0)), bytes)
+		self.assertEqual(cborUtil.getCodec().getTopicSuffix(), ConfigConst.CBOR_TOPIC_SUFFIX)
+		self.assertEqual(self.dataUtil.getCodec().getTopicSuffix(), '')
+
+		# unsupported (or missing) formats fall back to JSON
+		self.assertEqual(DataUtil(contentFormat = 9999).getContentFormat(), ConfigConst.CONTENT_FORMAT_JSON)
+		self.assertEqual(self.dataUtil.resolveContentFormat(0), ConfigConst.CONTENT_FORMAT_JSON)
+		self.assertIsNone(self.dataUtil.dataToPayload(self._createSensorData(1.0), 9999))
+
+	def testCborPayloadSize(self):
+		batch = SensorDataBatch()
+
+		for i in range(5):
+			batch.addSensorData(self._createSensorData(20.0 + i))
+
+		for data in [self._createSensorData(20.5), batch]:
+			jsonPayload = self.dataUtil.dataToPayload(data, ConfigConst.CONTENT_FORMAT_JSON)
+			cborPayload = self.dataUtil.dataToPayload(data, ConfigConst.CONTENT_FORMAT_CBOR)
+
+			logging.info("%s: JSON %d bytes, CBOR %d bytes", type(data).__name__, len(jsonPayload), len(cborPayload))
+
+			self.assertLessEqual(len(cborPayload), len(jsonPayload) * self.MAX_CBOR_SIZE_RATIO)
+
+	def testCborUnknownKeys(self):
+		codec = self.dataUtil.getCodec(ConfigConst.CONTENT_FORMAT_CBOR)
+
+		# keys that aren't field names are sent as text
+		dataStruct = {ConfigConst.NAME_PROP: 'test', 'unknownKey': [1, -2, 1.1, None, 1e300]}
+
+		self.assertEqual(codec.decode(codec.encode(dataStruct)), dataStruct)
+
+	@unittest.skipUnless(cbor2, "cbor2 isn't installed")
+	def testCborWithCbor2(self):
+		cbor2Codec = CborDataCodec()
+		builtInCodec = CborDataCodec(useCbor2 = False)
+
+		batch = SensorDataBatch()
+		batch.addSensorData(self._createSensorData(20.5))
+		batch.addSensorData(self._createSensorData(20.123456789))
+
+		for data in [self._createSensorData(20.5), batch]:
+			dataStruct = builtInCodec.decode(self.dataUtil.dataToPayload(data, ConfigConst.CONTENT_FORMAT_CBOR))
+			payload = cbor2Codec.encode(dataStruct)
+
+			# same bytes either way, and each reads the other's
+			self.assertEqual(payload, builtInCodec.encode(dataStruct))
+			self.assertEqual(cbor2Codec.decode(payload), dataStruct)
+			self.assertEqual(builtInCodec.decode(payload), dataStruct)
+
+		dataStruct = {ConfigConst.NAME_PROP: 'test', 'unknownKey': [1, -2, 1.1, None, 1e300]}
+
+		self.assertEqual(cbor2Codec.encode(dataStruct), builtInCodec.encode(dataStruct))
+		self.assertEqual(cbor2Codec.decode(cbor2Codec.encode(dataStruct)), dataStruct)
+
+	def testCodecPerformance(self):
+		sd = self._createSensorData(20.5)
+
+		originalJson = self._originalSensorDataToJson(sd)
+		originalResults = self._execBenchmark( \
+			lambda: self._originalSensorDataToJson(sd), lambda: self._originalJsonToSensorData(originalJson))
+
+		fastJson = self.dataUtil.sensorDataToJson(sd)
+		fastResults = self._execBenchmark( \
+			lambda: self.dataUtil.sensorDataToJson(sd), lambda: self.dataUtil.jsonToSensorData(fastJson))
+
+		logging.info("SensorData codec benchmark [%d runs]", self.MAX_TEST_RUNS)
+		logging.info("  original JSON : %4d bytes, encode %7.2f us, decode %7.2f us", \
+			len(originalJson), originalResults[0], originalResults[1])
+		logging.info("  JSON fast path: %4d bytes, encode %7.2f us, decode %7.2f us", \
+			len(fastJson), fastResults[0], fastResults[1])
+
+		payloadSizes = { }
+
+		for codecName, contentFormat in [('JSON', ConfigConst.CONTENT_FORMAT_JSON), ('CBOR', ConfigConst.CONTENT_FORMAT_CBOR)]:
+			payload = self.dataUtil.dataToPayload(sd, contentFormat)
+			results = self._execBenchmark( \
+				lambda: self.dataUtil.dataToPayload(sd, contentFormat), \
+				lambda: self.dataUtil.payloadToSensorData(payload, contentFormat))
+
+			payloadSizes[contentFormat] = len(payload)
+
+			logging.info("  %-4s codec    : %4d bytes, encode %7.2f us, decode %7.2f us", \
+				codecName, len(payload), results[0], results[1])
+
+		self.assertLess(len(fastJson), len(originalJson))
+		self.assertLess(payloadSizes[ConfigConst.CONTENT_FORMAT_JSON], len(originalJson))
+		self.assertLess(payloadSizes[ConfigConst.CONTENT_FORMAT_CBOR], payloadSizes[ConfigConst.CONTENT_FORMAT_JSON])
+
+	def _createSensorData(self, val: float) -> SensorData:
+		sd = SensorData(typeID = ConfigConst.TEMP_SENSOR_TYPE, name = ConfigConst.TEMP_SENSOR_NAME)
+		sd.setValue(val)
+
+		return sd
+
+	def _originalJsonToSensorData(self, jsonData: str) -> SensorData:
+		# the original DataUtil decode path, kept here as the benchmark reference
+		jsonData = jsonData.replace("\'", "\"").replace('False', 'false').replace('True', 'true')
+		jsonStruct = json.loads(jsonData)
+
+		sd = SensorData()
+		fieldNames = DataLayout.getLayout(SensorData).fieldNames
+
+		for key in jsonStruct:
+			if key in fieldNames:
+				setattr(sd, key, jsonStruct[key])
+
+		return sd
+
+	def _originalSensorDataToJson(self, data: SensorData) -> str:
+		# the original DataUtil encode path (pretty-printed), kept here as the benchmark reference
+		jsonData = json.dumps(data, default = self._toDict, indent = 4)
+
+		return jsonData.replace("\'", "\"").replace('False', 'false').replace('True', 'true')
+
+	def _toDict(self, data) -> dict:
+		return DataLayout.getLayout(type(data)).toDict(data)
+
+	def _execBenchmark(self, encodeFunc, decodeFunc) -> tuple:
+		logging.disable(level = logging.WARNING)
+
+		try:
+			startTime = time.perf_counter_ns()
+
+			for i in range(self.MAX_TEST_RUNS):
+				encodeFunc()
+
+			encodeMicros = (time.perf_counter_ns() - startTime) / self.NS_IN_MICROS / self.MAX_TEST_RUNS
+			startTime = time.perf_counter_ns()
+
+			for i in range(self.MAX_TEST_RUNS):
+				decodeFunc()
+
+			decodeMicros = (time.perf_counter_ns() - startTime) / self.NS_IN_MICROS / self.MAX_TEST_RUNS
+		finally:
+			logging.disable(level = logging.NOTSET)
+
+		return (encodeMicros, decodeMicros)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -7,12 +7,21 @@
 # Copyright (c) 2020 by Andrew D. King
 # 
 
+import json
 import logging
+import time
 import unittest
 
+from datetime import datetime, timezone
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ConfigUtil import ConfigUtil
+
 from programmingtheiot.data.DataUtil import DataUtil
 
 from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataLayout import DataLayout
 from programmingtheiot.data.SensorData import SensorData
 from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
 
@@ -183,5 +192,126 @@ class DataUtilTest(unittest.TestCase):
 		self.assertEqual(spdObj1.getTimeStamp(), spdObj2.getTimeStamp())
 		self.assertEqual(spdObj1Str, spdObj2Str)
 
+	#@unittest.skip("Ignore for now.")
+	def testJsonIsCompactAndValid(self):
+		logging.info("\n\n----- [Compact JSON] -----")
+		
+		ad = ActuatorData()
+		ad.setStateData("It's 'True' or False")
+		
+		adJson = self.dataUtil.actuatorDataToJson(ad)
+		adObj  = self.dataUtil.jsonToActuatorData(adJson)
+		
+		self.assertNotIn("\n", adJson)
+		self.assertEqual(json.loads(adJson)["stateData"], ad.getStateData())
+		self.assertEqual(self._toDict(ad), self._toDict(adObj))
+		
+		# keys the data class doesn't know about are ignored; missing keys get defaults
+		sdObj = self.dataUtil.jsonToSensorData('{"name":"FooBar","value":1.5,"unknownKey":1}')
+		
+		self.assertEqual(sdObj.getName(), "FooBar")
+		self.assertEqual(sdObj.getValue(), 1.5)
+		self.assertFalse(hasattr(sdObj, "unknownKey"))
+		self.assertEqual(sdObj.getLocationID(), SensorData().getLocationID())
+
+	#@unittest.skip("Ignore for now.")
+	def testMissingTimeStampIsCurrent(self):
+		logging.info("\n\n----- [Missing Time Stamp] -----")
+
+		# build the layout first, so its prototype's time stamp is older
+		self.dataUtil.jsonToSensorData('{"name":"FooBar"}')
+		time.sleep(0.01)
+
+		startTime = time.monotonic()
+		sdObj = self.dataUtil.jsonToSensorData('{"name":"FooBar"}')
+
+		self.assertGreaterEqual(sdObj.getMonotonicTimeStamp(), startTime)
+		self.assertIsNotNone(sdObj.getTimeStamp())
+
+		# ... and one that's sent is kept as-is
+		sdObj = self.dataUtil.jsonToSensorData('{"name":"FooBar","timeStamp":"2020-12-27T17:12:40.032631+00:00"}')
+
+		self.assertEqual(sdObj.getTimeStamp(), "2020-12-27T17:12:40.032631+00:00")
+
+	# the required speed up of the JSON fast path over the original
+	MIN_SPEED_UP = 5.0
+	
+	#@unittest.skip("Ignore for now.")
+	def testJsonPerformance(self):
+		logging.info("\n\n----- [JSON Performance] -----")
+		
+		maxTestRuns = 2000
+		sd = SensorData()
+		sd.setName(self.sdName)
+		sd.setValue(20.5)
+		
+		legacyJson = self._legacySensorDataToJson(sd)
+		fastJson   = self.dataUtil.sensorDataToJson(sd)
+		
+		logging.disable(level = logging.WARNING)
+		
+		try:
+			legacyEncodeTime = self._timeFunc(lambda: self._legacySensorDataToJson(sd), maxTestRuns)
+			fastEncodeTime   = self._timeFunc(lambda: self.dataUtil.sensorDataToJson(sd), maxTestRuns)
+			legacyDecodeTime = self._timeFunc(lambda: self._legacyJsonToSensorData(legacyJson), maxTestRuns)
+			fastDecodeTime   = self._timeFunc(lambda: self.dataUtil.jsonToSensorData(fastJson), maxTestRuns)
+		finally:
+			logging.disable(level = logging.NOTSET)
+		
+		logging.info( \
+			"SensorData JSON [%d runs]: encode %.2f -> %.2f us (%.1fx), decode %.2f -> %.2f us (%.1fx)", \
+			maxTestRuns, legacyEncodeTime, fastEncodeTime, legacyEncodeTime / fastEncodeTime, \
+			legacyDecodeTime, fastDecodeTime, legacyDecodeTime / fastDecodeTime)
+		
+		# wire compatible: same fields and values as the original (pretty-printed) output
+		self.assertEqual(json.loads(legacyJson), json.loads(fastJson))
+		self.assertGreaterEqual(legacyEncodeTime / fastEncodeTime, self.MIN_SPEED_UP)
+		self.assertGreaterEqual(legacyDecodeTime / fastDecodeTime, self.MIN_SPEED_UP)
+		
+	def _legacyJsonToSensorData(self, jsonData: str) -> SensorData:
+		# the original DataUtil decode path, kept here as the benchmark reference
+		jsonData = jsonData.replace("\'", "\"").replace('False', 'false').replace('True', 'true')
+		jsonStruct = json.loads(jsonData)
+		
+		# the original constructor also read the location ID from the
+		# configuration, and formatted the time stamp, for every instance
+		sd = SensorData()
+		sd.setLocationID(ConfigUtil().getProperty(ConfigConst.CONSTRAINED_DEVICE, ConfigConst.DEVICE_LOCATION_ID_KEY))
+		sd.timeStamp = str(datetime.now(timezone.utc).isoformat())
+		
+		varStruct = DataLayout.getLayout(SensorData).fieldNames
+		
+		for key in jsonStruct:
+			if key in varStruct:
+				setattr(sd, key, jsonStruct[key])
+				
+		return sd
+	
+	def _legacySensorDataToJson(self, data: SensorData) -> str:
+		# the original DataUtil encode path, kept here as the benchmark reference
+		jsonData = json.dumps(data, default = self._toDict, indent = 4)
+		
+		return jsonData.replace("\'", "\"").replace('False', 'false').replace('True', 'true')
+	
+	def _toDict(self, data) -> dict:
+		return DataLayout.getLayout(type(data)).toDict(data)
+	
+	def _timeFunc(self, func, maxTestRuns: int, repeatCount: int = 5) -> float:
+		# the best of several runs, as other work on the host only ever adds time
+		bestTime = None
+		
+		for i in range(repeatCount):
+			startTime = time.perf_counter_ns()
+			
+			for j in range(maxTestRuns):
+				func()
+				
+			runTime = (time.perf_counter_ns() - startTime) / 1000 / maxTestRuns
+			
+			if bestTime is None or runTime < bestTime:
+				bestTime = runTime
+				
+		return bestTime
+	
 if __name__ == "__main__":
 	unittest.main()
@@ -8,6 +8,8 @@
 # 
 
 import logging
+import time
+import tracemalloc
 import unittest
 
 import programmingtheiot.common.ConfigConst as ConfigConst
@@ -63,6 +65,40 @@ class SensorDataTest(unittest.TestCase):
 		self.assertEquals(sd.getName(), self.DEFAULT_NAME)
 		self.assertEquals(sd.getValue(), self.MIN_VALUE)
 	
+	def testMemoryFootprint(self):
+		maxTestRuns = 10000
+		
+		sd = SensorData()
+		
+		# slots only - no per-instance dict
+		self.assertFalse(hasattr(sd, '__dict__'))
+		
+		logging.disable(level = logging.WARNING)
+		
+		try:
+			tracemalloc.start()
+			
+			startBytes = tracemalloc.get_traced_memory()[0]
+			sensorDataList = [SensorData() for i in range(maxTestRuns)]
+			bytesPerObject = (tracemalloc.get_traced_memory()[0] - startBytes) / maxTestRuns
+			
+			tracemalloc.stop()
+			
+			startTime = time.perf_counter_ns()
+			
+			for i in range(maxTestRuns):
+				SensorData()
+				
+			elapsedSecs = (time.perf_counter_ns() - startTime) / 1000000000
+		finally:
+			logging.disable(level = logging.NOTSET)
+		
+		logging.info("SensorData footprint [%d objects]: %.0f bytes / object, %.0f objects / sec", \
+			maxTestRuns, bytesPerObject, maxTestRuns / elapsedSecs)
+		
+		self.assertEqual(len(sensorDataList), maxTestRuns)
+		self.assertEqual(sensorDataList[0].getLocationID(), sd.getLocationID())
+		
 	def _createTestSensorData(self):
 		sd = SensorData()
 		
@@ -0,0 +1,157 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from programmingtheiot.cda.sim.SensorDataGenerator import SensorDataGenerator
+from programmingtheiot.cda.sim.SensorDataGenerator import SensorDataSet
+from programmingtheiot.cda.sim.SensorDataGenerator import SensorDataStream
+
+class SensorDataGeneratorTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	streaming and caching modes of SensorDataGenerator. It should not be
+	considered complete, but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	MIN_VALUE = 15.0
+	MAX_VALUE = 25.0
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing SensorDataGenerator class...")
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def testDataSetCache(self):
+		with tempfile.TemporaryDirectory() as cacheDir:
+			dataSet = SensorDataGenerator(seed = 42, cacheDir = cacheDir).generateDailyIndoorTemperatureDataSet( \
+				minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE)
+
+			self.assertEqual(len(os.listdir(cacheDir)), 1)
+
+			# the same parameters and seed map the cached file rather than generating it again
+			cachedDataSet = SensorDataGenerator(seed = 42, cacheDir = cacheDir).generateDailyIndoorTemperatureDataSet( \
+				minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE)
+
+			self.assertIsInstance(cachedDataSet.getDataEntries(), numpy.memmap)
+			numpy.testing.assert_array_equal(cachedDataSet.getTimeEntries(), dataSet.getTimeEntries())
+			numpy.testing.assert_array_equal(cachedDataSet.getDataEntries(), dataSet.getDataEntries())
+
+			# different parameters, and random noise, aren't served from the cache
+			otherDataSet = SensorDataGenerator(seed = 42, cacheDir = cacheDir).generateDailyIndoorTemperatureDataSet( \
+				minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE + 1)
+			SensorDataGenerator(cacheDir = cacheDir).generateDailyIndoorTemperatureDataSet( \
+				minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE)
+
+			self.assertFalse(numpy.array_equal(otherDataSet.getDataEntries(), dataSet.getDataEntries()))
+			self.assertEqual(len(os.listdir(cacheDir)), 2)
+
+	def testDataSetEntriesNotCopied(self):
+		timeEntries = numpy.linspace(0, 24, 100)
+		dataEntries = numpy.arange(200.0).reshape(2, 100)
+
+		dataSet = SensorDataSet(timeEntries = timeEntries, dataEntries = dataEntries)
+
+		# flat arrays are used as-is, others are flattened
+		self.assertIs(dataSet.getTimeEntries(), timeEntries)
+		self.assertEqual(dataSet.getDataEntries().ndim, 1)
+		self.assertEqual(dataSet.getDataEntryCount(), 200)
+
+	def testStreamMatchesDataSet(self):
+		dataGenerator = SensorDataGenerator()
+
+		for curveType in [SensorDataGenerator.FULL_WAVE, SensorDataGenerator.BELL_CURVE, SensorDataGenerator.INVERSE_CURVE]:
+			dataSet = dataGenerator.generateDailySensorDataSet( \
+				curveType = curveType, noiseLevel = SensorDataGenerator.NO_NOISE, \
+				minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE, startHour = 0, endHour = 24)
+			dataStream = dataGenerator.generateSensorDataStream( \
+				curveType = curveType, noiseLevel = SensorDataGenerator.NO_NOISE, \
+				minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE, startHour = 0, endHour = 24, chunkSize = 100)
+
+			self.assertEqual(dataStream.getDataEntryCount(), dataSet.getDataEntryCount())
+
+			numpy.testing.assert_allclose(dataStream.getTimeEntries(), dataSet.getTimeEntries())
+			numpy.testing.assert_allclose(dataStream.getDataEntries(), dataSet.getDataEntries())
+
+	def testStreamChunksAreReproducible(self):
+		dataStream = SensorDataGenerator(seed = 42).generateSensorDataStream( \
+			minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE, endHour = 48, chunkSize = 500)
+
+		firstVal = dataStream.getDataEntry(10)
+		lastVal = dataStream.getDataEntry(dataStream.getDataEntryCount() - 1)
+
+		# re-reading after other chunks have been computed gives the same values
+		self.assertEqual(dataStream.getDataEntry(10), firstVal)
+		self.assertEqual(dataStream.getDataEntry(dataStream.getDataEntryCount() - 1), lastVal)
+
+		# as does another stream from a generator with the same seed
+		otherStream = SensorDataGenerator(seed = 42).generateSensorDataStream( \
+			minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE, endHour = 48, chunkSize = 500)
+
+		self.assertEqual(otherStream.getDataEntry(10), firstVal)
+
+		# but streams from the same generator don't share noise
+		dataGenerator = SensorDataGenerator(seed = 42)
+		streamA = dataGenerator.generateSensorDataStream(minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE)
+		streamB = dataGenerator.generateSensorDataStream(minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE)
+
+		self.assertNotEqual(streamA.getDataEntry(10), streamB.getDataEntry(10))
+
+	def testFleetStream(self):
+		dataStream = SensorDataGenerator(seed = 42).generateFleetSensorDataStream( \
+			deviceCount = 500, minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE, endHour = 24, chunkSize = 60)
+
+		timeEntries, dataEntries = dataStream.getChunk(0)
+
+		self.assertEqual(dataStream.getDeviceCount(), 500)
+		self.assertEqual(dataEntries.shape, (500, 60))
+		self.assertEqual(dataStream.getDataEntry(61).shape, (500,))
+
+		# devices are out of phase with each other
+		self.assertGreater(numpy.ptp(dataEntries[:, 0]), (self.MAX_VALUE - self.MIN_VALUE) / 2)
+
+	def testMultiWeekStream(self):
+		# 6 weeks, 1 entry per second
+		endHour = SensorDataGenerator.MAX_HOURS * 6
+		startTime = time.perf_counter()
+
+		dataStream = SensorDataGenerator().generateDailyIndoorTemperatureDataSet( \
+			minValue = self.MIN_VALUE, maxValue = self.MAX_VALUE, useSeconds = True, endHour = endHour, useStream = True)
+		val = dataStream.getDataEntry(dataStream.getDataEntryCount() // 2)
+
+		elapsedMillis = (time.perf_counter() - startTime) * 1000
+
+		logging.info("Started %s entry data stream in %.2f ms", dataStream.getDataEntryCount(), elapsedMillis)
+
+		self.assertIsInstance(dataStream, SensorDataStream)
+		self.assertEqual(dataStream.getDataEntryCount(), endHour * 3600)
+		self.assertAlmostEqual(dataStream.getTimeEntry(dataStream.getDataEntryCount() - 1), endHour)
+		self.assertGreater(val, self.MIN_VALUE - 1)
+		self.assertLess(val, self.MAX_VALUE + 1)
+
+		# only one chunk is held at a time
+		timeEntries, dataEntries = dataStream.getChunk(dataStream.getChunkCount() - 1)
+
+		self.assertLessEqual(dataEntries.size, dataStream.getChunkSize())
+		self.assertIsNone(dataStream.getChunk(dataStream.getChunkCount()))
+
+if __name__ == "__main__":
+	unittest.main()
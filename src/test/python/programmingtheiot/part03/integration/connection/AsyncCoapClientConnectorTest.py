@@ -0,0 +1,188 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import asyncio
+import logging
+import socket
+import threading
+import time
+import unittest
+
+import aiocoap
+import aiocoap.resource as resource
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.AsyncCoapClientConnector import AsyncCoapClientConnector
+
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class AsyncCoapClientConnectorTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for
+	AsyncCoapClientConnector. A local aiocoap server is started by the
+	test, so no GDA is needed. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	REQUEST_COUNT = 200
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.getLogger('coap').setLevel(logging.WARNING)
+		logging.getLogger('coap-server').setLevel(logging.WARNING)
+		logging.info("Testing AsyncCoapClientConnector class...")
+
+		self.server = LocalCoapServer()
+		self.server.startServer()
+
+	@classmethod
+	def tearDownClass(self):
+		self.server.stopServer()
+
+	def setUp(self):
+		self.listener = RecordingDataMessageListener()
+
+		self.coapClient = AsyncCoapClientConnector(dataMsgListener = self.listener)
+		self.coapClient.host = '127.0.0.1'
+		self.coapClient.port = self.server.getPort()
+
+	def tearDown(self):
+		self.coapClient.disconnectClient()
+
+	def testConcurrentPostRequests(self):
+		self.server.sensorMsgResource.postCount = 0
+
+		dataUtil = DataUtil()
+		payload = dataUtil.sensorDataToJson(SensorData(typeID = ConfigConst.TEMP_SENSOR_TYPE, name = ConfigConst.TEMP_SENSOR_NAME))
+
+		# CON, as NON requests (or their responses) can be lost
+		startTime = time.monotonic()
+
+		futures = [ \
+			self.coapClient.submitRequest('POST', ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, None, True, payload) \
+				for i in range(self.REQUEST_COUNT)]
+
+		responses = [future.result(timeout = 10) for future in futures]
+		elapsedSecs = time.monotonic() - startTime
+
+		logging.info("%d concurrent CON POST requests: %.1f requests/sec", self.REQUEST_COUNT, self.REQUEST_COUNT / elapsedSecs)
+
+		self.assertTrue(all(response.code == aiocoap.CHANGED for response in responses))
+		self.assertEqual(self.server.sensorMsgResource.postCount, self.REQUEST_COUNT)
+
+		# the facade only queues the request
+		self.assertTrue(self.coapClient.sendPostRequest(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, payload = payload))
+		self.assertFalse(self.coapClient.sendPostRequest(resource = None, payload = payload))
+
+	def testAwaitRequest(self):
+		async def getTwice():
+			return await asyncio.gather( \
+				self.coapClient.request('GET', ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, enableCON = True), \
+				self.coapClient.request('GET', name = 'missing'))
+
+		responses = asyncio.run_coroutine_threadsafe(getTwice(), self.coapClient.getEventLoop()).result(timeout = 10)
+
+		self.assertEqual(responses[0].code, aiocoap.CONTENT)
+		self.assertEqual(responses[1].code, aiocoap.NOT_FOUND)
+
+	def testGetRequest(self):
+		self.assertTrue(self.coapClient.sendGetRequest(resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, enableCON = True))
+
+		self.assertEqual(len(self.listener.actuatorCommands), 1)
+		self.assertEqual(self.listener.actuatorCommands[0].getValue(), 22.5)
+
+		self.assertFalse(self.coapClient.sendGetRequest(name = 'missing'))
+		self.assertTrue(self.coapClient.sendDiscoveryRequest())
+
+	def testTimeout(self):
+		self.coapClient.port = self.server.getPort() + 1 if self.server.getPort() < 65535 else 1024
+
+		self.assertFalse(self.coapClient.sendGetRequest(resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, timeout = 1))
+
+class RecordingDataMessageListener(DefaultDataMessageListener):
+	def __init__(self):
+		super().__init__()
+
+		self.actuatorCommands = []
+
+	def handleActuatorCommandMessage(self, data: ActuatorData) -> bool:
+		self.actuatorCommands.append(data)
+
+		return True
+
+class SensorMsgResource(resource.Resource):
+	def __init__(self):
+		super().__init__()
+
+		self.postCount = 0
+
+	async def render_post(self, request):
+		self.postCount += 1
+
+		return aiocoap.Message(code = aiocoap.CHANGED)
+
+class ActuatorCmdResource(resource.Resource):
+	def __init__(self):
+		super().__init__()
+
+		data = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE)
+		data.setValue(22.5)
+
+		self.payload = DataUtil().actuatorDataToJson(data).encode('utf-8')
+
+	async def render_get(self, request):
+		return aiocoap.Message(payload = self.payload, content_format = ConfigConst.CONTENT_FORMAT_JSON)
+
+class LocalCoapServer():
+	"""
+	An aiocoap server on a free local UDP port, run by its own event
+	loop thread.
+
+	"""
+
+	def __init__(self):
+		self.sensorMsgResource = SensorMsgResource()
+
+		self.site = resource.Site()
+		self.site.add_resource(['.well-known', 'core'], resource.WKCResource(self.site.get_resources_as_linkheader))
+		self.site.add_resource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value.split('/'), self.sensorMsgResource)
+		self.site.add_resource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value.split('/'), ActuatorCmdResource())
+
+		with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+			sock.bind(('127.0.0.1', 0))
+			self.port = sock.getsockname()[1]
+
+		self.eventLoop = asyncio.new_event_loop()
+		self.loopThread = threading.Thread(target = self.eventLoop.run_forever, daemon = True)
+		self.context = None
+
+	def getPort(self) -> int:
+		return self.port
+
+	def startServer(self):
+		self.loopThread.start()
+
+		self.context = asyncio.run_coroutine_threadsafe( \
+			aiocoap.Context.create_server_context(self.site, bind = ('127.0.0.1', self.port)), self.eventLoop).result(5)
+
+	def stopServer(self):
+		asyncio.run_coroutine_threadsafe(self.context.shutdown(), self.eventLoop).result(5)
+
+		self.eventLoop.call_soon_threadsafe(self.eventLoop.stop)
+		self.loopThread.join(5)
+
+if __name__ == "__main__":
+	unittest.main()
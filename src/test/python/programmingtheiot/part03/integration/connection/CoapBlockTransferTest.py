@@ -0,0 +1,206 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import socket
+import threading
+import time
+import unittest
+
+from coapthon import defines
+from coapthon.messages.request import Request
+from coapthon.resources.resource import Resource
+from coapthon.serializer import Serializer
+
+import coapthon.client.coap
+import coapthon.server.coap
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.AsyncCoapClientConnector import AsyncCoapClientConnector
+from programmingtheiot.cda.connection.CoapBlockLayer import CoapBlockLayer, CoapSerializer
+from programmingtheiot.cda.connection.CoapClientConnector import CoapClientConnector
+from programmingtheiot.cda.connection.PooledCoapServer import PooledCoapServer
+
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
+
+class CoapBlockTransferTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for
+	block-wise transfers between the CoAP clients and a CoAP server
+	using CoapBlockLayer. The server (a PooledCoapServer) is started
+	by the test, so no GDA is needed. It should not be considered
+	complete, but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT environment.
+	"""
+
+	SERVER_BLOCK_SIZE = 256
+	STATE_DATA_SIZE   = 5000
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.getLogger('coapthon').setLevel(logging.WARNING)
+		logging.info("Testing CoAP block-wise transfers...")
+
+		with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+			sock.bind(('127.0.0.1', 0))
+			self.port = sock.getsockname()[1]
+
+		self.actuatorCmdResource = LargeActuatorCmdResource(self.STATE_DATA_SIZE)
+		self.sensorMsgResource = RecordingSensorMsgResource()
+
+		self.coapServer = PooledCoapServer(server_address = ('127.0.0.1', self.port), blockSize = self.SERVER_BLOCK_SIZE)
+		self.coapServer.add_resource(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value, self.actuatorCmdResource)
+		self.coapServer.add_resource(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value, self.sensorMsgResource)
+
+		self.serverThread = threading.Thread(target = self.coapServer.listen, args = (1,), daemon = True)
+		self.serverThread.start()
+
+	@classmethod
+	def tearDownClass(self):
+		self.coapServer.close()
+		self.serverThread.join(5)
+
+	def setUp(self):
+		self.listener = RecordingDataMessageListener()
+
+	def testSplitCharacter(self):
+		# a block whose payload starts and ends mid-character
+		request = Request()
+		request.type = defines.Types['CON']
+		request.mid = 1
+		request.code = defines.Codes.POST.number
+		request.uri_path = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value
+		request.content_type = ConfigConst.CONTENT_FORMAT_JSON
+		request.block1 = (1, 1, 16)
+		request.payload = 'éééééééé'.encode('utf-8')[1:17]
+
+		message = CoapSerializer.deserialize(bytes(Serializer().serialize(request)), ('127.0.0.1', 5683))
+
+		self.assertEqual(message.payload, request.payload)
+		self.assertEqual(message.block1, (1, 1, 16))
+		self.assertEqual(message.uri_path, request.uri_path)
+
+		# other payloads are still decoded
+		del request.block1
+		request.payload = 'ééé'
+
+		self.assertEqual(CoapSerializer.deserialize(bytes(Serializer().serialize(request)), ('127.0.0.1', 5683)).payload, 'ééé')
+
+		# ... and CoAPthon's own is left as-is, for any other users in the process
+		self.assertIs(coapthon.client.coap.Serializer, Serializer)
+		self.assertIs(coapthon.server.coap.Serializer, Serializer)
+
+	def testBlockSize(self):
+		self.assertEqual(CoapBlockLayer.getBlockSize(1024), 1024)
+		self.assertEqual(CoapBlockLayer.getBlockSize(4096), 1024)
+		self.assertEqual(CoapBlockLayer.getBlockSize(500), 256)
+		self.assertEqual(CoapBlockLayer.getBlockSize(0), 16)
+
+	def testGetRequest(self):
+		# the client asks for smaller blocks than the server's, or accepts the server's
+		for blockSize in [64, 1024]:
+			for coapClient in self._createClients(blockSize):
+				self.actuatorCmdResource.renderCount = 0
+				self.listener.actuatorCommands.clear()
+
+				coapClient.sendGetRequest(resource = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE)
+				coapClient.disconnectClient()
+
+				# rendered once, even though it changes with every render
+				self.assertEqual(self.actuatorCmdResource.renderCount, 1)
+				self.assertEqual(len(self.listener.actuatorCommands), 1)
+				self.assertEqual(len(self.listener.actuatorCommands[0].getStateData()), self.STATE_DATA_SIZE)
+
+	def testPostRequest(self):
+		data = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE)
+		data.setStateData('é' * self.STATE_DATA_SIZE)
+
+		payload = DataUtil().actuatorDataToJson(data)
+
+		for blockSize in [64, 1024]:
+			for coapClient in self._createClients(blockSize):
+				self.sensorMsgResource.payload = None
+
+				self.assertTrue(coapClient.sendPostRequest(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, payload = payload))
+
+				for i in range(50):
+					if self.sensorMsgResource.payload is not None:
+						break
+
+					time.sleep(0.1)
+
+				coapClient.disconnectClient()
+
+				self.assertEqual(bytes(self.sensorMsgResource.payload).decode('utf-8'), payload)
+
+	def _createClients(self, blockSize: int) -> list:
+		coapClient = CoapClientConnector(dataMsgListener = self.listener)
+		coapClient.disconnectClient()
+		coapClient.host = '127.0.0.1'
+		coapClient.port = self.port
+		coapClient.blockSize = blockSize
+		coapClient._initClient()
+
+		asyncCoapClient = AsyncCoapClientConnector(dataMsgListener = self.listener)
+		asyncCoapClient.host = '127.0.0.1'
+		asyncCoapClient.port = self.port
+		asyncCoapClient.blockSize = blockSize
+
+		return [coapClient, asyncCoapClient]
+
+class RecordingDataMessageListener(DefaultDataMessageListener):
+	def __init__(self):
+		super().__init__()
+
+		self.actuatorCommands = []
+
+	def handleActuatorCommandMessage(self, data: ActuatorData) -> bool:
+		self.actuatorCommands.append(data)
+
+		return True
+
+class LargeActuatorCmdResource(Resource):
+	def __init__(self, stateDataSize: int):
+		super().__init__(ConfigConst.ACTUATOR_CMD, visible = True, observable = False, allow_children = True)
+
+		self.stateDataSize = stateDataSize
+		self.renderCount = 0
+		self.dataUtil = DataUtil()
+
+	def render_GET_advanced(self, request, response):
+		self.renderCount += 1
+
+		# a slightly different payload each time - and some blocks will split an 'é'
+		data = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE)
+		data.setValue(float(self.renderCount))
+		data.setStateData((str(self.renderCount % 10) + 'é') * (self.stateDataSize // 2))
+
+		response.code = defines.Codes.CONTENT.number
+		response.payload = (ConfigConst.CONTENT_FORMAT_JSON, self.dataUtil.actuatorDataToJson(data))
+
+		return self, response
+
+class RecordingSensorMsgResource(Resource):
+	def __init__(self):
+		super().__init__(ConfigConst.SENSOR_MSG, visible = True, observable = False, allow_children = True)
+
+		self.payload = None
+
+	def render_POST_advanced(self, request, response):
+		self.payload = request.payload
+		response.code = defines.Codes.CHANGED.number
+
+		return self, response
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,235 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import asyncio
+import json
+import logging
+import socket
+import threading
+import time
+import unittest
+
+import aiocoap
+
+from coapthon.server.coap import CoAP
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.handlers.GetSystemPerformanceResourceHandler import GetSystemPerformanceResourceHandler
+from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
+
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+from programmingtheiot.data.SystemPerformanceData import SystemPerformanceData
+
+class CoapObserveTest(unittest.TestCase):
+	"""
+	This test case class contains very basic integration tests for
+	observe notifications from the CoAP telemetry resource handlers.
+	A local CoAP server and aiocoap observers are started by the test,
+	so no GDA is needed. It should not be considered complete, but serve
+	as a starting point for the student implementing additional
+	functionality within their Programming the IoT environment.
+	"""
+
+	OBSERVER_COUNT = 20
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.getLogger('coapthon').setLevel(logging.WARNING)
+		logging.getLogger('coap').setLevel(logging.WARNING)
+		logging.info("Testing CoAP observe notifications...")
+
+	def setUp(self):
+		with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+			sock.bind(('127.0.0.1', 0))
+			port = sock.getsockname()[1]
+
+		self.coapServer = CoAP(server_address = ('127.0.0.1', port))
+
+		self.serverThread = threading.Thread(target = self.coapServer.listen, args = (1,), daemon = True)
+		self.serverThread.start()
+
+		self.dataMsgListener = DefaultDataMessageListener()
+		self.observers = ObserverClient(port)
+
+	def tearDown(self):
+		self.observers.stopClient()
+
+		self.coapServer.close()
+		self.serverThread.join(5)
+
+	def testNotifyObservers(self):
+		handler = self._addTelemetryHandler(ConfigConst.SENSOR_MSG, ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value)
+
+		self.dataMsgListener.handleSensorMessage(self._createSensorData(ConfigConst.TEMP_SENSOR_NAME, 20.0))
+
+		self._startObservers(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value)
+
+		encodeCount = handler.dataUtil.encodeCount
+
+		# the generic resource is updated with readings from every sensor
+		self.dataMsgListener.handleSensorMessage(self._createSensorData(ConfigConst.HUMIDITY_SENSOR_NAME, 40.0))
+
+		self._waitForNotifications(2)
+
+		# one notification, encoded once for all the observers
+		self.assertEqual(handler.getNotifyCount(), 2)
+		self.assertEqual(handler.dataUtil.encodeCount - encodeCount, 1)
+
+		for notifications in self.observers.getNotifications():
+			self.assertEqual(json.loads(notifications[0].payload)['value'], 20.0)
+			self.assertEqual(json.loads(notifications[-1].payload)['value'], 40.0)
+			self.assertGreater(notifications[-1].opt.observe, notifications[0].opt.observe)
+
+	def testCoalesceNotifications(self):
+		handler = self._addTelemetryHandler(ConfigConst.TEMP_SENSOR_NAME, ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value + '/' + ConfigConst.TEMP_SENSOR_NAME)
+
+		handler.onSensorDataUpdate(self._createSensorData(ConfigConst.TEMP_SENSOR_NAME, 19.0))
+
+		self._startObservers(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value + '/' + ConfigConst.TEMP_SENSOR_NAME)
+
+		# the first is sent right away, the rest are coalesced into one
+		results = [handler.onSensorDataUpdate(self._createSensorData(ConfigConst.TEMP_SENSOR_NAME, 20.0 + i)) for i in range(10)]
+
+		self.assertEqual(results, [True, True] + [False] * 8)
+
+		# readings from other sensors are ignored
+		self.assertFalse(handler.onSensorDataUpdate(self._createSensorData(ConfigConst.HUMIDITY_SENSOR_NAME, 40.0)))
+
+		self._waitForNotifications(3)
+
+		self.assertEqual(handler.getNotifyCount(), 3)
+
+		for notifications in self.observers.getNotifications():
+			self.assertEqual([json.loads(n.payload)['value'] for n in notifications[1:]], [20.0, 29.0])
+
+	def testSystemPerformanceNotifications(self):
+		handler = GetSystemPerformanceResourceHandler(coap_server = self.coapServer)
+		handler.pollCycles = 1
+
+		self.coapServer.add_resource(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE.value, handler)
+		self.dataMsgListener.setSystemPerformanceDataListener(handler)
+
+		self.dataMsgListener.handleSystemPerformanceMessage(SystemPerformanceData())
+
+		self._startObservers(ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE.value, observerCount = 2)
+
+		sysPerfData = SystemPerformanceData()
+		sysPerfData.setCpuUtilization(12.5)
+
+		self.dataMsgListener.handleSystemPerformanceMessage(sysPerfData)
+
+		self._waitForNotifications(2)
+
+		for notifications in self.observers.getNotifications():
+			self.assertEqual(json.loads(notifications[-1].payload)['cpuUtil'], 12.5)
+
+	def _addTelemetryHandler(self, name: str, path: str) -> GetTelemetryResourceHandler:
+		# no data message listener, so the handler's latest update is sent
+		handler = GetTelemetryResourceHandler(name = name, coap_server = self.coapServer)
+		handler.dataUtil = CountingDataUtil()
+		handler.pollCycles = 1
+
+		self.coapServer.add_resource(path, handler)
+		self.dataMsgListener.setTelemetryDataListener(None if name == ConfigConst.SENSOR_MSG else name, handler)
+
+		return handler
+
+	def _createSensorData(self, name: str, val: float) -> SensorData:
+		sensorData = SensorData(name = name)
+		sensorData.setValue(val)
+
+		return sensorData
+
+	def _startObservers(self, path: str, observerCount: int = OBSERVER_COUNT):
+		# the resource needs data to be observed (it's 0.00 otherwise)
+		self.observers.startObservers(path, observerCount)
+
+		# each observer's first response - and the end of the max age
+		# since the last notification, so the next is sent right away
+		self._waitForNotifications(1)
+
+		time.sleep(1.0)
+
+	def _waitForNotifications(self, count: int, timeout: float = 10.0):
+		endTime = time.monotonic() + timeout
+
+		while time.monotonic() < endTime:
+			if all(len(notifications) >= count for notifications in self.observers.getNotifications()):
+				return
+
+			time.sleep(0.05)
+
+		self.fail("Observers didn't receive %d notifications" % count)
+
+class CountingDataUtil(DataUtil):
+	def __init__(self):
+		super().__init__()
+
+		self.encodeCount = 0
+
+	def dataToPayload(self, data = None, contentFormat: int = None):
+		self.encodeCount += 1
+
+		return super().dataToPayload(data, contentFormat)
+
+class ObserverClient():
+	"""
+	aiocoap observers of a local CoAP server, run by their own event
+	loop thread.
+
+	"""
+
+	def __init__(self, port: int):
+		self.uri = "coap://127.0.0.1:" + str(port) + "/"
+
+		self.eventLoop = asyncio.new_event_loop()
+		self.loopThread = threading.Thread(target = self.eventLoop.run_forever, daemon = True)
+		self.loopThread.start()
+
+		self.context = asyncio.run_coroutine_threadsafe(aiocoap.Context.create_client_context(), self.eventLoop).result(5)
+
+		self.observeTasks = []
+		self.notifications = []
+
+	def getNotifications(self) -> list:
+		return self.notifications
+
+	def startObservers(self, path: str, count: int):
+		for i in range(count):
+			notifications = []
+
+			self.notifications.append(notifications)
+			self.observeTasks.append(asyncio.run_coroutine_threadsafe(self._observe(path, notifications), self.eventLoop))
+
+	def stopClient(self):
+		for observeTask in self.observeTasks:
+			observeTask.cancel()
+
+		asyncio.run_coroutine_threadsafe(self.context.shutdown(), self.eventLoop).result(5)
+
+		self.eventLoop.call_soon_threadsafe(self.eventLoop.stop)
+		self.loopThread.join(5)
+
+	async def _observe(self, path: str, notifications: list):
+		request = self.context.request(aiocoap.Message(code = aiocoap.GET, uri = self.uri + path, observe = 0))
+
+		try:
+			notifications.append(await request.response)
+
+			async for response in request.observation:
+				notifications.append(response)
+		finally:
+			request.observation.cancel()
+
+if __name__ == "__main__":
+	unittest.main()
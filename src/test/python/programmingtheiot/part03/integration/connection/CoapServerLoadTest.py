@@ -0,0 +1,191 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import asyncio
+import logging
+import threading
+import time
+import unittest
+
+import aiocoap
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.CoapServerAdapter import CoapServerAdapter
+
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class CoapServerLoadTest(unittest.TestCase):
+	"""
+	This test case class contains very basic load tests for
+	CoapServerAdapter, driven by concurrent local aiocoap clients. The
+	request rate is logged. It should not be considered complete, but
+	serve as a starting point for the student implementing additional
+	functionality within their Programming the IoT environment.
+
+	NOTE: Like CoapServerAdapterTest, this starts the CDA's CoAP server
+	on the host and port in PiotConfig.props, so you should NOT run
+	another CoAP server (e.g., the GDA's CoAP server) at the same time.
+	"""
+
+	CLIENT_COUNT      = 4
+	REQUESTS          = 500
+	MAX_INFLIGHT      = 16
+	SLOW_UPDATE_SECS  = 2.0
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.getLogger('coapthon').setLevel(logging.WARNING)
+		logging.getLogger('coap').setLevel(logging.WARNING)
+		logging.info("Testing CoapServerAdapter under load...")
+
+		self.dataMsgListener = SlowActuatorDataMessageListener()
+
+		self.coapServer = CoapServerAdapter(dataMsgListener = self.dataMsgListener)
+		self.coapServer.startServer()
+
+		# the address the server's bound to - 'localhost' may be IPv4 or 6
+		host, port = self.coapServer.coapServer._socket.getsockname()[0:2]
+
+		self.uri = "coap://" + ("[" + host + "]" if ':' in host else host) + ":" + str(port) + "/"
+
+		# the telemetry resource has no data (so nothing to GET) until it's updated
+		sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+		sensorData.setValue(20.0)
+
+		self.dataMsgListener.handleSensorMessage(sensorData)
+
+	@classmethod
+	def tearDownClass(self):
+		self.coapServer.stopServer()
+
+	def setUp(self):
+		self.dataMsgListener.updateDelay = 0.0
+
+	def testConcurrentGets(self):
+		codes, elapsed = asyncio.run(self._runClients(self._sendGets, self.CLIENT_COUNT, self.REQUESTS))
+
+		requestCount = self.CLIENT_COUNT * self.REQUESTS
+
+		logging.info( \
+			"GET: %d requests from %d clients (%d in flight each) in %.2fs: %.1f req/s", \
+			requestCount, self.CLIENT_COUNT, self.MAX_INFLIGHT, elapsed, requestCount / elapsed)
+
+		# fewer in flight than the server will queue, so none are rejected
+		self.assertEqual(codes, [aiocoap.CONTENT] * requestCount)
+
+	def testSlowUpdatesDontBlockGets(self):
+		self.dataMsgListener.updateDelay = self.SLOW_UPDATE_SECS
+
+		codes, elapsed = asyncio.run(self._runSlowUpdates())
+
+		putCodes, getCodes = codes
+
+		logging.info( \
+			"GET: %d requests during %d slow PUTs in %.2fs: %.1f req/s", \
+			len(getCodes), len(putCodes), elapsed, len(getCodes) / elapsed)
+
+		self.assertEqual(getCodes, [aiocoap.CONTENT] * len(getCodes))
+		self.assertEqual(putCodes, [aiocoap.CHANGED] * len(putCodes))
+
+		# ... and while every update worker was busy
+		self.assertLess(elapsed, self.SLOW_UPDATE_SECS)
+		self.assertEqual(self.dataMsgListener.maxConcurrentUpdates, self.coapServer.updateWorkers)
+
+	async def _runClients(self, sendFunc, clientCount: int, count: int) -> tuple:
+		contexts = [await aiocoap.Context.create_client_context() for i in range(clientCount)]
+
+		try:
+			startTime = time.monotonic()
+			results = await asyncio.gather(*[sendFunc(context, count) for context in contexts])
+			elapsed = time.monotonic() - startTime
+		finally:
+			for context in contexts:
+				await context.shutdown()
+
+		return [code for codes in results for code in codes], elapsed
+
+	async def _runSlowUpdates(self) -> tuple:
+		# a client per PUT, as each client waits for one (CON) request to be
+		# acknowledged before sending the next. More than there are update
+		# workers, so some are queued
+		putTask = asyncio.ensure_future( \
+			self._runClients(self._sendPuts, self.coapServer.updateWorkers + 2, 1))
+
+		await asyncio.sleep(0.5)
+
+		getCodes, elapsed = await self._runClients(self._sendGets, self.CLIENT_COUNT, self.REQUESTS // 10)
+
+		self.assertFalse(putTask.done())
+
+		putCodes, putElapsed = await putTask
+
+		return (putCodes, getCodes), elapsed
+
+	async def _sendGets(self, context, count: int) -> list:
+		uri = self.uri + ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value
+
+		return await self._sendRequests(context, count, lambda: aiocoap.Message(code = aiocoap.GET, uri = uri))
+
+	async def _sendPuts(self, context, count: int) -> list:
+		uri = self.uri + ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value + '/' + ConfigConst.HUMIDIFIER_ACTUATOR_NAME
+
+		data = ActuatorData(typeID = ConfigConst.HUMIDIFIER_ACTUATOR_TYPE)
+		data.setCommand(ConfigConst.COMMAND_ON)
+
+		payload = DataUtil().actuatorDataToJson(data).encode('utf-8')
+
+		return await self._sendRequests(context, count, \
+			lambda: aiocoap.Message(code = aiocoap.PUT, uri = uri, payload = payload, content_format = ConfigConst.CONTENT_FORMAT_JSON))
+
+	async def _sendRequests(self, context, count: int, createMsg) -> list:
+		semaphore = asyncio.Semaphore(self.MAX_INFLIGHT)
+
+		async def send():
+			async with semaphore:
+				response = await context.request(createMsg()).response
+
+				return response.code
+
+		return await asyncio.gather(*[send() for i in range(count)])
+
+class SlowActuatorDataMessageListener(DefaultDataMessageListener):
+	"""
+	Takes 'updateDelay' seconds to handle each actuator command, like a
+	slow actuator, and records how many are handled at once.
+
+	"""
+
+	def __init__(self):
+		super().__init__()
+
+		self.updateDelay = 0.0
+		self.concurrentUpdates = 0
+		self.maxConcurrentUpdates = 0
+
+		self.lock = threading.Lock()
+
+	def handleActuatorCommandMessage(self, data: ActuatorData) -> bool:
+		with self.lock:
+			self.concurrentUpdates += 1
+			self.maxConcurrentUpdates = max(self.maxConcurrentUpdates, self.concurrentUpdates)
+
+		time.sleep(self.updateDelay)
+
+		with self.lock:
+			self.concurrentUpdates -= 1
+
+		return super().handleActuatorCommandMessage(data)
+
+if __name__ == "__main__":
+	unittest.main()
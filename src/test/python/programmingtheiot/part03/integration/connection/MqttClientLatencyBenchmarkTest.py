@@ -0,0 +1,513 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import json
+import logging
+import math
+import os
+import platform
+import socket
+import struct
+import tempfile
+import threading
+import time
+import unittest
+
+import paho.mqtt.client as mqttClient
+
+from paho.mqtt.client import topic_matches_sub
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+from programmingtheiot.data.DataUtil import DataUtil
+
+class LocalMqttBroker():
+	"""
+	A minimal, in-process MQTT 3.1.1 broker stand-in, so client tests and
+	benchmarks can run without a live broker.
+
+	It accepts any client, and routes each PUBLISH to every matching
+	subscription (with '+' and '#' wildcards) at the lower of the two QoS
+	levels, completing the QoS 1 and 2 flows in both directions. It keeps
+	no sessions, retained messages or wills, and doesn't resend anything.
+
+	"""
+
+	CONNECT     = 1
+	CONNACK     = 2
+	PUBLISH     = 3
+	PUBACK      = 4
+	PUBREC      = 5
+	PUBREL      = 6
+	PUBCOMP     = 7
+	SUBSCRIBE   = 8
+	SUBACK      = 9
+	UNSUBSCRIBE = 10
+	UNSUBACK    = 11
+	PINGREQ     = 12
+	PINGRESP    = 13
+	DISCONNECT  = 14
+
+	def __init__(self, host: str = 'localhost', port: int = 0):
+		"""
+		Constructor.
+
+		@param host The host (interface) to listen on.
+		@param port The port to listen on (0 for any free port - see getPort()).
+		"""
+		self.host = host
+		self.port = port
+
+		self.serverSocket = None
+		self.serverThread = None
+
+		# connected client sessions, each with its subscriptions (filter -> qos)
+		self.sessions    = [ ]
+		self.sessionLock = threading.Lock()
+
+		self.publishCount = 0
+
+	def getPort(self) -> int:
+		return self.port
+
+	def getPublishCount(self) -> int:
+		return self.publishCount
+
+	def startBroker(self):
+		self.serverSocket = socket.create_server((self.host, self.port))
+		self.port = self.serverSocket.getsockname()[1]
+
+		self.serverThread = threading.Thread(target = self._acceptClients, name = "LocalMqttBroker", daemon = True)
+		self.serverThread.start()
+
+		logging.info("Started local MQTT broker on %s:%d", self.host, self.port)
+
+	def stopBroker(self):
+		if self.serverSocket:
+			# wakes the accept() call
+			try:
+				self.serverSocket.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+
+			self.serverSocket.close()
+			self.serverSocket = None
+
+		with self.sessionLock:
+			sessions = list(self.sessions)
+
+		for session in sessions:
+			session.close()
+
+		if self.serverThread:
+			self.serverThread.join()
+			self.serverThread = None
+
+		logging.info("Stopped local MQTT broker. Messages published: %d", self.publishCount)
+
+	def _acceptClients(self):
+		while True:
+			try:
+				sock, address = self.serverSocket.accept()
+			except OSError:
+				break
+
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+			session = _BrokerSession(self, sock)
+
+			with self.sessionLock:
+				self.sessions.append(session)
+
+			threading.Thread(target = session.run, name = "LocalMqttBroker-" + str(address[1]), daemon = True).start()
+
+	def _endSession(self, session):
+		with self.sessionLock:
+			if session in self.sessions:
+				self.sessions.remove(session)
+
+	def _route(self, topic: str, payload: bytes, qos: int):
+		with self.sessionLock:
+			self.publishCount += 1
+			sessions = list(self.sessions)
+
+		for session in sessions:
+			subQos = session.getSubscriptionQos(topic)
+
+			if subQos is not None:
+				session.sendPublish(topic, payload, min(qos, subQos))
+
+class _BrokerSession():
+	"""
+	One client connection to the LocalMqttBroker.
+
+	"""
+
+	def __init__(self, broker: LocalMqttBroker, sock: socket.socket):
+		self.broker = broker
+		self.sock   = sock
+
+		self.subscriptions = { }
+		self.nextPacketID  = 0
+
+		self.sendLock = threading.Lock()
+
+	def close(self):
+		try:
+			self.sock.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+
+		self.sock.close()
+
+	def getSubscriptionQos(self, topic: str) -> int:
+		qosLevels = [qos for topicFilter, qos in list(self.subscriptions.items()) if topic_matches_sub(topicFilter, topic)]
+
+		return max(qosLevels) if qosLevels else None
+
+	def run(self):
+		try:
+			while True:
+				packetType, flags, body = self._readPacket()
+
+				if packetType is None or packetType == LocalMqttBroker.DISCONNECT:
+					break
+
+				self._handlePacket(packetType, flags, body)
+		except OSError:
+			pass
+		finally:
+			self.broker._endSession(self)
+			self.close()
+
+	def sendPublish(self, topic: str, payload: bytes, qos: int):
+		topicBytes = topic.encode('utf-8')
+		body = struct.pack('>H', len(topicBytes)) + topicBytes
+
+		with self.sendLock:
+			if qos > 0:
+				self.nextPacketID = self.nextPacketID % 0xFFFF + 1
+				body += struct.pack('>H', self.nextPacketID)
+
+			try:
+				self._writePacket(LocalMqttBroker.PUBLISH, qos << 1, body + payload, locked = True)
+			except OSError:
+				pass
+
+	def _handlePacket(self, packetType: int, flags: int, body: bytes):
+		if packetType == LocalMqttBroker.CONNECT:
+			# no session present, connection accepted
+			self._writePacket(LocalMqttBroker.CONNACK, 0, b'\x00\x00')
+
+		elif packetType == LocalMqttBroker.PUBLISH:
+			qos = (flags >> 1) & 0x03
+			topicLen = struct.unpack('>H', body[:2])[0]
+			topic = body[2:2 + topicLen].decode('utf-8')
+			pos = 2 + topicLen
+
+			if qos > 0:
+				packetID = body[pos:pos + 2]
+				pos += 2
+
+				self._writePacket(LocalMqttBroker.PUBACK if qos == 1 else LocalMqttBroker.PUBREC, 0, packetID)
+
+			self.broker._route(topic, body[pos:], qos)
+
+		elif packetType == LocalMqttBroker.PUBREL:
+			self._writePacket(LocalMqttBroker.PUBCOMP, 0, body[:2])
+
+		elif packetType == LocalMqttBroker.PUBREC:
+			self._writePacket(LocalMqttBroker.PUBREL, 0x02, body[:2])
+
+		elif packetType == LocalMqttBroker.SUBSCRIBE:
+			grantedQos = b''
+			pos = 2
+
+			while pos < len(body):
+				topicLen = struct.unpack('>H', body[pos:pos + 2])[0]
+				topicFilter = body[pos + 2:pos + 2 + topicLen].decode('utf-8')
+				qos = body[pos + 2 + topicLen] & 0x03
+				pos += 3 + topicLen
+
+				self.subscriptions[topicFilter] = qos
+				grantedQos += bytes([qos])
+
+			self._writePacket(LocalMqttBroker.SUBACK, 0, body[:2] + grantedQos)
+
+		elif packetType == LocalMqttBroker.UNSUBSCRIBE:
+			pos = 2
+
+			while pos < len(body):
+				topicLen = struct.unpack('>H', body[pos:pos + 2])[0]
+				self.subscriptions.pop(body[pos + 2:pos + 2 + topicLen].decode('utf-8'), None)
+				pos += 2 + topicLen
+
+			self._writePacket(LocalMqttBroker.UNSUBACK, 0, body[:2])
+
+		elif packetType == LocalMqttBroker.PINGREQ:
+			self._writePacket(LocalMqttBroker.PINGRESP, 0, b'')
+
+		# PUBACK and PUBCOMP complete an outgoing message; nothing to do
+
+	def _readBytes(self, count: int) -> bytes:
+		buf = b''
+
+		while len(buf) < count:
+			chunk = self.sock.recv(count - len(buf))
+
+			if not chunk:
+				return None
+
+			buf += chunk
+
+		return buf
+
+	def _readPacket(self):
+		header = self._readBytes(1)
+
+		if not header:
+			return None, None, None
+
+		# the remaining length is a 'variable byte integer'
+		remainingLen = 0
+		multiplier = 1
+
+		while True:
+			lenByte = self._readBytes(1)
+
+			if not lenByte:
+				return None, None, None
+
+			remainingLen += (lenByte[0] & 0x7F) * multiplier
+			multiplier *= 128
+
+			if not lenByte[0] & 0x80:
+				break
+
+		body = self._readBytes(remainingLen) if remainingLen else b''
+
+		if body is None:
+			return None, None, None
+
+		return header[0] >> 4, header[0] & 0x0F, body
+
+	def _writePacket(self, packetType: int, flags: int, body: bytes, locked: bool = False):
+		remainingLen = len(body)
+		lenBytes = b''
+
+		while True:
+			lenByte = remainingLen % 128
+			remainingLen //= 128
+			lenBytes += bytes([lenByte | 0x80 if remainingLen else lenByte])
+
+			if not remainingLen:
+				break
+
+		packet = bytes([(packetType << 4) | flags]) + lenBytes + body
+
+		if locked:
+			self.sock.sendall(packet)
+		else:
+			with self.sendLock:
+				self.sock.sendall(packet)
+
+class MqttClientLatencyBenchmarkTest(unittest.TestCase):
+	"""
+	This test case class benchmarks MqttClientConnector end-to-end
+	latency, through a LocalMqttBroker (so no live broker is needed):
+
+	- publishMessage(): from the publish call, until a (GDA) subscriber
+	  receives the message.
+	- actuator commands: from a (GDA) publish, until the CDA's data message
+	  listener receives the decoded ActuatorData.
+
+	Messages are sent one at a time, each once the last was received.
+
+	Each is run for every QoS level and payload size, and the latency
+	percentiles are logged, and written as JSON to the file named by the
+	PIOT_BENCHMARK_RESULTS environment variable (or MqttClientLatencyBenchmark.json
+	in the temp directory), so runs can be compared. It should not be considered
+	complete, but serve as a starting point for the student implementing additional
+	functionality within their Programming the IoT environment.
+	"""
+
+	MSG_COUNT     = 200
+	PAYLOAD_SIZES = [64, 1024, 16384]
+	QOS_LEVELS    = [0, 1, 2]
+	PERCENTILES   = [50, 95, 99]
+
+	RECEIVE_TIMEOUT = 10.0
+
+	results = []
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.INFO)
+		logging.info("Benchmarking MqttClientConnector latency...")
+
+		self.broker = LocalMqttBroker()
+		self.broker.startBroker()
+
+	@classmethod
+	def tearDownClass(self):
+		self.broker.stopBroker()
+
+		self._writeResults()
+
+	def setUp(self):
+		self.receiveTimes = { }
+		self.received = threading.Condition()
+
+		# the CDA's client
+		self.mqttClient = MqttClientConnector(clientID = 'CDAMqttClientLatencyTest001')
+		self.mqttClient.enableEncryption = False
+		self.mqttClient.outbox = None
+		self.mqttClient.port = self.broker.getPort()
+		self.mqttClient.reconnectMinDelay = 0.1
+		self.mqttClient.dedupWindowSecs = 0.0
+
+		listener = DefaultDataMessageListener()
+		listener.handleActuatorCommandMessage = lambda actuatorData: self._recordReceipt(int(actuatorData.getValue()))
+
+		self.mqttClient.setDataMessageListener(listener)
+
+		# the GDA's client
+		self.gdaClient = mqttClient.Client(client_id = 'GDAMqttClientLatencyTest001')
+		self.gdaClient.on_message = lambda client, userdata, msg: self._recordReceipt(int(msg.payload[:8]))
+		self.gdaClient.on_socket_open = self.mqttClient.onSocketOpen
+		self.gdaClient.connect(self.mqttClient.host, self.broker.getPort())
+		self.gdaClient.loop_start()
+
+	def tearDown(self):
+		self.mqttClient.disconnectClient()
+
+		self.gdaClient.disconnect()
+		self.gdaClient.loop_stop()
+
+	def testPublishLatency(self):
+		# any codec's topic suffix
+		self.gdaClient.subscribe(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value + '/#', qos = 2)
+
+		self._connect()
+
+		for qos in self.QOS_LEVELS:
+			for payloadSize in self.PAYLOAD_SIZES:
+				sendTimes = self._startRun()
+
+				for seqNo in range(self.MSG_COUNT):
+					payload = '%08d' % seqNo + 'x' * (payloadSize - 8)
+					sendTimes.append(time.perf_counter())
+
+					self.assertTrue(self.mqttClient.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = payload, qos = qos))
+					self._waitForReceipt(seqNo)
+
+				self._endRun('publishMessage', qos, payloadSize, sendTimes)
+
+	def testActuatorCommandLatency(self):
+		dataUtil = DataUtil()
+
+		self._connect()
+
+		for qos in self.QOS_LEVELS:
+			# so commands are delivered at the QoS they're published with
+			self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, qos = qos)
+			time.sleep(0.1)
+
+			for payloadSize in self.PAYLOAD_SIZES:
+				payloads = []
+
+				for seqNo in range(self.MSG_COUNT):
+					actuatorData = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE)
+					actuatorData.setCommand(ConfigConst.COMMAND_ON)
+					actuatorData.setValue(float(seqNo))
+
+					payload = dataUtil.actuatorDataToJson(actuatorData)
+					actuatorData.setStateData('x' * max(0, payloadSize - len(payload)))
+					payloads.append(dataUtil.actuatorDataToJson(actuatorData))
+
+				sendTimes = self._startRun()
+
+				for seqNo, payload in enumerate(payloads):
+					sendTimes.append(time.perf_counter())
+					self.gdaClient.publish(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value, payload, qos = qos)
+					self._waitForReceipt(seqNo)
+
+				self._endRun('actuatorCommand', qos, len(payloads[-1]), sendTimes)
+
+	def _connect(self):
+		self.assertTrue(self.mqttClient.connectClient())
+
+		startTime = time.monotonic()
+
+		while not self.mqttClient._isConnected() and time.monotonic() - startTime < self.RECEIVE_TIMEOUT:
+			time.sleep(0.01)
+
+		self.assertTrue(self.mqttClient._isConnected())
+
+		# let the subscriptions complete
+		time.sleep(0.2)
+
+	def _endRun(self, path: str, qos: int, payloadSize: int, sendTimes: list):
+		latencies = sorted((self.receiveTimes[seqNo] - sendTime) * 1000 for seqNo, sendTime in enumerate(sendTimes))
+
+		result = { \
+			'path': path, 'qos': qos, 'payloadSize': payloadSize, 'msgCount': len(latencies), \
+			'meanMs': sum(latencies) / len(latencies), 'maxMs': latencies[-1]}
+
+		for percentile in self.PERCENTILES:
+			# nearest rank
+			result['p%dMs' % percentile] = latencies[max(0, math.ceil(percentile / 100 * len(latencies)) - 1)]
+
+		self.results.append(result)
+
+		logging.info( \
+			"\n\tLatency: path = %s | QoS = %d | payload size = %d | msgs = %d | p50 = %.3f ms | p95 = %.3f ms | p99 = %.3f ms | max = %.3f ms", \
+			path, qos, payloadSize, len(latencies), result['p50Ms'], result['p95Ms'], result['p99Ms'], result['maxMs'])
+
+	def _recordReceipt(self, seqNo: int):
+		receiveTime = time.perf_counter()
+
+		with self.received:
+			self.receiveTimes[seqNo] = receiveTime
+			self.received.notify_all()
+
+	def _startRun(self) -> list:
+		with self.received:
+			self.receiveTimes.clear()
+
+		return []
+
+	def _waitForReceipt(self, seqNo: int):
+		# each message is sent once the last is received, so latencies don't
+		# include time queued behind other messages
+		with self.received:
+			self.assertTrue( \
+				self.received.wait_for(lambda: seqNo in self.receiveTimes, timeout = self.RECEIVE_TIMEOUT), \
+				"Message not received: %d" % seqNo)
+
+	@classmethod
+	def _writeResults(self):
+		resultsFileName = \
+			os.environ.get('PIOT_BENCHMARK_RESULTS', os.path.join(tempfile.gettempdir(), 'MqttClientLatencyBenchmark.json'))
+
+		report = { \
+			'benchmark': 'MqttClientLatency', 'timeStamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), \
+			'python': platform.python_version(), 'platform': platform.platform(), 'results': self.results}
+
+		with open(resultsFileName, 'w') as f:
+			json.dump(report, f, indent = 4)
+
+		logging.info("Wrote %d latency results to: %s", len(self.results), resultsFileName)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,116 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.cda.app.FleetSimulator import FleetSimulator
+
+class FleetSimulatorTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	FleetSimulator, plus a throughput check for a 10k device fleet: each
+	telemetry round must fit in one poll cycle, and cost about the same
+	per device as a small fleet's does.
+	It should not be considered complete, but serve as a starting
+	point for the student implementing additional functionality
+	within their Programming the IoT environment.
+	"""
+
+	POLL_RATE = 5
+
+	# a large fleet's telemetry round may cost at most this much more per device than a small one's
+	MAX_PER_DEVICE_SLOWDOWN = 2.0
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing FleetSimulator class...")
+
+	def setUp(self):
+		self.msgs = []
+		self.msgLock = threading.Lock()
+
+	def tearDown(self):
+		pass
+
+	def testFleetTelemetry(self):
+		fleetSim = FleetSimulator(deviceCount = 250, pollRate = self.POLL_RATE, batchSize = 100, transmitFunc = self._transmit)
+
+		fleetSim.startSimulator()
+		fleetSim.handleTelemetry()
+		fleetSim.stopSimulator()
+
+		# 250 devices in batches of 100
+		self.assertEqual(fleetSim.getMessageCount(), 3)
+		self.assertEqual(len(self.msgs), 3)
+
+		readings = []
+
+		for resourceName, msg in self.msgs:
+			self.assertEqual(resourceName, ResourceNameEnum.CDA_SENSOR_MSG_BATCH_RESOURCE)
+
+			readings.extend(fleetSim.dataUtil.payloadToSensorDataBatch(msg).getSensorDataList())
+
+		self.assertEqual(len(readings), 250 * 3)
+		self.assertEqual(set(sd.getLocationID() for sd in readings), set(fleetSim.getLocationIDs()))
+		self.assertEqual(len(fleetSim.getLocationIDs()), 250)
+
+		tempVals = [sd.getValue() for sd in readings if sd.getTypeID() == ConfigConst.TEMP_SENSOR_TYPE]
+
+		# each device has its own curve phase, so they don't all report the same value
+		self.assertEqual(len(tempVals), 250)
+		self.assertGreater(len(set(tempVals)), 200)
+
+	def testFleetTelemetryPerformance(self):
+		baseDeviceCount = 100
+		deviceCount = 10000
+
+		baseSecs = self._timeTelemetryRound(baseDeviceCount)
+		elapsedSecs = self._timeTelemetryRound(deviceCount)
+
+		logging.info( \
+			"Fleet telemetry round [%d devices]: %.3f secs (%.1f%% of a %d sec poll cycle), %.1f us / device (%.1f us with %d devices)", \
+			deviceCount, elapsedSecs, elapsedSecs * 100 / self.POLL_RATE, self.POLL_RATE, \
+			elapsedSecs * 1000000 / deviceCount, baseSecs * 1000000 / baseDeviceCount, baseDeviceCount)
+
+		self.assertLess(elapsedSecs, self.POLL_RATE)
+		self.assertLess(elapsedSecs / deviceCount, baseSecs / baseDeviceCount * self.MAX_PER_DEVICE_SLOWDOWN)
+
+	def _timeTelemetryRound(self, deviceCount: int, repeatCount: int = 3) -> float:
+		fleetSim = FleetSimulator(deviceCount = deviceCount, pollRate = self.POLL_RATE, transmitFunc = self._transmit)
+
+		# the best of several rounds, as other work on the host only ever adds time
+		bestSecs = None
+
+		logging.disable(level = logging.WARNING)
+
+		try:
+			for i in range(repeatCount):
+				startTime = time.perf_counter()
+				fleetSim.handleTelemetry()
+				elapsedSecs = time.perf_counter() - startTime
+
+				if bestSecs is None or elapsedSecs < bestSecs:
+					bestSecs = elapsedSecs
+		finally:
+			logging.disable(level = logging.NOTSET)
+
+		return bestSecs
+
+	def _transmit(self, resourceName = None, msg = None):
+		with self.msgLock:
+			self.msgs.append((resourceName, msg))
+
+if __name__ == "__main__":
+	unittest.main()
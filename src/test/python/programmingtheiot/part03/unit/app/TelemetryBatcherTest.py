@@ -0,0 +1,92 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.TelemetryBatcher import TelemetryBatcher
+
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class TelemetryBatcherTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	TelemetryBatcher. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing TelemetryBatcher class...")
+
+	def setUp(self):
+		self.batches = []
+
+	def tearDown(self):
+		pass
+
+	def testFlushOnSize(self):
+		batcher = TelemetryBatcher(flushFunc = self._flush, maxBatchSize = 3, maxBatchAgeSecs = 60.0)
+
+		for i in range(7):
+			batcher.addSensorData(self._createSensorData(float(i)))
+
+		self.assertEqual(len(self.batches), 2)
+		self.assertEqual(self.batches[0].getSensorDataCount(), 3)
+		self.assertEqual(batcher.getPendingCount(), 1)
+
+		self.assertTrue(batcher.flush())
+		self.assertFalse(batcher.flush())
+
+		self.assertEqual([d.getValue() for b in self.batches for d in b.getSensorDataList()], [float(i) for i in range(7)])
+
+	def testFlushOnAge(self):
+		batcher = TelemetryBatcher(flushFunc = self._flush, maxBatchSize = 100, maxBatchAgeSecs = 0.1)
+
+		batcher.addSensorData(self._createSensorData(1.0))
+		batcher.addSensorData(self._createSensorData(2.0))
+
+		self.assertEqual(len(self.batches), 0)
+
+		time.sleep(0.3)
+
+		self.assertEqual(len(self.batches), 1)
+		self.assertEqual(self.batches[0].getSensorDataCount(), 2)
+		self.assertEqual(batcher.getPendingCount(), 0)
+
+	def testBatchJsonRoundTrip(self):
+		batcher = TelemetryBatcher(flushFunc = self._flush, maxBatchSize = 2, maxBatchAgeSecs = 60.0)
+
+		batcher.addSensorData(self._createSensorData(20.5))
+		batcher.addSensorData(self._createSensorData(21.5))
+
+		dataUtil = DataUtil()
+		jsonData = dataUtil.sensorDataBatchToJson(self.batches[0])
+		batch = dataUtil.jsonToSensorDataBatch(jsonData)
+
+		self.assertEqual(batch.getTypeID(), ConfigConst.SENSOR_DATA_BATCH_TYPE)
+		self.assertEqual([d.getValue() for d in batch.getSensorDataList()], [20.5, 21.5])
+		self.assertEqual(batch.getSensorDataList()[0].getName(), ConfigConst.TEMP_SENSOR_NAME)
+
+	def _createSensorData(self, val: float) -> SensorData:
+		sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+		sensorData.setValue(val)
+
+		return sensorData
+
+	def _flush(self, batch):
+		self.batches.append(batch)
+
+if __name__ == "__main__":
+	unittest.main()
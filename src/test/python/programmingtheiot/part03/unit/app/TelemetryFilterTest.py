@@ -0,0 +1,93 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import time
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.app.TelemetryFilter import TelemetryFilter
+
+from programmingtheiot.data.SensorData import SensorData
+
+class TelemetryFilterTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	TelemetryFilter. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing TelemetryFilter class...")
+
+	def setUp(self):
+		self.telemetryFilter = TelemetryFilter()
+		self.telemetryFilter.setSensorFilter(ConfigConst.TEMP_SENSOR_TYPE, 0.5, heartbeatSecs = 60.0)
+		self.telemetryFilter.setSensorFilter(ConfigConst.HUMIDITY_SENSOR_TYPE, 10.0, isPercent = True, heartbeatSecs = 60.0)
+
+	def tearDown(self):
+		pass
+
+	def testAbsoluteDeadband(self):
+		sent = [self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, val) for val in [20.0, 20.2, 20.4, 20.5, 20.1, 19.9]]
+
+		# each change is measured from the last value sent, not the last reading
+		self.assertEqual(sent, [True, False, False, True, False, True])
+		self.assertEqual(self.telemetryFilter.getSentCount(), 3)
+		self.assertEqual(self.telemetryFilter.getSuppressedCount(), 3)
+
+	def testPercentDeadband(self):
+		sent = [self._isSignificant(ConfigConst.HUMIDITY_SENSOR_TYPE, val) for val in [40.0, 43.0, 44.0, 40.0, 36.5]]
+
+		self.assertEqual(sent, [True, False, True, False, True])
+
+	def testHeartbeat(self):
+		self.telemetryFilter.setSensorFilter(ConfigConst.TEMP_SENSOR_TYPE, 0.5, heartbeatSecs = 0.2)
+
+		self.assertTrue(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+		self.assertFalse(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+
+		time.sleep(0.3)
+
+		# an unchanged reading is still sent once the heartbeat time passes
+		self.assertTrue(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+		self.assertFalse(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+
+	def testAlwaysSent(self):
+		self.assertTrue(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+
+		# readings with the error flag set
+		sensorData = self._createSensorData(ConfigConst.TEMP_SENSOR_TYPE, 20.0)
+		sensorData.setStatusCode(-1)
+
+		self.assertTrue(self.telemetryFilter.isSignificant(sensorData))
+
+		# readings from other sensors, and sensor types with no deadband
+		self.assertTrue(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0, name = 'OtherTempSensor'))
+
+		self.telemetryFilter.setSensorFilter(ConfigConst.TEMP_SENSOR_TYPE, 0.0)
+
+		self.assertTrue(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+		self.assertTrue(self._isSignificant(ConfigConst.TEMP_SENSOR_TYPE, 20.0))
+		self.assertFalse(self.telemetryFilter.isSignificant(None))
+
+	def _createSensorData(self, typeID: int, val: float, name: str = ConfigConst.TEMP_SENSOR_NAME) -> SensorData:
+		sensorData = SensorData(typeID = typeID, name = name)
+		sensorData.setValue(val)
+
+		return sensorData
+
+	def _isSignificant(self, typeID: int, val: float, name: str = ConfigConst.TEMP_SENSOR_NAME) -> bool:
+		return self.telemetryFilter.isSignificant(self._createSensorData(typeID, val, name))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,101 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+import unittest
+
+from programmingtheiot.cda.app.UpstreamDispatcher import UpstreamDispatcher
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class UpstreamDispatcherTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	UpstreamDispatcher. It should not be considered complete,
+	but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT
+	environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing UpstreamDispatcher class...")
+
+	def setUp(self):
+		self.sentMsgs = []
+		self.sentLock = threading.Lock()
+
+	def tearDown(self):
+		pass
+
+	def testSubmitReturnsImmediately(self):
+		dispatcher = UpstreamDispatcher(transmitFunc = self._slowTransmit, queueSize = 16, workerCount = 1, rateLimit = 0, burstSize = 1)
+		dispatcher.startDispatcher()
+
+		startTime = time.monotonic()
+
+		for i in range(5):
+			self.assertTrue(dispatcher.submit(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "msg" + str(i)))
+
+		elapsed = time.monotonic() - startTime
+
+		self.assertLess(elapsed, 0.1)
+
+		dispatcher.stopDispatcher()
+
+		self.assertEqual(len(self.sentMsgs), 5)
+		self.assertEqual(dispatcher.getDispatchedCount(), 5)
+
+	def testQueueFullDropsOldest(self):
+		dispatcher = UpstreamDispatcher(transmitFunc = self._transmit, queueSize = 2, workerCount = 1, rateLimit = 0, burstSize = 1)
+
+		# not started, so nothing drains the queue
+		for i in range(4):
+			dispatcher.submit(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "msg" + str(i))
+
+		self.assertEqual(dispatcher.getDroppedCount(), 2)
+
+		dispatcher.startDispatcher()
+		dispatcher.stopDispatcher()
+
+		self.assertEqual([msg for (resource, msg, sendTime) in self.sentMsgs], ["msg2", "msg3"])
+
+	def testRateLimitIsPerResource(self):
+		# one worker, so a throttled resource mustn't hold it
+		dispatcher = UpstreamDispatcher(transmitFunc = self._transmit, queueSize = 16, workerCount = 1, rateLimit = 5.0, burstSize = 1)
+		dispatcher.startDispatcher()
+
+		startTime = time.monotonic()
+
+		for i in range(3):
+			dispatcher.submit(resourceName = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "sensor" + str(i))
+
+		dispatcher.submit(resourceName = ResourceNameEnum.CDA_SYSTEM_PERF_MSG_RESOURCE, msg = "sysPerf")
+		dispatcher.stopDispatcher()
+
+		elapsed = time.monotonic() - startTime
+
+		# 3 sensor msgs at 5 / sec with a burst of 1 need at least ~0.4 sec
+		self.assertGreaterEqual(elapsed, 0.35)
+		self.assertEqual([msg for (resource, msg, sendTime) in self.sentMsgs], ["sensor0", "sysPerf", "sensor1", "sensor2"])
+
+		# ... but the system perf msg isn't held up by them
+		self.assertLess(self.sentMsgs[1][2] - startTime, 0.1)
+
+	def _transmit(self, resourceName = None, msg = None):
+		with self.sentLock:
+			self.sentMsgs.append((resourceName, msg, time.monotonic()))
+
+	def _slowTransmit(self, resourceName = None, msg = None):
+		time.sleep(0.05)
+		self._transmit(resourceName = resourceName, msg = msg)
+
+if __name__ == "__main__":
+	unittest.main()
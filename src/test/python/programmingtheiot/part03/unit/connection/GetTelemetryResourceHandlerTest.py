@@ -0,0 +1,120 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import unittest
+
+from coapthon import defines
+from coapthon.messages.request import Request
+from coapthon.messages.response import Response
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.handlers.GetTelemetryResourceHandler import GetTelemetryResourceHandler
+
+from programmingtheiot.data.DataUtil import DataUtil
+from programmingtheiot.data.SensorData import SensorData
+
+class GetTelemetryResourceHandlerTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	GetTelemetryResourceHandler's cached payloads and ETags. It should
+	not be considered complete, but serve as a starting point for the
+	student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing GetTelemetryResourceHandler class...")
+
+	def setUp(self):
+		self.handler = GetTelemetryResourceHandler()
+		self.handler.dataUtil = CountingDataUtil()
+
+	def tearDown(self):
+		pass
+
+	def testCachedPayload(self):
+		self.handler.onSensorDataUpdate(self._createSensorData(20.0))
+
+		response = self._get()
+
+		self.assertEqual(response.code, defines.Codes.CONTENT.number)
+		self.assertEqual(len(response.etag), 1)
+
+		# encoded once, until the data changes
+		self.assertEqual(self._get().payload, response.payload)
+		self.assertEqual(self.handler.dataUtil.encodeCount, 1)
+
+		self.handler.onSensorDataUpdate(self._createSensorData(21.0))
+
+		self.assertNotEqual(self._get().etag, response.etag)
+		self.assertEqual(self.handler.dataUtil.encodeCount, 2)
+
+	def testConditionalGet(self):
+		self.handler.onSensorDataUpdate(self._createSensorData(20.0))
+
+		etags = self._get().etag
+
+		# the client's copy is current
+		response = self._get(etags = etags)
+
+		self.assertEqual(response.code, defines.Codes.VALID.number)
+		self.assertEqual(response.etag, etags)
+		self.assertIsNone(response.payload)
+		self.assertEqual(response.max_age, self.handler.pollCycles)
+
+		# ... until the data changes, or the client asks for another format
+		self.assertEqual(self._get(etags = etags, accept = ConfigConst.CONTENT_FORMAT_CBOR).code, defines.Codes.CONTENT.number)
+
+		self.handler.onSensorDataUpdate(self._createSensorData(21.0))
+
+		response = self._get(etags = etags)
+
+		self.assertEqual(response.code, defines.Codes.CONTENT.number)
+		self.assertEqual(DataUtil().jsonToSensorData(response.payload).getValue(), 21.0)
+
+	def testNoData(self):
+		etags = self._get().etag
+
+		self.assertEqual(self._get(etags = etags).code, defines.Codes.EMPTY.number)
+
+	def _createSensorData(self, val: float) -> SensorData:
+		sensorData = SensorData(name = ConfigConst.TEMP_SENSOR_NAME)
+		sensorData.setValue(val)
+
+		return sensorData
+
+	def _get(self, etags: list = None, accept: int = None) -> Response:
+		request = Request()
+		request.code = defines.Codes.GET.number
+
+		if etags:
+			request.etag = etags
+
+		if accept is not None:
+			request.accept = accept
+
+		resource, response = self.handler.render_GET_advanced(request, Response())
+
+		return response
+
+class CountingDataUtil(DataUtil):
+	def __init__(self):
+		super().__init__()
+
+		self.encodeCount = 0
+
+	def dataToPayload(self, data = None, contentFormat: int = None):
+		self.encodeCount += 1
+
+		return super().dataToPayload(data, contentFormat)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,123 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import threading
+import time
+import unittest
+
+from programmingtheiot.cda.connection.MessageDispatcher import MessageDispatcher
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MessageDispatcherTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MessageDispatcher. It should not be considered complete, but serve
+	as a starting point for the student implementing additional functionality
+	within their Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MessageDispatcher class...")
+
+	def setUp(self):
+		self.dispatcher = MessageDispatcher(queueSize = 4, overflowPolicy = MessageDispatcher.DROP_OLDEST)
+		self.msgs = []
+		self.msgLock = threading.Lock()
+
+	def tearDown(self):
+		if self.dispatcher.isRunning():
+			self.dispatcher.stopDispatcher()
+
+	def testDispatchByTopic(self):
+		actuatorCmdTopic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value
+
+		self.dispatcher.addHandler(topic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, handler = self._handleMessage, \
+			decoder = lambda topic, payload: payload.decode('utf-8'))
+		self.dispatcher.addHandler(topic = 'PIOT/ConstrainedDevice/+', handler = self._handleMessage)
+		self.dispatcher.startDispatcher()
+
+		# the actuator command matches both the topic and the wildcard
+		self.assertEqual(self.dispatcher.dispatch(actuatorCmdTopic, b'{}'), 2)
+		self.assertEqual(self.dispatcher.dispatch(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value, b'{}'), 1)
+		self.assertEqual(self.dispatcher.dispatch('PIOT/GatewayDevice/Status', b'{}'), 0)
+
+		self.dispatcher.stopDispatcher()
+
+		self.assertEqual(self.dispatcher.getDispatchedCount(), 3)
+		self.assertIn((actuatorCmdTopic, '{}'), self.msgs)
+		self.assertIn((actuatorCmdTopic, b'{}'), self.msgs)
+
+	def testSlowHandlerDoesNotBlockOtherTopics(self):
+		release = threading.Event()
+
+		self.dispatcher.addHandler(topic = 'slow', handler = lambda topic, payload: release.wait(5))
+		self.dispatcher.addHandler(topic = 'fast', handler = self._handleMessage)
+		self.dispatcher.startDispatcher()
+
+		self.dispatcher.dispatch('slow', b'1')
+
+		for i in range(3):
+			self.dispatcher.dispatch('fast', b'%d' % i)
+
+		time.sleep(0.2)
+
+		self.assertEqual(self.msgs, [('fast', b'0'), ('fast', b'1'), ('fast', b'2')])
+
+		release.set()
+
+	def testOverflowPolicy(self):
+		release = threading.Event()
+
+		def handleSlowly(topic, payload):
+			release.wait(5)
+			self._handleMessage(topic, payload)
+
+		self.dispatcher.addHandler(topic = 'dropOldest', handler = handleSlowly)
+		self.dispatcher.addHandler(topic = 'block', handler = handleSlowly, queueSize = 2, overflowPolicy = MessageDispatcher.BLOCK)
+		self.dispatcher.startDispatcher()
+
+		# the first message is taken by the (waiting) worker, the next 4 fill
+		# the queue, then the oldest queued messages are dropped
+		self.dispatcher.dispatch('dropOldest', b'0')
+		time.sleep(0.1)
+
+		for i in range(1, 8):
+			self.dispatcher.dispatch('dropOldest', b'%d' % i)
+
+		self.assertEqual(self.dispatcher.getDroppedCount(), 3)
+
+		# a full 'block' queue holds up the caller until there's room
+		for i in range(3):
+			self.dispatcher.dispatch('block', b'%d' % i)
+
+		blockedDispatch = threading.Thread(target = self.dispatcher.dispatch, args = ('block', b'3'))
+		blockedDispatch.start()
+		blockedDispatch.join(timeout = 0.2)
+
+		self.assertTrue(blockedDispatch.is_alive())
+
+		release.set()
+		blockedDispatch.join(timeout = 1)
+
+		self.assertFalse(blockedDispatch.is_alive())
+
+		self.dispatcher.stopDispatcher()
+
+		self.assertEqual([msg for topic, msg in self.msgs if topic == 'dropOldest'], [b'0', b'4', b'5', b'6', b'7'])
+		self.assertEqual([msg for topic, msg in self.msgs if topic == 'block'], [b'0', b'1', b'2', b'3'])
+		self.assertEqual(self.dispatcher.getDroppedCount(), 3)
+
+	def _handleMessage(self, topic, payload):
+		with self.msgLock:
+			self.msgs.append((topic, payload))
+
+if __name__ == "__main__":
+	unittest.main()
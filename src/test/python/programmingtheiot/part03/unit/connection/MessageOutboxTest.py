@@ -0,0 +1,136 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from programmingtheiot.cda.connection.MessageOutbox import MessageOutbox
+
+class MessageOutboxTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MessageOutbox. It should not be considered complete, but serve as
+	a starting point for the student implementing additional functionality
+	within their Programming the IoT environment.
+	"""
+
+	TOPIC = 'PIOT/ConstrainedDevice/SensorMsg'
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MessageOutbox class...")
+
+	def setUp(self):
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.outboxDir = self.tempDir.name
+
+	def tearDown(self):
+		self.tempDir.cleanup()
+
+	def testReplayInOrder(self):
+		outbox = MessageOutbox(outboxDir = self.outboxDir)
+
+		for i in range(25):
+			self.assertTrue(outbox.append(topic = self.TOPIC, payload = '{"value": %d}' % i, qos = i % 3))
+
+		replayedMsgs = []
+
+		while True:
+			msgs = outbox.readBatch(maxCount = 10)
+
+			if not msgs:
+				break
+
+			# an uncommitted batch is read again
+			self.assertEqual(outbox.readBatch(maxCount = 10), msgs)
+
+			replayedMsgs.extend(msgs)
+			outbox.commitBatch()
+
+		self.assertEqual(len(replayedMsgs), 25)
+		self.assertEqual(replayedMsgs[3], (self.TOPIC, b'{"value": 3}', 0))
+		self.assertEqual([msg[1] for msg in replayedMsgs], [b'{"value": %d}' % i for i in range(25)])
+		self.assertTrue(outbox.isEmpty())
+		self.assertEqual(outbox.getSize(), 0)
+
+	def testRecoverAfterRestart(self):
+		outbox = MessageOutbox(outboxDir = self.outboxDir)
+
+		for i in range(5):
+			outbox.append(topic = self.TOPIC, payload = b'msg%d' % i, qos = 1)
+
+		outbox.readBatch(maxCount = 2)
+		outbox.commitBatch()
+		outbox.close()
+
+		# simulate a write torn by a power cut
+		segmentFiles = [fileName for fileName in os.listdir(self.outboxDir) if fileName.endswith(MessageOutbox.SEGMENT_FILE_EXT)]
+		segmentFile = os.path.join(self.outboxDir, max(segmentFiles))
+
+		with open(segmentFile, 'ab') as f:
+			f.write(b'\x00\x01\x02')
+
+		outbox = MessageOutbox(outboxDir = self.outboxDir)
+
+		# committed messages aren't replayed again, and the torn record is dropped
+		self.assertEqual(outbox.getMessageCount(), 3)
+		self.assertEqual([msg[1] for msg in outbox.readBatch(maxCount = 10)], [b'msg2', b'msg3', b'msg4'])
+
+	def testSyncBatching(self):
+		outbox = MessageOutbox(outboxDir = self.outboxDir, syncBatchSize = 10, syncIntervalSecs = 60)
+
+		for i in range(25):
+			outbox.append(topic = self.TOPIC, payload = b'msg', qos = 0)
+
+		self.assertEqual(outbox.getSyncCount(), 2)
+
+		outbox.close()
+
+		self.assertEqual(outbox.getSyncCount(), 3)
+
+	def testSyncInterval(self):
+		outbox = MessageOutbox(outboxDir = self.outboxDir, syncBatchSize = 50, syncIntervalSecs = 0.2)
+
+		for i in range(3):
+			outbox.append(topic = self.TOPIC, payload = b'msg', qos = 0)
+
+		self.assertEqual(outbox.getSyncCount(), 0)
+
+		# synced once the interval has passed, with no more appends
+		time.sleep(0.5)
+
+		self.assertEqual(outbox.getSyncCount(), 1)
+
+		outbox.close()
+
+		self.assertEqual(outbox.getSyncCount(), 1)
+
+	def testEvictOldest(self):
+		maxSize = 64 * 1024
+		outbox = MessageOutbox(outboxDir = self.outboxDir, maxSize = maxSize)
+		payload = b'x' * 1000
+
+		for i in range(200):
+			outbox.append(topic = self.TOPIC, payload = payload + b'%d' % i, qos = 0)
+
+		self.assertLessEqual(outbox.getSize(), maxSize)
+		self.assertGreater(outbox.getEvictedCount(), 0)
+		self.assertEqual(outbox.getMessageCount() + outbox.getEvictedCount(), 200)
+
+		# the newest messages are kept
+		msgs = outbox.readBatch(maxCount = 200)
+
+		self.assertEqual(len(msgs), outbox.getMessageCount())
+		self.assertEqual(msgs[0][1], payload + b'%d' % outbox.getEvictedCount())
+		self.assertEqual(msgs[-1][1], payload + b'199')
+
+if __name__ == "__main__":
+	unittest.main()
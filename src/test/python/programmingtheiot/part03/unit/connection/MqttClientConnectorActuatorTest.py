@@ -0,0 +1,110 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import time
+import unittest
+
+from types import SimpleNamespace
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+
+from programmingtheiot.common.DefaultDataMessageListener import DefaultDataMessageListener
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+from programmingtheiot.data.ActuatorData import ActuatorData
+
+class MqttClientConnectorActuatorTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	MqttClientConnector inbound actuator command pipeline (decoding on
+	the dispatcher thread, and dropping duplicates). No broker is needed:
+	messages are passed to the onMessage() callback directly. It should
+	not be considered complete, but serve as a starting point for the
+	student implementing additional functionality within their Programming
+	the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttClientConnector actuator commands...")
+
+	def setUp(self):
+		self.cmds = []
+
+		self.listener = DefaultDataMessageListener()
+		self.listener.handleActuatorCommandMessage = self.cmds.append
+
+		self.mqttClient = MqttClientConnector(clientID = 'CDAMqttClientActuatorTest001')
+		self.mqttClient.outbox = None
+		self.mqttClient.dedupWindowSecs = 60.0
+		self.mqttClient.setDataMessageListener(self.listener)
+		self.mqttClient.msgDispatcher.startDispatcher()
+
+	def tearDown(self):
+		self.mqttClient.msgDispatcher.stopDispatcher()
+
+	def testDecodeFromBytes(self):
+		for contentFormat in [ConfigConst.CONTENT_FORMAT_JSON, ConfigConst.CONTENT_FORMAT_CBOR]:
+			payload = self._createCommandPayload(ConfigConst.COMMAND_ON, contentFormat)
+
+			self.assertIsInstance(payload, bytes)
+
+			self._receive(payload, contentFormat)
+
+		self.mqttClient.msgDispatcher.stopDispatcher()
+
+		self.assertEqual([cmd.getCommand() for cmd in self.cmds], [ConfigConst.COMMAND_ON] * 2)
+
+	def testDuplicateCommandDropped(self):
+		payload = self._createCommandPayload(ConfigConst.COMMAND_ON)
+
+		# a QoS 1 redelivery has the same payload
+		self._receive(payload)
+		self._receive(payload)
+
+		time.sleep(0.01)
+
+		# a new command with the same settings has a new time stamp
+		self._receive(self._createCommandPayload(ConfigConst.COMMAND_ON))
+
+		self.mqttClient.msgDispatcher.stopDispatcher()
+
+		self.assertEqual(len(self.cmds), 2)
+		self.assertEqual(self.mqttClient.getDuplicateCount(), 1)
+
+		# with the window disabled, it's handled again
+		self.mqttClient.dedupWindowSecs = 0.0
+		self.mqttClient.msgDispatcher.startDispatcher()
+
+		self._receive(payload)
+
+		self.mqttClient.msgDispatcher.stopDispatcher()
+
+		self.assertEqual(len(self.cmds), 3)
+
+	def _createCommandPayload(self, command: int, contentFormat: int = ConfigConst.CONTENT_FORMAT_JSON) -> bytes:
+		actuatorData = ActuatorData(typeID = ConfigConst.HVAC_ACTUATOR_TYPE)
+		actuatorData.setCommand(command)
+
+		payload = self.mqttClient.dataUtil.dataToPayload(actuatorData, contentFormat)
+
+		return payload.encode('utf-8') if isinstance(payload, str) else payload
+
+	def _receive(self, payload: bytes, contentFormat: int = ConfigConst.CONTENT_FORMAT_JSON):
+		topic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value
+
+		if contentFormat == ConfigConst.CONTENT_FORMAT_CBOR:
+			topic += ConfigConst.CBOR_TOPIC_SUFFIX
+
+		self.mqttClient.onMessage(None, None, SimpleNamespace(topic = topic, payload = payload))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,120 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import tempfile
+import threading
+import unittest
+
+from programmingtheiot.cda.connection.MessageOutbox import MessageOutbox
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MqttClientConnectorAsyncTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	MqttClientConnector async publish bookkeeping (in-flight window,
+	completion and flush) and outbox. No broker is needed: QoS 1 messages are
+	queued by the (unconnected) client, and completion is simulated
+	by invoking the onPublish() callback directly. It should not be
+	considered complete, but serve as a starting point for the student
+	implementing additional functionality within their Programming
+	the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttClientConnector async publish...")
+
+	def setUp(self):
+		self.mqttClient = MqttClientConnector(clientID = 'CDAMqttClientAsyncTest001')
+		self.mqttClient.enableEncryption = False
+		self.mqttClient._initClient()
+
+		self.outboxDir = tempfile.TemporaryDirectory()
+		self.mqttClient.outbox = MessageOutbox(outboxDir = self.outboxDir.name)
+
+	def tearDown(self):
+		self.mqttClient.outbox.close()
+		self.outboxDir.cleanup()
+
+	def testPublishAsyncCompletion(self):
+		future = self._publish(qos = 1)
+
+		self.assertFalse(future.done())
+		self.assertEqual(self.mqttClient.getInflightCount(), 1)
+		self.assertFalse(self.mqttClient.flush(timeout = 0.1))
+
+		mid = next(iter(self.mqttClient.inflightMsgs))
+		self.mqttClient.onPublish(None, None, mid)
+
+		self.assertEqual(future.result(timeout = 1), mid)
+		self.assertEqual(self.mqttClient.getInflightCount(), 0)
+		self.assertTrue(self.mqttClient.flush(timeout = 0.1))
+
+	def testPublishAsyncFailure(self):
+		# QoS 0 messages can't be queued while disconnected
+		future = self._publish(qos = 0)
+
+		self.assertIsInstance(future.exception(timeout = 1), ConnectionError)
+		self.assertEqual(self.mqttClient.getInflightCount(), 0)
+
+		# without an outbox to fall back on, the (blocking) publish fails too
+		self.mqttClient.outbox.close()
+		self.mqttClient.outbox = None
+
+		self.assertFalse(self.mqttClient.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "{}", qos = 0))
+
+		self.mqttClient.outbox = MessageOutbox(outboxDir = self.outboxDir.name)
+
+	def testInflightWindow(self):
+		futures = [self._publish(qos = 1) for i in range(self.mqttClient.maxInflightMsgs)]
+
+		# the window is full, so the next publish waits for a completion
+		blockedFutures = []
+		publisher = threading.Thread(target = lambda: blockedFutures.append(self._publish(qos = 1)))
+		publisher.start()
+		publisher.join(timeout = 0.2)
+
+		self.assertTrue(publisher.is_alive())
+
+		self.mqttClient.onPublish(None, None, next(iter(self.mqttClient.inflightMsgs)))
+		publisher.join(timeout = 1)
+
+		self.assertFalse(publisher.is_alive())
+		self.assertEqual(len(blockedFutures), 1)
+		self.assertEqual(self.mqttClient.getInflightCount(), self.mqttClient.maxInflightMsgs)
+
+		for mid in list(self.mqttClient.inflightMsgs):
+			self.mqttClient.onPublish(None, None, mid)
+
+		self.assertTrue(self.mqttClient.flush(timeout = 1))
+		self.assertTrue(all(future.done() for future in futures + blockedFutures))
+
+	def testPublishToOutbox(self):
+		outbox = self.mqttClient.outbox
+
+		for i in range(3):
+			self.assertTrue(self.mqttClient.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = '{"value": %d}' % i, qos = 1))
+
+		# stored rather than queued by the (disconnected) client
+		self.assertEqual(self.mqttClient.getInflightCount(), 0)
+		self.assertEqual(outbox.getMessageCount(), 3)
+
+		topic, payload, qos = outbox.readBatch(maxCount = 3)[2]
+
+		self.assertTrue(topic.startswith(ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value))
+		self.assertEqual(payload, b'{"value": 2}')
+		self.assertEqual(qos, 1)
+
+	def _publish(self, qos: int = 1):
+		return self.mqttClient.publishMessageAsync(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "{}", qos = qos)
+
+if __name__ == "__main__":
+	unittest.main()
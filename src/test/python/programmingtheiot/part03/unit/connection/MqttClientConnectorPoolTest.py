@@ -0,0 +1,74 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import unittest
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MqttClientConnectorPool import MqttClientConnectorPool
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MqttClientConnectorPoolTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	MqttClientConnectorPool. No broker is needed: only the assignment
+	of topics to connections is tested. It should not be considered
+	complete, but serve as a starting point for the student implementing
+	additional functionality within their Programming the IoT environment.
+	"""
+
+	POOL_SIZE = 4
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttClientConnectorPool class...")
+
+	def setUp(self):
+		self.mqttClientPool = MqttClientConnectorPool(poolSize = self.POOL_SIZE, clientID = 'CDAMqttClientPoolTest')
+
+	def testClientIDs(self):
+		self.assertEqual(self.mqttClientPool.getPoolSize(), self.POOL_SIZE)
+		self.assertEqual( \
+			[connector.clientID for connector in self.mqttClientPool.getConnectors()], \
+			['CDAMqttClientPoolTest-%d' % i for i in range(self.POOL_SIZE)])
+
+		self.assertEqual(MqttClientConnectorPool(poolSize = 1, clientID = 'CDAMqttClientPoolTest').getConnectors()[0].clientID, 'CDAMqttClientPoolTest')
+
+	def testTopicAssignment(self):
+		connectors = set()
+
+		for resource in ResourceNameEnum:
+			connector = self.mqttClientPool._getConnector(resource)
+
+			# always the same connection, whatever the topic's format
+			self.assertIs(self.mqttClientPool._getConnector(resource.value), connector)
+			self.assertIs(self.mqttClientPool._getConnector(resource.value + ConfigConst.CBOR_TOPIC_SUFFIX), connector)
+
+			connectors.add(connector)
+
+		# the resources are spread over more than one connection
+		self.assertGreater(len(connectors), 1)
+
+	def testSubscribeOnce(self):
+		actuatorCmdTopic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value
+		mgmtStatusCmdTopic = ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE.value
+
+		self.assertTrue(self.mqttClientPool.subscribeToTopic(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE, qos = 1))
+
+		for topic in [actuatorCmdTopic, actuatorCmdTopic + ConfigConst.CBOR_TOPIC_SUFFIX, mgmtStatusCmdTopic]:
+			subscribers = [connector for connector in self.mqttClientPool.getConnectors() if topic in connector.subscriptions]
+
+			self.assertEqual(subscribers, [self.mqttClientPool._getConnector(topic)])
+
+		self.assertTrue(self.mqttClientPool.unsubscribeFromTopic(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE))
+		self.assertNotIn(mgmtStatusCmdTopic, self.mqttClientPool._getConnector(mgmtStatusCmdTopic).subscriptions)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,141 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import socket
+import time
+import unittest
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MqttClientConnectorReconnectTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	MqttClientConnector reconnect backoff and subscription registry.
+	No broker is needed: connection attempts are made to a closed port.
+	It should not be considered complete, but serve as a starting point
+	for the student implementing additional functionality within their
+	Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttClientConnector reconnect...")
+
+	def setUp(self):
+		self.mqttClient = MqttClientConnector(clientID = 'CDAMqttClientReconnectTest001')
+		self.mqttClient.enableEncryption = False
+		self.mqttClient.outbox = None
+
+	def tearDown(self):
+		self.mqttClient.disconnectClient()
+
+	def testReconnectDelay(self):
+		self.mqttClient.reconnectMinDelay = 1.0
+		self.mqttClient.reconnectMaxDelay = 10.0
+
+		for attempt in range(1, 50):
+			backoff = min(10.0, 2 ** attempt)
+			delays = [self.mqttClient._getReconnectDelay(attempt) for i in range(100)]
+
+			self.assertTrue(all(0.0 <= delay <= backoff for delay in delays))
+
+			# jittered, rather than all the same
+			self.assertGreater(len(set(delays)), 90)
+
+	def testReconnectWithoutBroker(self):
+		self.mqttClient.port = self._getClosedPort()
+		self.mqttClient.reconnectMinDelay = 0.01
+		self.mqttClient.reconnectMaxDelay = 0.05
+
+		self.assertTrue(self.mqttClient.connectClient())
+		self.assertFalse(self.mqttClient.connectClient())
+
+		time.sleep(0.5)
+
+		self.assertGreaterEqual(self.mqttClient.getConnectAttemptCount(), 3)
+		self.assertEqual(self.mqttClient.getConnectCount(), 0)
+		self.assertFalse(self.mqttClient.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "{}", qos = 0))
+
+		attemptCount = self.mqttClient.getConnectAttemptCount()
+
+		self.assertTrue(self.mqttClient.disconnectClient())
+		self.assertFalse(self.mqttClient.disconnectClient())
+
+		time.sleep(0.1)
+
+		self.assertEqual(self.mqttClient.getConnectAttemptCount(), attemptCount)
+
+	def testPublishWhileDisconnected(self):
+		self.mqttClient.port = self._getClosedPort()
+		self.mqttClient.reconnectMinDelay = 0.01
+		self.mqttClient.reconnectMaxDelay = 0.05
+
+		self.assertTrue(self.mqttClient.connectClient())
+
+		time.sleep(0.2)
+
+		# with no outbox, fails straight away rather than waiting for a connection
+		startTime = time.monotonic()
+
+		self.assertFalse(self.mqttClient.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "{}", qos = 1))
+		self.assertLess(time.monotonic() - startTime, 1.0)
+		self.assertEqual(self.mqttClient.getInflightCount(), 0)
+
+		# ... and if the connection is lost just after the check, waits no longer than 'timeout'
+		self.mqttClient.connected = True
+
+		startTime = time.monotonic()
+
+		self.assertFalse(self.mqttClient.publishMessage(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "{}", qos = 1, timeout = 0.2))
+		self.assertLess(time.monotonic() - startTime, 1.0)
+		self.assertEqual(self.mqttClient.getInflightCount(), 1)
+
+		self.mqttClient.connected = False
+
+		# QoS 1 and 2 messages queued by the client fail once it's disconnected
+		future = self.mqttClient.publishMessageAsync(resource = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE, msg = "{}", qos = 2)
+
+		self.assertFalse(future.done())
+		self.assertEqual(self.mqttClient.getInflightCount(), 2)
+
+		self.assertTrue(self.mqttClient.disconnectClient())
+
+		self.assertIsInstance(future.exception(timeout = 1.0), ConnectionError)
+		self.assertEqual(self.mqttClient.getInflightCount(), 0)
+
+	def testSubscriptionRegistry(self):
+		actuatorCmdTopic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value
+		callback = lambda topic, payload: None
+
+		# remembered while disconnected, to be made on connect
+		self.assertTrue(self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE, callback = callback, qos = 1))
+		self.assertTrue(self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE, callback = None, qos = 2))
+		self.assertTrue(self.mqttClient.subscribeToTopic('PIOT/GatewayDevice/#', callback = callback, qos = 0))
+
+		self.assertEqual(self.mqttClient.subscriptions[ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE.value], 1)
+		self.assertEqual(self.mqttClient.subscriptions[actuatorCmdTopic], 2)
+		self.assertEqual(self.mqttClient.subscriptions['PIOT/GatewayDevice/#'], 0)
+
+		# subscribing without a callback keeps the existing handler
+		self.assertTrue(self.mqttClient.msgDispatcher.hasHandler(actuatorCmdTopic))
+
+		self.assertTrue(self.mqttClient.unsubscribeFromTopic(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE))
+		self.assertNotIn(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE.value, self.mqttClient.subscriptions)
+		self.assertFalse(self.mqttClient.msgDispatcher.hasHandler(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE))
+
+	def _getClosedPort(self) -> int:
+		with socket.socket() as sock:
+			sock.bind(('localhost', 0))
+
+			return sock.getsockname()[1]
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,115 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import unittest
+
+import paho.mqtt.client as mqttClient
+
+import programmingtheiot.common.ConfigConst as ConfigConst
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+
+from programmingtheiot.common.ResourceNameEnum import ResourceNameEnum
+
+class MqttClientConnectorSessionTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for the
+	MqttClientConnector persistent session and per-resource QoS. No
+	broker is needed: the client's subscribe calls are recorded when
+	onConnect() is called directly. It should not be considered complete,
+	but serve as a starting point for the student implementing additional
+	functionality within their Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing MqttClientConnector sessions...")
+
+	def setUp(self):
+		self.mqttClient = MqttClientConnector(clientID = 'CDAMqttClientSessionTest001')
+		self.mqttClient.enableEncryption = False
+		self.mqttClient.outbox = None
+		self.mqttClient.resourceQos[ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value] = 0
+		self.mqttClient.resourceQos[ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value] = 1
+
+		self.subscribed = []
+		self.unsubscribed = []
+
+	def testResourceQos(self):
+		sensorMsgTopic = ResourceNameEnum.CDA_SENSOR_MSG_RESOURCE.value
+		actuatorCmdTopic = ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE.value
+
+		self.assertEqual(self.mqttClient._getQos(sensorMsgTopic), 0)
+		self.assertEqual(self.mqttClient._getQos(actuatorCmdTopic), 1)
+		self.assertEqual(self.mqttClient._getQos(actuatorCmdTopic + ConfigConst.CBOR_TOPIC_SUFFIX), 1)
+
+		# the caller's QoS wins, unless it's invalid
+		self.assertEqual(self.mqttClient._getQos(sensorMsgTopic, 2), 2)
+		self.assertEqual(self.mqttClient._getQos(actuatorCmdTopic, 3), 1)
+		self.assertEqual(self.mqttClient._getQos('PIOT/GatewayDevice/#'), self.mqttClient.defaultQos)
+
+		self.assertTrue(self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_ACTUATOR_CMD_RESOURCE))
+		self.assertEqual(self.mqttClient.subscriptions[actuatorCmdTopic], 1)
+
+	def testCleanSession(self):
+		for cleanSession in [True, False]:
+			self.mqttClient.cleanSession = cleanSession
+			self.mqttClient._initClient()
+
+			self.assertEqual(self.mqttClient.mqttClient._clean_session, cleanSession)
+			self.assertEqual(self.mqttClient.mqttClient._client_id, b'CDAMqttClientSessionTest001')
+
+	def testResumedSession(self):
+		self.mqttClient.cleanSession = False
+		self._initRecordingClient()
+
+		self.mqttClient.subscribeToTopic('PIOT/GatewayDevice/#', qos = 0)
+		self._connect(sessionPresent = False)
+
+		# a new session needs every subscription
+		self.assertFalse(self.mqttClient.isSessionPresent())
+		self.assertEqual(len(self.subscribed[-1]), len(self.mqttClient.subscriptions))
+
+		self.mqttClient.onDisconnect(self.mqttClient.mqttClient, None, 1)
+
+		# changes made while disconnected
+		self.mqttClient.unsubscribeFromTopic('PIOT/GatewayDevice/#')
+		self.mqttClient.subscribeToTopic(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE, qos = 1)
+
+		subscribeCount = len(self.subscribed)
+		self._connect(sessionPresent = True)
+
+		# a resumed session only needs the changes
+		self.assertTrue(self.mqttClient.isSessionPresent())
+		self.assertEqual(self.subscribed[subscribeCount:], [[(ResourceNameEnum.CDA_MGMT_STATUS_CMD_RESOURCE.value, 1)]])
+		self.assertEqual(self.unsubscribed, [['PIOT/GatewayDevice/#']])
+
+		# nothing changed, so nothing to subscribe to
+		self.mqttClient.onDisconnect(self.mqttClient.mqttClient, None, 1)
+		self._connect(sessionPresent = True)
+
+		self.assertEqual(len(self.subscribed), subscribeCount + 1)
+
+		# the broker lost the session
+		self.mqttClient.onDisconnect(self.mqttClient.mqttClient, None, 1)
+		self._connect(sessionPresent = False)
+
+		self.assertEqual(len(self.subscribed[-1]), len(self.mqttClient.subscriptions))
+
+	def _connect(self, sessionPresent: bool):
+		self.mqttClient.onConnect( \
+			self.mqttClient.mqttClient, None, {'session present': int(sessionPresent)}, mqttClient.CONNACK_ACCEPTED)
+
+	def _initRecordingClient(self):
+		self.mqttClient._initClient()
+		self.mqttClient.mqttClient.subscribe = lambda topic, qos = 0: self.subscribed.append(topic)
+		self.mqttClient.mqttClient.unsubscribe = lambda topic: self.unsubscribed.append(topic)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,67 @@
+#####
+#
+# This class is part of the Programming the Internet of Things
+# project, and is available via the MIT License, which can be
+# found in the LICENSE file at the top level of this repository.
+#
+
+import logging
+import os
+import ssl
+import tempfile
+import unittest
+
+from programmingtheiot.cda.connection.MqttClientConnector import MqttClientConnector
+from programmingtheiot.cda.connection.TlsSessionContext import TlsSessionContext
+
+class TlsSessionContextTest(unittest.TestCase):
+	"""
+	This test case class contains very basic unit tests for
+	TlsSessionContext, and the MqttClientConnector's use of it. No broker
+	is needed. It should not be considered complete, but serve as a starting
+	point for the student implementing additional functionality within
+	their Programming the IoT environment.
+	"""
+
+	@classmethod
+	def setUpClass(self):
+		logging.basicConfig(format = '%(asctime)s:%(module)s:%(levelname)s:%(message)s', level = logging.DEBUG)
+		logging.info("Testing TlsSessionContext class...")
+
+	def setUp(self):
+		self.mqttClient = MqttClientConnector(clientID = 'CDAMqttClientTlsTest001')
+		self.mqttClient.outbox = None
+		self.mqttClient.enableEncryption = True
+
+	def testSharedContext(self):
+		context = TlsSessionContext.getContext()
+
+		self.assertIs(TlsSessionContext.getContext(), context)
+		self.assertEqual(context.verify_mode, ssl.CERT_REQUIRED)
+		self.assertTrue(context.check_hostname)
+		self.assertGreaterEqual(context.minimum_version, ssl.TLSVersion.TLSv1_2)
+
+		# each client uses the shared context
+		self.mqttClient.pemFileName = None
+		self.mqttClient._initClient()
+
+		self.assertIs(self.mqttClient.getTlsContext(), context)
+		self.assertIs(self.mqttClient.mqttClient._ssl_context, context)
+
+	def testInvalidCertFileFails(self):
+		with tempfile.TemporaryDirectory() as tempDir:
+			invalidCertFile = os.path.join(tempDir, 'invalid.pem')
+
+			with open(invalidCertFile, 'w') as f:
+				f.write('not a certificate')
+
+			for certFileName in [os.path.join(tempDir, 'missing.pem'), invalidCertFile]:
+				self.mqttClient.pemFileName = certFileName
+
+				# never connects without encryption instead
+				self.assertRaises((OSError, ssl.SSLError), self.mqttClient.connectClient)
+				self.assertIsNone(self.mqttClient.mqttClient)
+				self.assertIsNone(self.mqttClient.supervisorThread)
+
+if __name__ == "__main__":
+	unittest.main()